@@ -1,18 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from backend.app.routes import file_upload, qa_routes, list_documents_route, delete_document_route
-from backend.app.utils.database import engine, Base
+from backend.app.routes import (
+    file_upload, qa_routes, list_documents_route, delete_document_route, update_document_route, metrics_route,
+)
+from backend.app.utils.database import init_db, dispose_engines, load_optional_config
+
+
+async def _warm_up_models():
+    """Load (and autotune) the embedding backend in the background so the first request doesn't pay for it."""
+    from backend.app.services.embeddings_service import EmbeddingsService
+
+    try:
+        await run_in_threadpool(EmbeddingsService.preload)
+    except Exception as e:
+        print(f" Model warm-up failed (will retry on first request): {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Heavy initialization lives here rather than at import time:
+    the DB engine/tables are created before serving, and the embedding
+    model is warmed up in the background when STARTUP.PRELOAD_MODELS is on.
+    """
+    await run_in_threadpool(init_db)
+
+    startup_conf = load_optional_config("STARTUP")
+    warm_up = None
+    if startup_conf.get("PRELOAD_MODELS", True):
+        warm_up = asyncio.create_task(_warm_up_models())
+
+    yield
+
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+    await dispose_engines()
 
-app = FastAPI(title="Document Processing API")
 
-Base.metadata.create_all(bind=engine)
+app = FastAPI(title="Document Processing API", lifespan=lifespan)
 
 
 # ✅ Register routers under one consistent prefix
 app.include_router(file_upload.router, prefix="/api/documents")
 app.include_router(list_documents_route.router, prefix="/api/documents")
 app.include_router(delete_document_route.router, prefix="/api/documents")
+app.include_router(update_document_route.router, prefix="/api/documents")
 app.include_router(qa_routes.router, prefix="/api/qa")
+app.include_router(metrics_route.router, prefix="/api/metrics")
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -21,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count-Estimate", "Retry-After"],
 )
 
 
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime
+from sqlalchemy import (
+    BigInteger, Column, ForeignKey, Integer, String, JSON, DateTime, Index, Text,
+    delete, func, select, tuple_, text,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+import base64
 import datetime
+import json
 
 from backend.app.utils.database import Base
 
@@ -16,38 +22,290 @@ class Document(Base):
 
     id = Column(String, primary_key=True, index=True)  # UUID or unique hash
     filename = Column(String, nullable=False)          # Original filename
-    uploaded_at = Column(DateTime, default=datetime.datetime.utcnow)  # Upload time
+    # Upload time; NOT NULL because it is the leading keyset pagination column
+    uploaded_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
     chunk_count = Column(Integer, default=0)           # Number of chunks
     extra_metadata = Column(JSON, nullable=True)       # Optional metadata (embedding_dim, etc.)
     faiss_index_path = Column(String, nullable=True)   # Path to FAISS index on disk
 
- 
+    __table_args__ = (
+        # Keyset pagination walks (uploaded_at, id); btree scans it backwards for DESC
+        Index("ix_documents_uploaded_at_id", uploaded_at, id),
+        # Supports filename LIKE 'prefix%' lookups on PostgreSQL
+        Index(
+            "ix_documents_filename_prefix",
+            filename,
+            postgresql_ops={"filename": "varchar_pattern_ops"},
+        ),
+    )
+
+    # Columns projected for listing — avoids loading extra_metadata JSON blobs
+    LIST_COLUMNS = ("id", "filename", "uploaded_at", "chunk_count", "faiss_index_path")
+
+    # Stand-in upload time for rows written before uploaded_at was NOT NULL (sorts last)
+    UNKNOWN_UPLOADED_AT = datetime.datetime(1970, 1, 1)
+
+    @property
+    def revision(self) -> int:
+        """
+        Content revision: 1 for the original upload, bumped by every re-ingestion.
+
+        Returns:
+            int: The revision recorded in extra_metadata.
+        """
+        return int((self.extra_metadata or {}).get("revision", 1))
+
+    @classmethod
+    def upgrade_schema(cls, connection) -> None:
+        """
+        Brings an existing `documents` table in line with the model (create_all
+        only creates missing tables): backfills NULL uploaded_at values, on
+        PostgreSQL makes the column NOT NULL, and creates the listing indexes
+        (CONCURRENTLY on PostgreSQL, so writes are not blocked while they build).
+        Idempotent; called from init_db.
+
+        Args:
+            connection: SQLAlchemy connection in AUTOCOMMIT mode (CREATE INDEX
+                CONCURRENTLY cannot run inside a transaction).
+        """
+        table = cls.__tablename__
+        postgresql = connection.dialect.name == "postgresql"
+        connection.execute(
+            text(f"UPDATE {table} SET uploaded_at = :unknown WHERE uploaded_at IS NULL"),
+            {"unknown": cls.UNKNOWN_UPLOADED_AT},
+        )
+        if postgresql:
+            nullable = connection.execute(
+                text(
+                    "SELECT is_nullable FROM information_schema.columns "
+                    "WHERE table_name = :table AND column_name = 'uploaded_at'"
+                ),
+                {"table": table},
+            ).scalar()
+            if nullable == "YES":
+                connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN uploaded_at SET NOT NULL"))
+
+        indexes = {
+            "ix_documents_uploaded_at_id": "(uploaded_at, id)",
+            "ix_documents_filename_prefix": "(filename varchar_pattern_ops)" if postgresql else "(filename)",
+        }
+        concurrently = "CONCURRENTLY " if postgresql else ""
+        if postgresql:
+            # An interrupted concurrent build leaves an INVALID index that IF NOT EXISTS would keep
+            invalid = connection.execute(
+                text(
+                    "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+                ),
+                {"names": list(indexes)},
+            ).scalars().all()
+            for name in invalid:
+                connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        for name, columns in indexes.items():
+            connection.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} {columns}"))
+
+    @staticmethod
+    def encode_cursor(uploaded_at: datetime.datetime, doc_id: str) -> str:
+        """
+        Encodes the (uploaded_at, id) keyset position into an opaque cursor string.
+        """
+        raw = f"{uploaded_at.isoformat()}|{doc_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime.datetime, str]:
+        """
+        Decodes a cursor produced by `encode_cursor`.
+
+        Raises:
+            HTTPException: 400 if the cursor is malformed.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+            uploaded_at, doc_id = raw.split("|", 1)
+            return datetime.datetime.fromisoformat(uploaded_at), doc_id
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        """Escapes LIKE wildcards so a filename prefix is matched literally."""
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    @classmethod
+    def _prefix_filter(cls, filename_prefix: str):
+        """Builds the `filename LIKE 'prefix%'` clause."""
+        return cls.filename.like(f"{cls._escape_like(filename_prefix)}%", escape="\\")
+
+    @classmethod
+    def _list_statement(cls, limit: int, cursor: str | None, filename_prefix: str | None):
+        """
+        Builds the projected keyset-pagination SELECT shared by the sync and async listings.
+        Selects one extra row so the caller can tell whether another page exists.
+        """
+        stmt = select(*(getattr(cls, c) for c in cls.LIST_COLUMNS))
+
+        if filename_prefix:
+            stmt = stmt.where(cls._prefix_filter(filename_prefix))
+
+        if cursor:
+            last_uploaded_at, last_id = cls.decode_cursor(cursor)
+            stmt = stmt.where(tuple_(cls.uploaded_at, cls.id) < (last_uploaded_at, last_id))
+
+        return stmt.order_by(cls.uploaded_at.desc(), cls.id.desc()).limit(limit + 1)
+
+    @classmethod
+    def _build_page(cls, rows, limit: int):
+        """Converts projected rows into listing dicts plus the next-page cursor."""
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        documents = [
+            {
+                "document_id": r.id,
+                "filename": r.filename,
+                "uploaded_at": r.uploaded_at.isoformat() if r.uploaded_at else None,
+                "chunk_count": r.chunk_count,
+                "faiss_index_path": r.faiss_index_path,
+            }
+            for r in rows
+        ]
+
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = cls.encode_cursor(last.uploaded_at, last.id)
+
+        return documents, next_cursor
+
     @classmethod
-    def list_documents(cls, db: Session):
+    def list_documents(
+        cls,
+        db: Session,
+        limit: int = 50,
+        cursor: str | None = None,
+        filename_prefix: str | None = None,
+    ):
         """
-        Retrieves all documents with minimal fields for API listing.
+        Retrieves one page of documents, newest first, using keyset pagination.
+
+        Only the listing columns are selected, so rows are returned as lightweight
+        tuples instead of full ORM objects.
+
+        Args:
+            db (Session): SQLAlchemy session.
+            limit (int): Maximum number of documents in the page.
+            cursor (str | None): Cursor returned by the previous page, if any.
+            filename_prefix (str | None): Only include filenames starting with this prefix.
 
         Returns:
-            List[dict]: Each record includes document_id, filename, upload time, chunk_count, and FAISS path.
+            tuple[List[dict], str | None]: The page of documents and the cursor for the next page.
+        """
+        try:
+            rows = db.execute(cls._list_statement(limit, cursor, filename_prefix)).all()
+            return cls._build_page(rows, limit)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to list documents: {str(e)}")
+
+    @classmethod
+    async def list_documents_async(
+        cls,
+        db: AsyncSession,
+        limit: int = 50,
+        cursor: str | None = None,
+        filename_prefix: str | None = None,
+    ):
+        """
+        Async version of `list_documents` for AsyncSession callers.
         """
         try:
-            docs = db.query(cls).all()
-            if not docs:
-                return []
-            return [
-                {
-                    "document_id": d.id,
-                    "filename": d.filename,
-                    "uploaded_at": d.uploaded_at.isoformat() if d.uploaded_at else None,
-                    "chunk_count": d.chunk_count,
-                    "faiss_index_path": d.faiss_index_path,
-                }
-                for d in docs
-            ]
+            result = await db.execute(cls._list_statement(limit, cursor, filename_prefix))
+            return cls._build_page(result.all(), limit)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to list documents: {str(e)}")
 
-  
+    @classmethod
+    def _estimate_statement(cls, dialect_name: str | None, filename_prefix: str | None):
+        """
+        Builds the statement behind `estimate_count`.
+
+        Returns:
+            tuple: (statement, kind) where kind is "exact", "reltuples" or "explain".
+        """
+        if dialect_name != "postgresql":
+            stmt = select(func.count(cls.id))
+            if filename_prefix:
+                stmt = stmt.where(cls._prefix_filter(filename_prefix))
+            return stmt, "exact"
+
+        if not filename_prefix:
+            stmt = text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table").bindparams(
+                table=cls.__tablename__
+            )
+            return stmt, "reltuples"
+
+        stmt = text(
+            f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {cls.__tablename__} "
+            "WHERE filename LIKE :pattern ESCAPE '\\'"
+        ).bindparams(pattern=f"{cls._escape_like(filename_prefix)}%")
+        return stmt, "explain"
+
+    @staticmethod
+    def _parse_estimate(value, kind: str) -> int | None:
+        """Turns the raw scalar from `_estimate_statement` into a row count."""
+        if value is None:
+            return None
+        if kind == "explain":
+            # psycopg2 decodes the JSON plan, asyncpg returns it as text
+            if isinstance(value, str):
+                value = json.loads(value)
+            return int(value[0]["Plan"]["Plan Rows"])
+        # reltuples is -1 until the table has been analyzed
+        return int(value) if value >= 0 else None
+
+    @classmethod
+    def estimate_count(cls, db: Session, filename_prefix: str | None = None) -> int | None:
+        """
+        Returns a cheap estimate of the number of documents.
+
+        On PostgreSQL this reads planner statistics (pg_class.reltuples, or the
+        row estimate from EXPLAIN when a prefix filter is given) instead of
+        running COUNT(*), which scans the whole table. Other dialects fall back
+        to an exact count.
+
+        Args:
+            db (Session): SQLAlchemy session.
+            filename_prefix (str | None): Optional filename prefix filter.
+
+        Returns:
+            int | None: Estimated row count, or None if no estimate is available.
+        """
+        try:
+            dialect_name = db.bind.dialect.name if db.bind is not None else None
+            stmt, kind = cls._estimate_statement(dialect_name, filename_prefix)
+            return cls._parse_estimate(db.execute(stmt).scalar(), kind)
+        except Exception as e:
+            print(f" Document count estimate failed: {e}")
+            return None
+
+    @classmethod
+    async def estimate_count_async(cls, db: AsyncSession, filename_prefix: str | None = None) -> int | None:
+        """
+        Async version of `estimate_count`.
+        """
+        try:
+            dialect_name = db.bind.dialect.name if db.bind is not None else None
+            stmt, kind = cls._estimate_statement(dialect_name, filename_prefix)
+            result = await db.execute(stmt)
+            return cls._parse_estimate(result.scalar(), kind)
+        except Exception as e:
+            print(f" Document count estimate failed: {e}")
+            return None
+
     @classmethod
     def delete_metadata(cls, db: Session, doc_id: str):
         """
@@ -65,6 +323,7 @@ class Document(Base):
             if not doc:
                 raise HTTPException(status_code=404, detail="Document not found.")
 
+            db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == doc_id))
             db.delete(doc)
             db.commit()
 
@@ -78,7 +337,29 @@ class Document(Base):
             db.rollback()
             raise HTTPException(status_code=500, detail=f"Failed to delete metadata: {str(e)}")
 
-    
+    @classmethod
+    async def delete_metadata_async(cls, db: AsyncSession, doc_id: str):
+        """
+        Async version of `delete_metadata`.
+        """
+        try:
+            doc = await db.get(cls, doc_id)
+            if not doc:
+                raise HTTPException(status_code=404, detail="Document not found.")
+
+            await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == doc_id))
+            await db.delete(doc)
+            await db.commit()
+
+            print(f"🗑️ Deleted metadata for document '{doc.filename}' (doc_id={doc_id})")
+            return {"status": "deleted", "document_id": doc_id}
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            await db.rollback()
+            raise HTTPException(status_code=500, detail=f"Failed to delete metadata: {str(e)}")
+
     @classmethod
     def get_metadata(cls, db: Session, doc_id: str):
         """
@@ -101,3 +382,102 @@ class Document(Base):
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to get metadata: {str(e)}")
 
+    @classmethod
+    async def get_metadata_async(cls, db: AsyncSession, doc_id: str):
+        """
+        Async version of `get_metadata`.
+        """
+        try:
+            doc = await db.get(cls, doc_id)
+            if not doc:
+                raise HTTPException(status_code=404, detail="Document not found.")
+            return doc
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get metadata: {str(e)}")
+
+
+class DocumentChunk(Base):
+    """
+    Text of each chunk, keyed by the FAISS vector id it was embedded into,
+    so search hits can be turned back into context without re-reading the file.
+    """
+
+    __tablename__ = "document_chunks"
+
+    document_id = Column(String, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    vector_id = Column(BigInteger, primary_key=True)  # Id in the sharded FAISS store
+    ordinal = Column(Integer, nullable=False)         # Position of the chunk in the document
+    text = Column(Text, nullable=False)
+
+    @classmethod
+    async def get_chunks_async(cls, db: AsyncSession, doc_id: str) -> list["DocumentChunk"]:
+        """
+        Returns every stored chunk of a document in reading order.
+
+        Args:
+            db (AsyncSession): SQLAlchemy async session.
+            doc_id (str): Document unique ID.
+
+        Returns:
+            list[DocumentChunk]: Chunk rows ordered by ordinal (empty for documents
+                ingested before chunk texts were stored).
+        """
+        try:
+            result = await db.execute(select(cls).where(cls.document_id == doc_id).order_by(cls.ordinal))
+            return list(result.scalars().all())
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get chunks: {str(e)}")
+
+    @classmethod
+    async def get_hits_async(cls, db: AsyncSession, vector_ids) -> dict[int, tuple[str, str, str]]:
+        """
+        Fetches chunk texts for corpus-wide search hits, with the document each belongs to.
+
+        Args:
+            db (AsyncSession): SQLAlchemy async session.
+            vector_ids (Iterable[int]): Vector ids returned by the FAISS search.
+
+        Returns:
+            dict[int, tuple[str, str, str]]: (document_id, filename, text) per vector id;
+                ids without a stored chunk are omitted.
+        """
+        vector_ids = [int(v) for v in vector_ids if v != -1]
+        if not vector_ids:
+            return {}
+        try:
+            result = await db.execute(
+                select(cls.vector_id, cls.document_id, Document.filename, cls.text)
+                .join(Document, Document.id == cls.document_id)
+                .where(cls.vector_id.in_(vector_ids))
+            )
+            return {row.vector_id: (row.document_id, row.filename, row.text) for row in result.all()}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get chunks: {str(e)}")
+
+    @classmethod
+    async def get_texts_async(cls, db: AsyncSession, doc_id: str, vector_ids) -> dict[int, str]:
+        """
+        Fetches chunk texts for a set of search hits.
+
+        Args:
+            db (AsyncSession): SQLAlchemy async session.
+            doc_id (str): Document the hits belong to.
+            vector_ids (Iterable[int]): Vector ids returned by the FAISS search.
+
+        Returns:
+            dict[int, str]: Text per vector id; ids without a stored chunk are omitted.
+        """
+        vector_ids = [int(v) for v in vector_ids if v != -1]
+        if not vector_ids:
+            return {}
+        try:
+            result = await db.execute(
+                select(cls.vector_id, cls.text).where(
+                    cls.document_id == doc_id, cls.vector_id.in_(vector_ids)
+                )
+            )
+            return {row.vector_id: row.text for row in result.all()}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get chunks: {str(e)}")
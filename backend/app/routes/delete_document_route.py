@@ -2,6 +2,8 @@ import shutil
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from backend.app.models.models import Document
+from backend.app.services.answer_cache import get_answer_cache
+from backend.app.services.vector_store_sharded import ShardedFAISSVectorStore
 from pathlib import Path
 
 from backend.app.utils.database import get_db
@@ -30,8 +32,13 @@ def delete_document(document_id: str, db: Session = Depends(get_db)):
                 shutil.rmtree(faiss_path)
                 print(f" Deleted FAISS index at {faiss_path}")
 
+        # Remove the document's vectors from the shared sharded index
+        removed = ShardedFAISSVectorStore().delete_document(document_id)
+        print(f" Removed {removed} vectors for document {document_id}")
+
         # Delete document metadata from DB
         result = Document.delete_metadata(db, document_id)
+        get_answer_cache().invalidate_document(document_id)
 
         return result
     
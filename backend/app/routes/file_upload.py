@@ -1,22 +1,28 @@
 import uuid
 import traceback
 from fastapi import APIRouter, UploadFile, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from backend.app.utils.database import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.utils.admission import get_limiter, request_deadline
+from backend.app.utils.database import get_async_db
 from backend.app.utils.file_utils import FileUtils
 from backend.app.services.text_extraction import TextExtractor
 from backend.app.services.text_spitter import TextSplitter
 from backend.app.services.embeddings_service import EmbeddingsService
-from backend.app.services.vector_store_faiss import FAISSVectorStore
+from backend.app.services.vector_store_sharded import DocumentKeyCollisionError, ShardedFAISSVectorStore
 from backend.app.schema.document_schema import UploadResponse
 from backend.app.services.metadata_service import MetadataService
+from backend.app.utils.metrics import metrics
 
 
 router = APIRouter(tags=["File Upload"])
 
+# Fresh document ids tried when a new id's vector range is already taken (see vector_store_sharded)
+DOCUMENT_ID_ATTEMPTS = 3
+
 
 @router.post("/upload", response_model=UploadResponse)
-async def upload_document(file: UploadFile, db: Session = Depends(get_db)):
+async def upload_document(file: UploadFile, db: AsyncSession = Depends(get_async_db)):
     """
     Upload and process a document (PDF/TXT) for semantic retrieval and Q&A.
 
@@ -33,24 +39,26 @@ async def upload_document(file: UploadFile, db: Session = Depends(get_db)):
 
 
     :param file: Uploaded file (PDF or TXT).
-    :param db: Database session dependency.
+    :param db: Async database session dependency.
     :return: UploadResponse with document details and upload status.
-    :raises HTTPException: If validation, extraction, embedding, or storage fails.
+    :raises HTTPException: If validation, extraction, embedding, or storage fails,
+                           or 429 when the embedding/indexing stages are saturated.
     """
+    deadline = request_deadline()
     try:
         # Validate file extension
         ext = FileUtils.validate_file(file)
         if not ext:
             raise HTTPException(status_code=400, detail="Invalid or missing file extension.")
 
-        # Save file locally
-        saved_path = FileUtils.save_file(file)
+        # Save file locally (blocking file I/O, kept off the event loop)
+        saved_path = await run_in_threadpool(FileUtils.save_file, file)
         filename = file.filename
         document_id = str(uuid.uuid4())
 
         # Extract text from file
         try:
-            text = TextExtractor.extract_text(saved_path)
+            text = await run_in_threadpool(TextExtractor.extract_text, saved_path)
             if not text or not text.strip():
                 raise HTTPException(status_code=400, detail="No readable text found in document.")
         except Exception as extract_err:
@@ -58,33 +66,60 @@ async def upload_document(file: UploadFile, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail=f"Text extraction error: {extract_err}")
 
         # Split text into chunks
-        splitter = TextSplitter(chunk_size=800, overlap=100)
-        chunks = splitter.split_text(text)
+        splitter = TextSplitter.from_config()
+        chunks = await run_in_threadpool(splitter.split_text, text)
         if not chunks:
             raise HTTPException(status_code=400, detail="Text splitting produced no chunks.")
 
-        # Generate embeddings
-        embedder = EmbeddingsService(model_name="all-MiniLM-L6-v2")
-        embeddings = embedder.create_embeddings(chunks)
-        if not embeddings:
+        # Generate embeddings (the model is loaded before taking a slot, so a cold start
+        # doesn't hold the stage or count towards its service time)
+        embedder = await run_in_threadpool(EmbeddingsService)
+        async with get_limiter("embedding").slot(deadline):
+            embeddings = await run_in_threadpool(embedder.create_embeddings, chunks)
+        if embeddings.size == 0:
             raise HTTPException(status_code=400, detail="Embedding generation failed.")
-        print(f" Generated {len(embeddings)} embeddings (dim={len(embeddings[0])}).")
+        embedding_dim = embeddings.shape[1]
+        print(f" Generated {len(embeddings)} embeddings (dim={embedding_dim}).")
 
         try:
-            vector_store = FAISSVectorStore(embedding_dim=len(embeddings[0]))
-            vector_ids = vector_store.add_embeddings(embeddings)
+            vector_store = ShardedFAISSVectorStore(embedding_dim=embedding_dim)
+            async with get_limiter("indexing").slot(deadline):
+                for attempt in range(DOCUMENT_ID_ATTEMPTS):
+                    try:
+                        vector_ids = await run_in_threadpool(
+                            vector_store.add_embeddings, embeddings, document_id=document_id, new_document=True
+                        )
+                        break
+                    except DocumentKeyCollisionError as collision:
+                        metrics.inc("vector_store.key_collisions")
+                        print(f" {collision} Retrying with a new document id.")
+                        if attempt == DOCUMENT_ID_ATTEMPTS - 1:
+                            raise
+                        document_id = str(uuid.uuid4())
 
             metadata_service = MetadataService()
-            document = metadata_service.save_metadata(
-                db=db,
-                doc_id=document_id,
-                filename=filename,
-                chunks=chunks,
-                embedding_dim=len(embeddings[0]),
-                faiss_index_path=vector_store.index_path,
-            )
+            try:
+                document = await metadata_service.save_metadata_async(
+                    db=db,
+                    doc_id=document_id,
+                    filename=filename,
+                    chunks=chunks,
+                    embedding_dim=embedding_dim,
+                    faiss_index_path=vector_store.index_path,
+                    vector_ids=vector_ids,
+                )
+            except Exception:
+                # Without its row the document's vectors would keep its id range claimed
+                # and fill corpus-wide top-k slots: remove them before failing
+                try:
+                    await run_in_threadpool(vector_store.delete_document, document_id)
+                except Exception as cleanup_err:
+                    print(f" Failed to remove vectors of unsaved document {document_id}: {cleanup_err}")
+                raise
 
             print(f" Stored {document_id} vectors in FAISS.")
+        except HTTPException:
+            raise
         except Exception as faiss_err:
             print(f"❌ FAISS indexing failed: {faiss_err}")
             raise HTTPException(status_code=500, detail=f"FAISS indexing failed: {faiss_err}")
@@ -1,30 +1,55 @@
-from fastapi import Depends, APIRouter, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import Depends, APIRouter, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.app.schema.document_schema import DocumentOut
 from backend.app.models.models import Document
 
-from backend.app.utils.database import get_db
+from backend.app.utils.database import get_async_db
 
 router = APIRouter(tags=["List Documents"])
 
 
 @router.get("/", response_model=list[DocumentOut])
-def get_all_documents(db: Session = Depends(get_db)):
+async def get_all_documents(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of documents per page"),
+    cursor: str | None = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    filename_prefix: str | None = Query(None, description="Only list filenames starting with this prefix"),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Retrieve all uploaded documents from the database.
+    Retrieve one page of uploaded documents, newest first.
 
+    Pagination details are returned in response headers so the body stays a plain list:
+    - X-Next-Cursor: pass as `cursor` to fetch the next page (absent on the last page).
+    - X-Total-Count-Estimate: approximate number of matching documents.
+
+    :param response: Response object used to set pagination headers.
+    :param limit: Maximum number of documents per page.
+    :param cursor: Opaque cursor returned by the previous page.
+    :param filename_prefix: Optional filename prefix filter.
     :param db: Database session dependency.
     :return: List of DocumentOut objects containing document details.
     :raises HTTPException: If no documents are found or database retrieval fails.
 
     """
     try:
-        documents = Document.list_documents(db)
-        if not documents:
+        documents, next_cursor = await Document.list_documents_async(
+            db, limit=limit, cursor=cursor, filename_prefix=filename_prefix
+        )
+        if not documents and not cursor:
             raise HTTPException(status_code=404, detail="No documents found.")
 
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+
+        # The estimate is only needed to render totals on the first page
+        if not cursor:
+            estimate = await Document.estimate_count_async(db, filename_prefix=filename_prefix)
+            if estimate is not None:
+                response.headers["X-Total-Count-Estimate"] = str(estimate)
+
         return documents
-        
+
     except HTTPException as http_err:
         raise http_err
 
@@ -33,4 +58,4 @@ def get_all_documents(db: Session = Depends(get_db)):
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving documents: {str(e)}",
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+
+from backend.app.utils.metrics import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/")
+def get_metrics():
+    """
+    Return a snapshot of in-process metrics (DB pool usage, admission queues and wait times).
+
+    :return: Dict with counters, gauges and timing summaries.
+    """
+    return metrics.snapshot()
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.utils.database import get_db
+from backend.app.utils.admission import request_deadline
+from backend.app.utils.database import get_async_db
 from backend.app.services.question_answering import QuestionAnsweringService
 from backend.app.schema.query_schema import QueryResponse
 
@@ -11,40 +13,56 @@ router = APIRouter(tags=["Question Answering"])
 
 @router.post("/query", response_model=QueryResponse)
 async def ask_question(
-    document_id: str = Query(..., description="UUID of the uploaded document"),
+    document_id: str | None = Query(
+        None, description="UUID of the uploaded document; omit to ask across all documents"
+    ),
     question: str = Query(..., description="User's natural language question"),
-    db: Session = Depends(get_db),
+    deadline_ms: int | None = Query(
+        None,
+        ge=100,
+        le=600_000,
+        description="Latency budget in milliseconds; past it a degraded retrieval-only answer is returned",
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Ask a question about an uploaded document using the RAG pipeline.
+    Ask a question about an uploaded document, or across all documents when
+    `document_id` is omitted, using the RAG pipeline.
 
     Flow:
     1. Create embedding for the user's question.
     2. Perform FAISS similarity search to find relevant document chunks.
-    3. Fetch context for the document.
+    3. Fetch context for the matched chunks.
     4. Pass context and question into LLM for answer generation.
     5. Build structured sources from retrieved chunks.
     6. Return a clean typed response with the answer and sources.
 
-    :param document_id: UUID of the uploaded document.
+    If the LLM cannot answer within the deadline, the response has `degraded=true`
+    and an extractive answer built from the retrieved chunks.
+
+    :param document_id: UUID of the uploaded document (optional; corpus-wide when omitted).
     :param question: User's natural language question.
-    :param db: Database session dependency.
+    :param deadline_ms: Optional latency budget (defaults to ADMISSION.REQUEST_BUDGET_SECONDS).
+    :param db: Async database session dependency.
     :return: QueryResponse containing the answer and sources.
 
-    :raises HTTPException: If any step in the pipeline fails.
+    :raises HTTPException: If any step in the pipeline fails, or 429 (with Retry-After)
+                           when the server is too busy to answer within the request budget.
     """
+    deadline = request_deadline(deadline_ms / 1000 if deadline_ms else None)
     try:
-        # Initialize service
-        qa_service = QuestionAnsweringService(db=db)
+        # Initialize service (loads the index and model, so keep it off the event loop)
+        qa_service = await run_in_threadpool(QuestionAnsweringService, db=db)
 
         # Set internal default for top_k
         top_k = 5  # Default number of top chunks to retrieve
 
         # Run full pipeline
-        response = qa_service.answer_question(
+        response = await qa_service.answer_question(
             document_id=document_id,
             question=question,
             top_k=top_k,
+            deadline=deadline,
         )
 
         return response
@@ -0,0 +1,69 @@
+import traceback
+from fastapi import APIRouter, UploadFile, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.utils.admission import request_deadline
+from backend.app.utils.database import get_async_db
+from backend.app.utils.file_utils import FileUtils
+from backend.app.services.text_extraction import TextExtractor
+from backend.app.services.text_spitter import TextSplitter
+from backend.app.services.reingestion_service import ReingestionService
+from backend.app.schema.document_schema import UpdateResponse
+
+
+router = APIRouter(tags=["Update Document"])
+
+
+@router.put("/{document_id}", response_model=UpdateResponse)
+async def update_document(document_id: str, file: UploadFile, db: AsyncSession = Depends(get_async_db)):
+    """
+    Upload a revised version of an existing document.
+
+    The document keeps its ID. The new file is extracted and split, and its
+    chunks are compared with the stored ones by content hash: unchanged chunks
+    keep their vectors, only new or edited chunks are embedded, and vectors of
+    removed chunks are deleted. Chunk rows, chunk_count and metadata are
+    updated in one transaction.
+
+    :param document_id: ID of the document to update.
+    :param file: Revised file (PDF or TXT).
+    :param db: Async database session dependency.
+    :return: UpdateResponse with the new chunk count and re-embedding stats.
+    :raises HTTPException: 404 if the document does not exist, 400 for unreadable
+                           files, 429 when the embedding/indexing stages are saturated.
+    """
+    deadline = request_deadline()
+    try:
+        ext = FileUtils.validate_file(file)
+        if not ext:
+            raise HTTPException(status_code=400, detail="Invalid or missing file extension.")
+
+        saved_path = FileUtils.save_file(file)
+
+        try:
+            text = TextExtractor.extract_text(saved_path)
+            if not text or not text.strip():
+                raise HTTPException(status_code=400, detail="No readable text found in document.")
+        except Exception as extract_err:
+            print(f" Text extraction failed: {extract_err}")
+            raise HTTPException(status_code=400, detail=f"Text extraction error: {extract_err}")
+
+        chunks = TextSplitter.from_config().split_text(text)
+
+        stats = await ReingestionService.update_document(
+            db=db,
+            document_id=document_id,
+            filename=file.filename,
+            chunks=chunks,
+            deadline=deadline,
+        )
+        return UpdateResponse(status="Updated and re-indexed successfully", **stats)
+
+    except HTTPException as http_err:
+        raise http_err
+
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unexpected update error: {str(e)}",
+        )
@@ -20,3 +20,18 @@ class UploadResponse(BaseModel):
     status: str
     chunks_created: int
     uploaded_at: str
+
+
+class UpdateResponse(BaseModel):
+    """
+    Response model after re-ingesting a new revision of a document.
+    """
+    document_id: str
+    filename: str
+    status: str
+    chunk_count: int
+    chunks_reused: int
+    chunks_embedded: int
+    chunks_removed: int
+    embedding_work_saved: float  # Fraction of chunks that did not need re-embedding
+    updated_at: str
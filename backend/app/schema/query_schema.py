@@ -3,10 +3,17 @@ from pydantic import BaseModel
 class QuerySource(BaseModel):
     chunk_text: str
     relevance_score: float
+    # Document the chunk comes from (useful for corpus-wide questions)
+    document_id: str | None = None
 
 class QueryResponse(BaseModel):
-    document_id: str
+    # None for corpus-wide questions
+    document_id: str | None = None
     question: str
     answer: str
     sources: list[QuerySource]
-    processing_time_seconds: float
\ No newline at end of file
+    processing_time_seconds: float
+    # True when the LLM missed the deadline or failed and `answer` is extractive
+    degraded: bool = False
+    # True when the answer was served from the answer cache
+    cached: bool = False
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+
+from backend.app.utils.database import load_optional_config
+from backend.app.utils.metrics import metrics
+
+
+class AnswerCache:
+    """
+    Process-wide LRU cache of generated answers with a TTL.
+
+    Keyed by (document_id, document revision, normalized question, top_k). The
+    revision is read from the database on every query, so once a document is
+    re-ingested no worker serves answers for the old content, even though each
+    worker has its own cache; deleted documents are rejected before the cache
+    is consulted. `invalidate_document` only frees the local entries early.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        metrics.register_gauge("qa.answer_cache.entries", lambda: len(self._entries))
+
+    @staticmethod
+    def key(document_id: str, revision: int, question: str, top_k: int) -> tuple:
+        return document_id, revision, " ".join(question.lower().split()), top_k
+
+    def get(self, key: tuple) -> dict | None:
+        """Returns the cached entry, or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires_at"] < time.monotonic():
+                self._entries.pop(key, None)
+                metrics.inc("qa.answer_cache.misses")
+                return None
+            self._entries.move_to_end(key)
+        metrics.inc("qa.answer_cache.hits")
+        return entry["value"]
+
+    def put(self, key: tuple, value: dict) -> None:
+        with self._lock:
+            self._entries[key] = {"value": value, "expires_at": time.monotonic() + self.ttl_seconds}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_document(self, document_id: str) -> None:
+        """Drop every cached answer for a document."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == document_id]:
+                del self._entries[key]
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Shared AnswerCache configured from QA.ANSWER_CACHE."""
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                conf = load_optional_config("QA").get("ANSWER_CACHE", {}) or {}
+                _answer_cache = AnswerCache(
+                    max_entries=int(conf.get("MAX_ENTRIES", 1024)),
+                    ttl_seconds=float(conf.get("TTL_SECONDS", 3600)),
+                )
+    return _answer_cache
@@ -0,0 +1,166 @@
+import abc
+import os
+import time
+
+import numpy as np
+
+
+class EmbeddingBackend(abc.ABC):
+    """
+    Base class for CPU embedding backends.
+
+    Every backend wraps a SentenceTransformer, whose `encode` already sorts inputs
+    by length before batching to reduce padding, and restores the input order.
+    Subclasses only change how the underlying model is built and executed.
+    """
+
+    name = "base"
+    # Whether autotune should also try different thread counts
+    tune_threads = True
+
+    def __init__(self, model_name: str, num_threads: int | None = None):
+        self.model_name = model_name
+        self.batch_size = 32
+        # Applied by `_load`; None keeps the runtime's default
+        self.num_threads = num_threads
+        # Unit-length output, so inner product == cosine similarity
+        self.normalize = True
+        self.model = self._load()
+
+    @abc.abstractmethod
+    def _load(self):
+        """Build the SentenceTransformer for `model_name`."""
+
+    def set_num_threads(self, num_threads: int) -> None:
+        """Set intra-op threads for inference (torch thread pool is process-wide)."""
+        import torch
+
+        torch.set_num_threads(num_threads)
+        self.num_threads = num_threads
+
+    def encode(self, texts: list[str], batch_size: int | None = None) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 array."""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size or self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=self.normalize,
+            show_progress_bar=False,
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def autotune(
+        self,
+        sample_texts: list[str],
+        batch_sizes: tuple[int, ...] = (8, 16, 32, 64, 128),
+        thread_counts: tuple[int, ...] | None = None,
+    ) -> dict:
+        """
+        Pick the batch size and thread count with the highest throughput on this host.
+
+        :param sample_texts: Representative inputs (a few hundred chunk-sized texts).
+        :return: {"batch_size", "num_threads", "chunks_per_sec"} for the chosen setting.
+        """
+        if not self.tune_threads:
+            thread_counts = (self.num_threads,)
+        elif thread_counts is None:
+            cores = os.cpu_count() or 1
+            thread_counts = tuple(sorted({1, max(1, cores // 2), cores}))
+
+        best = {"batch_size": self.batch_size, "num_threads": self.num_threads, "chunks_per_sec": 0.0}
+        for threads in thread_counts:
+            if threads != self.num_threads:
+                self.set_num_threads(threads)
+            for batch_size in batch_sizes:
+                # Warm-up so one-off allocations don't skew the measurement
+                self.encode(sample_texts[:batch_size], batch_size)
+                start = time.perf_counter()
+                self.encode(sample_texts, batch_size)
+                rate = len(sample_texts) / (time.perf_counter() - start)
+                if rate > best["chunks_per_sec"]:
+                    best = {"batch_size": batch_size, "num_threads": threads, "chunks_per_sec": round(rate, 1)}
+
+        if best["num_threads"] != self.num_threads:
+            self.set_num_threads(best["num_threads"])
+        self.batch_size = best["batch_size"]
+        print(f"⚙️ Autotuned {self.name} embeddings: {best}")
+        return best
+
+
+class TorchBackend(EmbeddingBackend):
+    """The original fp32 PyTorch path."""
+
+    name = "torch"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(self.model_name, device="cpu")
+        if self.num_threads:
+            self.set_num_threads(self.num_threads)
+        return model
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch with Linear layers dynamically quantized to int8."""
+
+    name = "int8"
+
+    def _load(self):
+        import torch
+
+        model = super()._load()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    ONNX Runtime export via sentence-transformers' ONNX backend
+    (needs sentence-transformers>=3.2 and optimum[onnxruntime]).
+    ONNX Runtime ignores torch's thread pool: the thread count is fixed in the
+    session options when the session is created, so autotune only picks the batch size.
+    """
+
+    name = "onnx"
+    tune_threads = False
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        model_kwargs = {}
+        if self.num_threads:
+            import onnxruntime
+
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = self.num_threads
+            model_kwargs["session_options"] = session_options
+        return SentenceTransformer(self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    def set_num_threads(self, num_threads: int) -> None:
+        """Recreate the ONNX Runtime session with `num_threads` intra-op threads."""
+        self.num_threads = num_threads
+        self.model = self._load()
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def autotune_samples(count: int = 128, chunk_size: int = 800) -> list[str]:
+    """Synthetic chunk-sized texts of varying length for autotuning."""
+    words = ("document question answer context retrieval index vector model chunk "
+             "search page section table figure result summary").split()
+    texts = []
+    for i in range(count):
+        length = chunk_size // 2 + (i * 37) % (chunk_size // 2)
+        text, size, j = [], 0, i
+        while size < length:
+            word = words[j % len(words)]
+            text.append(word)
+            size += len(word) + 1
+            j += 7
+        texts.append(" ".join(text))
+    return texts
@@ -1,33 +1,123 @@
-from sentence_transformers import SentenceTransformer
+import threading
+import numpy as np
 from fastapi import HTTPException
 
+from backend.app.services.embedding_backends import BACKENDS, autotune_samples
+from backend.app.utils.database import load_optional_config
+
 
 class EmbeddingsService:
     """
     Generates embeddings using a Hugging Face SentenceTransformer model.
+    Runs on a pluggable CPU backend (EMBEDDINGS.BACKEND: torch, int8 or onnx);
+    backends are loaded once per process and shared between service instances.
     """
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    _backends: dict = {}
+    _backends_lock = threading.Lock()
+    _autotuned: dict = {}
+    _autotune_lock = threading.Lock()
+
+    def __init__(self, model_name: str | None = None, backend: str | None = None):
+        conf = load_optional_config("EMBEDDINGS")
+        self.model_name = model_name or conf.get("MODEL_NAME", "all-MiniLM-L6-v2")
+        self.backend_name = backend or conf.get("BACKEND", "torch")
+        self.backend = self.get_backend(self.model_name, self.backend_name)
+
+    @classmethod
+    def get_backend(cls, model_name: str, backend_name: str = "torch"):
+        """
+        Returns the cached backend for (backend_name, model_name), loading it on first use.
+        sentence_transformers (and torch) are imported here rather than at module import.
+        Batch size and thread count come from the EMBEDDINGS config; settings left at 0
+        are autotuned by `preload`, not here, so callers never wait on a tuning run.
+        """
+        key = (backend_name, model_name)
+        backend = cls._backends.get(key)
+        if backend is not None:
+            return backend
+
+        # Concurrent callers wait for the in-flight load instead of loading twice
+        with cls._backends_lock:
+            backend = cls._backends.get(key)
+            if backend is not None:
+                return backend
+            try:
+                if backend_name not in BACKENDS:
+                    raise ValueError(f"Unknown embedding backend '{backend_name}', expected one of {list(BACKENDS)}")
+
+                print(f"🔹 Loading Hugging Face model: {model_name} ({backend_name}) ...")
+                conf = load_optional_config("EMBEDDINGS")
+                backend = BACKENDS[backend_name](model_name, num_threads=int(conf.get("NUM_THREADS", 0)) or None)
+                backend.normalize = bool(conf.get("NORMALIZE", True))
+                batch_size = int(conf.get("BATCH_SIZE", 0))
+                if batch_size:
+                    backend.batch_size = batch_size
+
+                cls._backends[key] = backend
+                print("✅ Embedding model loaded successfully!")
+                return backend
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Embedding model load failed: {str(e)}")
+
+    @classmethod
+    def autotune_backend(cls, backend) -> dict | None:
+        """
+        Autotune the batch size and thread count left at 0 in the EMBEDDINGS config.
+        A failed run keeps the configured (or default) settings.
+
+        :return: The autotune result, or None when nothing was tuned.
+        """
+        conf = load_optional_config("EMBEDDINGS")
+        batch_size = int(conf.get("BATCH_SIZE", 0))
+        num_threads = int(conf.get("NUM_THREADS", 0))
+        if not conf.get("AUTOTUNE", True) or (batch_size and num_threads):
+            return None
+
+        previous = (backend.batch_size, backend.num_threads)
         try:
-            print(f"🔹 Loading Hugging Face model: {model_name} ...")
-            self.model = SentenceTransformer(model_name)
-            print("✅ Embedding model loaded successfully!")
+            return backend.autotune(
+                autotune_samples(),
+                batch_sizes=(batch_size,) if batch_size else (8, 16, 32, 64, 128),
+                thread_counts=(num_threads,) if num_threads else None,
+            )
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Embedding model load failed: {str(e)}")
+            backend.batch_size = previous[0]
+            if previous[1] and backend.num_threads != previous[1]:
+                backend.set_num_threads(previous[1])
+            print(f"⚠️ Embedding autotune failed, keeping batch_size={previous[0]}: {e}")
+            return None
 
-    def create_embeddings(self, texts: list[str]) -> list[list[float]]:
+    @classmethod
+    def preload(cls, model_name: str | None = None, backend: str | None = None) -> dict | None:
+        """
+        Load and autotune a backend ahead of the first request (used by the app lifespan).
+        Autotuning runs once per backend and process, outside the load lock, so requests
+        that need the model meanwhile are served with the untuned settings.
+
+        :return: The autotune result, or None when nothing was tuned.
+        """
+        service = cls(model_name=model_name, backend=backend)
+        key = (service.backend_name, service.model_name)
+        with cls._autotune_lock:
+            if key not in cls._autotuned:
+                cls._autotuned[key] = cls.autotune_backend(service.backend)
+            return cls._autotuned[key]
+
+    def create_embeddings(self, texts: list[str]) -> np.ndarray:
         """
         Generate embeddings for a list of text chunks.
+        Returns a C-contiguous (len(texts), dim) float32 array that FAISS and the
+        vector archive consume without copying; rows are unit-length unless
+        EMBEDDINGS.NORMALIZE is off.
         """
         try:
             if not texts:
                 raise ValueError("Text list cannot be empty.")
 
             print(f"🧠 Generating embeddings for {len(texts)} chunks...")
-            embeddings = self.model.encode(
-                texts, convert_to_numpy=True, show_progress_bar=True
-            )
+            embeddings = self.backend.encode(texts)
             print("✅ Embeddings generated successfully!")
-            return embeddings.tolist()
+            return embeddings
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Embedding generation failed: {str(e)}")
@@ -0,0 +1,302 @@
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.app.utils.database import load_config, load_optional_config
+from backend.app.utils.metrics import metrics
+
+
+class LLMProvider(abc.ABC):
+    """
+    Base class for the chat models used to answer questions.
+
+    A provider turns a fully formatted prompt into answer text. Subclasses only
+    change where the text comes from (Groq, any OpenAI-compatible server, or
+    the in-process fake used for load tests) by implementing `_agenerate`;
+    failures are counted in llm.<name>.errors and re-raised.
+    """
+
+    name = "base"
+
+    def __init__(self, conf: dict):
+        self.model = conf.get("MODEL", "llama-3.3-70b-versatile")
+        self.temperature = float(conf.get("TEMPERATURE", 0.2))
+        # Hosted SDKs retry with backoff by default, which can outlast the request
+        # deadline; callers degrade instead, so retries are opt-in
+        self.timeout_seconds = float(conf.get("TIMEOUT_SECONDS", 30))
+        self.max_retries = int(conf.get("MAX_RETRIES", 0))
+
+    async def agenerate(self, prompt: str) -> str:
+        try:
+            return await self._agenerate(prompt)
+        except Exception:
+            metrics.inc(f"llm.{self.name}.errors")
+            raise
+
+    @abc.abstractmethod
+    async def _agenerate(self, prompt: str) -> str:
+        """Return the completion for `prompt`."""
+
+
+class LangChainProvider(LLMProvider):
+    """Providers backed by a LangChain chat model (imported lazily to keep app import fast)."""
+
+    def __init__(self, conf: dict):
+        super().__init__(conf)
+        self.llm = self._load(conf)
+
+    @abc.abstractmethod
+    def _load(self, conf: dict):
+        """Build the LangChain chat model from the LLM config."""
+
+    async def _agenerate(self, prompt: str) -> str:
+        response = await self.llm.ainvoke(prompt)
+        return getattr(response, "content", str(response)).strip()
+
+
+class GroqProvider(LangChainProvider):
+    """The original hosted path: ChatGroq with the key from GROQ_API_KEY."""
+
+    name = "groq"
+
+    def _load(self, conf: dict):
+        from langchain_groq import ChatGroq
+
+        groq_api_key = load_config("GROQ_API_KEY").get("API_KEY")
+        if not groq_api_key:
+            raise ValueError("Missing GROQ_API_KEY in configuration file")
+
+        return ChatGroq(
+            model=self.model,
+            temperature=self.temperature,
+            api_key=groq_api_key,
+            base_url=conf.get("BASE_URL") or None,
+            timeout=self.timeout_seconds,
+            max_retries=self.max_retries,
+        )
+
+
+class OpenAICompatibleProvider(LangChainProvider):
+    """
+    Any server speaking the OpenAI chat completions API (vLLM, llama.cpp,
+    or benchmarks/fake_llm_server.py), addressed by LLM.BASE_URL.
+    """
+
+    name = "openai"
+
+    def _load(self, conf: dict):
+        from langchain_openai import ChatOpenAI
+
+        base_url = conf.get("BASE_URL")
+        if not base_url:
+            raise ValueError("LLM.BASE_URL is required for the openai provider")
+
+        return ChatOpenAI(
+            model=self.model,
+            temperature=self.temperature,
+            base_url=base_url,
+            api_key=conf.get("API_KEY") or "not-needed",
+            timeout=self.timeout_seconds,
+            max_retries=self.max_retries,
+        )
+
+
+class FakeLLM:
+    """
+    Simulated LLM: a fixed time-to-first-token (with jitter), then output at a
+    fixed token rate, and injected failures. The answer is deterministic for a
+    given prompt. Shared by the in-process fake provider and the fake server.
+    """
+
+    _WORDS = ("the document states that this answer is based on the retrieved context "
+              "and covers the main points of the question").split()
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.5,
+        jitter_seconds: float = 0.1,
+        tokens_per_second: float = 50.0,
+        output_tokens: int = 64,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+    @classmethod
+    def from_config(cls, conf: dict) -> "FakeLLM":
+        return cls(
+            latency_seconds=float(conf.get("LATENCY_SECONDS", 0.5)),
+            jitter_seconds=float(conf.get("JITTER_SECONDS", 0.1)),
+            tokens_per_second=float(conf.get("TOKENS_PER_SECOND", 50)),
+            output_tokens=int(conf.get("OUTPUT_TOKENS", 64)),
+            error_rate=float(conf.get("ERROR_RATE", 0.0)),
+        )
+
+    def should_fail(self) -> bool:
+        return self.random.random() < self.error_rate
+
+    def duration(self, output_tokens: int) -> float:
+        """Seconds to produce `output_tokens` tokens, including time to first token."""
+        jitter = self.random.uniform(-self.jitter_seconds, self.jitter_seconds) if self.jitter_seconds else 0.0
+        generation = output_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        return max(0.0, self.latency_seconds + jitter) + generation
+
+    def text(self, prompt: str, output_tokens: int | None = None) -> str:
+        """Deterministic answer of `output_tokens` words (one word ~ one token)."""
+        count = output_tokens or self.output_tokens
+        offset = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        return " ".join(self._WORDS[(offset + i) % len(self._WORDS)] for i in range(count)) + "."
+
+    async def complete(self, prompt: str, output_tokens: int | None = None) -> str:
+        count = output_tokens or self.output_tokens
+        await asyncio.sleep(self.duration(count))
+        if self.should_fail():
+            raise RuntimeError("Injected LLM failure")
+        return self.text(prompt, count)
+
+
+class FakeProvider(LLMProvider):
+    """In-process stand-in with LLM-like latency, configured by LLM.FAKE (no network, no spend)."""
+
+    name = "fake"
+
+    def __init__(self, conf: dict):
+        super().__init__(conf)
+        self.fake = FakeLLM.from_config(conf.get("FAKE", {}) or {})
+
+    async def _agenerate(self, prompt: str) -> str:
+        return await self.fake.complete(prompt)
+
+
+PROVIDERS = {
+    GroqProvider.name: GroqProvider,
+    OpenAICompatibleProvider.name: OpenAICompatibleProvider,
+    FakeProvider.name: FakeProvider,
+}
+
+
+class RecordingProvider(LLMProvider):
+    """
+    Record/replay wrapper around another provider.
+
+    In "record" mode every completion is appended to a JSONL file (keyed by a
+    hash of model + prompt, with its latency). In "replay" mode answers come
+    from that file, optionally with their recorded latency, so a load test can
+    be rerun against real answers without calling the provider again; prompts
+    that were never recorded fall through to the wrapped provider.
+    """
+
+    def __init__(self, inner: LLMProvider, path: str, mode: str, replay_latency: bool = True):
+        super().__init__({
+            "MODEL": inner.model,
+            "TEMPERATURE": inner.temperature,
+            "TIMEOUT_SECONDS": inner.timeout_seconds,
+            "MAX_RETRIES": inner.max_retries,
+        })
+        self.inner = inner
+        self.name = f"{mode}:{inner.name}"
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._recordings: dict[str, dict] = self._load() if mode == "replay" else {}
+
+    def key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.model}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def _load(self) -> dict[str, dict]:
+        recordings = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        recordings[entry["key"]] = entry
+        print(f"📼 Loaded {len(recordings)} LLM recordings from {self.path}")
+        return recordings
+
+    def _append(self, entry: dict) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    async def agenerate(self, prompt: str) -> str:
+        # Failures are already counted by the wrapped provider
+        return await self._agenerate(prompt)
+
+    async def _agenerate(self, prompt: str) -> str:
+        key = self.key(prompt)
+        if self.mode == "replay":
+            entry = self._recordings.get(key)
+            if entry is not None:
+                metrics.inc("llm.replay.hits")
+                if self.replay_latency:
+                    await asyncio.sleep(entry.get("latency_seconds", 0.0))
+                return entry["response"]
+            metrics.inc("llm.replay.misses")
+
+        start = time.monotonic()
+        response = await self.inner.agenerate(prompt)
+        if self.mode == "record":
+            # File I/O off the event loop
+            await run_in_threadpool(self._append, {
+                "key": key,
+                "model": self.model,
+                "prompt": prompt,
+                "response": response,
+                "latency_seconds": round(time.monotonic() - start, 4),
+            })
+        return response
+
+
+_provider: LLMProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def get_llm_provider() -> LLMProvider:
+    """
+    Shared provider configured from the LLM section (LLM.PROVIDER: groq, openai
+    or fake), wrapped for record/replay when LLM.RECORD.MODE is set.
+    Raises ValueError for an invalid configuration or a provider that cannot be set up.
+    """
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                conf = load_optional_config("LLM")
+                name = conf.get("PROVIDER", "groq")
+                try:
+                    if name not in PROVIDERS:
+                        raise ValueError(f"Unknown LLM provider '{name}', expected one of {list(PROVIDERS)}")
+                    provider = PROVIDERS[name](conf)
+
+                    record_conf = conf.get("RECORD", {}) or {}
+                    mode = record_conf.get("MODE") or "off"
+                    if mode in ("record", "replay"):
+                        provider = RecordingProvider(
+                            provider,
+                            path=record_conf.get("PATH", "data/llm_recordings.jsonl"),
+                            mode=mode,
+                            replay_latency=bool(record_conf.get("REPLAY_LATENCY", True)),
+                        )
+                    elif mode != "off":
+                        raise ValueError(f"Unknown LLM.RECORD.MODE '{mode}', expected off, record or replay")
+                except Exception as e:
+                    raise ValueError(f"LLM provider init failed: {str(e)}") from e
+
+                print(f"🤖 LLM provider: {provider.name} ({provider.model})")
+                _provider = provider
+    return _provider
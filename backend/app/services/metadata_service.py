@@ -1,6 +1,7 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from backend.app.models.models import Document
+from backend.app.models.models import Document, DocumentChunk
 import datetime
 
 
@@ -9,6 +10,47 @@ class MetadataService:
     Handles saving and retrieving metadata about documents in PostgreSQL.
     """
 
+    @staticmethod
+    def _build_document(
+        doc_id: str,
+        filename: str,
+        chunks: list[str],
+        embedding_dim: int,
+        faiss_index_path: str,
+    ) -> Document:
+        """
+        Builds the Document row shared by the sync and async save paths.
+        """
+        if not chunks:
+            raise ValueError("No text chunks found to save metadata.")
+
+        return Document(
+            id=doc_id,
+            filename=filename,
+            uploaded_at=datetime.datetime.utcnow(),
+            chunk_count=len(chunks),
+            extra_metadata={
+                "embedding_dim": embedding_dim,
+                "total_chunks": len(chunks),
+            },
+            faiss_index_path=faiss_index_path,
+        )
+
+    @staticmethod
+    def _build_chunks(doc_id: str, chunks: list[str], vector_ids: list[int] | None) -> list[DocumentChunk]:
+        """
+        Builds the DocumentChunk rows linking each chunk's text to its vector id.
+        """
+        if vector_ids is None:
+            return []
+        if len(vector_ids) != len(chunks):
+            raise ValueError("Expected one vector id per chunk.")
+
+        return [
+            DocumentChunk(document_id=doc_id, vector_id=int(vector_id), ordinal=i, text=chunk)
+            for i, (chunk, vector_id) in enumerate(zip(chunks, vector_ids))
+        ]
+
     @staticmethod
     def save_metadata(
         db: Session,
@@ -17,6 +59,7 @@ class MetadataService:
         chunks: list[str],
         embedding_dim: int,
         faiss_index_path: str = "data/faiss_index.index",
+        vector_ids: list[int] | None = None,
     ):
         """
         Saves document metadata after upload and processing.
@@ -28,27 +71,19 @@ class MetadataService:
             chunks (list[str]): List of text chunks.
             embedding_dim (int): Embedding dimension size.
             faiss_index_path (str): Path to FAISS index file.
+            vector_ids (list[int] | None): FAISS vector id of each chunk; when given,
+                the chunk texts are stored alongside the document.
 
         Returns:
             Document: The saved Document record.
         """
         try:
-            if not chunks:
-                raise ValueError("No text chunks found to save metadata.")
-
-            document = Document(
-                id=doc_id,
-                filename=filename,
-                uploaded_at=datetime.datetime.utcnow(),
-                chunk_count=len(chunks),
-                metadata={
-                    "embedding_dim": embedding_dim,
-                    "total_chunks": len(chunks),
-                },
-                faiss_index_path=faiss_index_path,
+            document = MetadataService._build_document(
+                doc_id, filename, chunks, embedding_dim, faiss_index_path
             )
 
             db.add(document)
+            db.add_all(MetadataService._build_chunks(doc_id, chunks, vector_ids))
             db.commit()
             db.refresh(document)
 
@@ -57,4 +92,35 @@ class MetadataService:
 
         except Exception as e:
             db.rollback()
-            raise HTTPException(status_code=500, detail=f"Failed to save metadata: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Failed to save metadata: {str(e)}")
+
+    @staticmethod
+    async def save_metadata_async(
+        db: AsyncSession,
+        doc_id: str,
+        filename: str,
+        chunks: list[str],
+        embedding_dim: int,
+        faiss_index_path: str = "data/faiss_index.index",
+        vector_ids: list[int] | None = None,
+    ):
+        """
+        Async version of `save_metadata` for AsyncSession callers.
+        Arguments and return value are the same.
+        """
+        try:
+            document = MetadataService._build_document(
+                doc_id, filename, chunks, embedding_dim, faiss_index_path
+            )
+
+            db.add(document)
+            db.add_all(MetadataService._build_chunks(doc_id, chunks, vector_ids))
+            await db.commit()
+            await db.refresh(document)
+
+            print(f"✅ Metadata saved for '{filename}' (doc_id={doc_id})")
+            return document
+
+        except Exception as e:
+            await db.rollback()
+            raise HTTPException(status_code=500, detail=f"Failed to save metadata: {str(e)}")
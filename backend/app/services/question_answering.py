@@ -1,108 +1,260 @@
+import asyncio
+import re
 import time
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
-from backend.app.services.vector_store_faiss import FAISSVectorStore
+from fastapi.concurrency import run_in_threadpool
+from backend.app.services.vector_store_sharded import ShardedFAISSVectorStore
 from backend.app.services.embeddings_service import EmbeddingsService
 from backend.app.services.prompt_templates import PromptTemplates
-from backend.app.models.models import Document
+from backend.app.services.answer_cache import AnswerCache, get_answer_cache
+from backend.app.services.llm_providers import get_llm_provider
+from backend.app.models.models import Document, DocumentChunk
 from backend.app.schema.query_schema import QueryResponse, QuerySource
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableSequence
-from backend.app.utils.database import load_config
+from backend.app.utils.admission import get_limiter, request_deadline
+from backend.app.utils.database import load_optional_config
+from backend.app.utils.metrics import metrics
+
+# Sentence boundaries for extractive answers
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+NO_RELEVANT_CONTEXT_ANSWER = "No content relevant to this question was found in the document."
 
 
 class QuestionAnsweringService:
     """
-    Handles question answering with similarity search (FAISS) + LLM reasoning (LangChain + Groq).
+    Handles question answering with similarity search (FAISS) + LLM reasoning (pluggable
+    provider, LLM.PROVIDER: groq by default).
+
+    Every request has a deadline. If the LLM cannot answer within it (or fails), the response
+    is marked degraded and carries the retrieved chunks plus an extractive answer
+    built from their best-matching sentences.
     """
 
-    def __init__(self, db: Session, vector_store_path: str = "data/faiss_index.index"):
+    def __init__(self, db: AsyncSession, vector_store_path: str | None = None):
         self.db = db
-        self.vector_store = FAISSVectorStore(index_path=vector_store_path)
-        self.embedder = EmbeddingsService(model_name="all-MiniLM-L6-v2")
-
-        # Load Groq API key from config
-        groq_conf = load_config("GROQ_API_KEY")
-        groq_api_key = groq_conf.get("API_KEY")
-        if not groq_api_key:
-            raise ValueError("Missing GROQ_API_KEY in configuration file")
-
-        # Initialize Groq model
-        self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.2,
-            api_key=groq_api_key,
-        )
-
-        # Create LangChain prompt and chain
-        qa_template_str = PromptTemplates.qa_template()
-        self.prompt = ChatPromptTemplate.from_template(qa_template_str)
-        self.chain = RunnableSequence(self.prompt | self.llm)
-
-    def _fetch_context(self, document_id: str, top_k: int) -> list[dict]:
-        """
-        Retrieve text context for a given document.
+        self.vector_store = ShardedFAISSVectorStore(base_path=vector_store_path)
+        self.embedder = EmbeddingsService()
+
+        qa_conf = load_optional_config("QA")
+        cache_conf = qa_conf.get("ANSWER_CACHE", {}) or {}
+        self.fallback_reserve_seconds = float(qa_conf.get("FALLBACK_RESERVE_SECONDS", 0.5))
+        self.extractive_sentences = int(qa_conf.get("EXTRACTIVE_SENTENCES", 3))
+        self.min_relevance = float(qa_conf.get("MIN_RELEVANCE", 0.25))
+        self.answer_cache = get_answer_cache() if cache_conf.get("ENABLED", True) else None
+        self.cache_late_answers = bool(cache_conf.get("CACHE_LATE_ANSWERS", True))
 
-        NOTE: Since FAISS indices are integers (not linked to document.id),
-        we fetch based only on the document_id.
+        # Chat model from the LLM section (Groq by default; see services/llm_providers.py)
+        self.llm = get_llm_provider()
+        self.qa_template = PromptTemplates.qa_template()
 
-        :param document_id: The UUID of the uploaded document.
-        :param top_k: Number of chunks to include.
+    async def _fetch_context(self, document_id: str | None, indices, scores) -> list[dict]:
         """
-        document = self.db.query(Document).filter(Document.id == document_id).first()
+        Retrieve the text of the chunks returned by the FAISS search, best match first.
 
-        if not document:
-            raise HTTPException(status_code=404, detail=f"Document {document_id} not found.")
+        :param document_id: The UUID of the uploaded document (None for a corpus-wide search).
+        :param indices: Vector ids from the search (NumPy array).
+        :param scores: Matching cosine scores (NumPy array).
+        """
+        vector_ids, scores = indices.tolist(), scores.tolist()
+        if document_id is None:
+            hits = await DocumentChunk.get_hits_async(self.db, vector_ids)
+            return [
+                {"text": hits[vector_id][2], "filename": hits[vector_id][1], "document_id": hits[vector_id][0],
+                 "score": score}
+                for vector_id, score in zip(vector_ids, scores)
+                if vector_id in hits
+            ]
+
+        document = await Document.get_metadata_async(self.db, document_id)
+        texts = await DocumentChunk.get_texts_async(self.db, document_id, vector_ids)
+
+        if not texts:
+            # Documents ingested before chunk texts were stored: keep the simulated context
+            return [
+                {
+                    "text": f"Context chunk {i+1} for document {document.filename}",
+                    "filename": document.filename,
+                    "document_id": document_id,
+                    "score": score,
+                }
+                for i, score in enumerate(scores)
+            ]
 
-        # Return minimal simulated context (you can extend this later)
         return [
-            {
-                "text": f"Context chunk {i+1} for document {document.filename}",
-                "filename": document.filename,
-            }
-            for i in range(top_k)
+            {"text": texts[vector_id], "filename": document.filename, "document_id": document_id, "score": score}
+            for vector_id, score in zip(vector_ids, scores)
+            if vector_id in texts
+        ]
+
+    def _extractive_answer(self, query_vector: np.ndarray, context_chunks: list[dict]) -> str:
+        """
+        Cheap answer without the LLM: the context sentences closest to the question
+        (cosine similarity of their embeddings), kept in reading order.
+        """
+        sentences = [
+            sentence.strip()
+            for chunk in context_chunks
+            for sentence in _SENTENCE_SPLIT.split(chunk["text"])
+            if len(sentence.strip()) >= 20
         ]
+        if not sentences:
+            return context_chunks[0]["text"] if context_chunks else ""
+
+        vectors = self.embedder.create_embeddings(sentences)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        query = query_vector / (np.linalg.norm(query_vector) + 1e-12)
+        similarity = vectors @ query
+
+        count = min(self.extractive_sentences, len(sentences))
+        best = np.sort(np.argpartition(-similarity, count - 1)[:count])
+        return " ".join(sentences[i] for i in best)
+
+    async def _generate(self, inputs: dict, deadline: float) -> str:
+        """Run the LLM provider inside the LLM stage limiter."""
+        async with get_limiter("llm").slot(deadline):
+            return await self.llm.agenerate(self.qa_template.format(**inputs))
 
+    def _cache_late_answer(self, task: asyncio.Task, cache_key: tuple, sources: list[dict]) -> None:
+        """Done-callback for LLM calls that outlived their request: cache the answer if it succeeded."""
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.answer_cache.put(cache_key, {"answer": task.result(), "sources": sources})
+        metrics.inc("qa.llm.late_answers_cached")
 
-    def answer_question(self, document_id: str, question: str, top_k: int = 5) -> QueryResponse:
+    async def _generate_within_deadline(
+        self, inputs: dict, deadline: float, cache_key: tuple | None, sources: list[dict]
+    ) -> str | None:
         """
-        Answers a question based on the specified document using FAISS similarity search and LLM.
+        Generate an answer if the LLM finishes before the deadline (minus the time
+        reserved for the fallback). Returns None when it does not, when the LLM
+        stage sheds the request or when the provider fails (counted in qa.llm.errors).
+        Late completions optionally land in the answer cache.
+        """
+        budget = deadline - time.monotonic() - self.fallback_reserve_seconds
+        if budget <= 0:
+            metrics.inc("qa.llm.deadline_exceeded")
+            return None
 
+        task = asyncio.create_task(self._generate(inputs, deadline))
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=budget)
+        except asyncio.TimeoutError:
+            metrics.inc("qa.llm.deadline_exceeded")
+            if self.answer_cache is not None and self.cache_late_answers and cache_key is not None:
+                task.add_done_callback(lambda t: self._cache_late_answer(t, cache_key, sources))
+            else:
+                task.cancel()
+            return None
+        except HTTPException as e:
+            if e.status_code == 429:
+                # Shed by the LLM stage limiter
+                return None
+            metrics.inc("qa.llm.errors")
+            print(f" LLM call failed, answering without it: {e.detail}")
+            return None
+        except Exception as e:
+            # Provider errors (timeouts, 5xx, rate limits) degrade the answer instead of failing it
+            metrics.inc("qa.llm.errors")
+            print(f" LLM call failed, answering without it: {type(e).__name__}: {e}")
+            return None
+
+    async def answer_question(
+        self, document_id: str | None, question: str, top_k: int = 5, deadline: float | None = None
+    ) -> QueryResponse:
+        """
+        Answers a question based on the specified document (or, without one, on the whole
+        corpus, searched through the routing index when enabled) using FAISS similarity
+        search and LLM. Corpus-wide answers are not cached: they depend on every document.
+        The embedding and LLM calls go through their stage limiters (utils/admission.py).
+        When the LLM misses the deadline or fails, a degraded retrieval-only answer is returned;
+        when no chunk reaches QA.MIN_RELEVANCE, the LLM is skipped altogether.
 
-        :param document_id: The UUID of the uploaded document.
+
+        :param document_id: The UUID of the uploaded document, or None to search all documents.
         :param question: The user's question.
         :param top_k: Number of similar chunks to retrieve from FAISS.
+        :param deadline: Absolute time.monotonic() budget for the request (ADMISSION default).
         :return: QueryResponse containing the answer and sources.
+        :raises HTTPException: 404 for unknown documents, 429 when retrieval itself cannot
+                               run within the deadline.
 
         """
         start_time = time.time()
+        if deadline is None:
+            deadline = request_deadline()
 
         try:
-            # Create embedding for the user's question
-            query_vector = self.embedder.create_embeddings([question])[0]
+            cached, cache_key = None, None
+            if document_id is not None:
+                # 404 for unknown or deleted documents, before anything is served from the cache
+                document = await Document.get_metadata_async(self.db, document_id)
+                cache_key = AnswerCache.key(document_id, document.revision, question, top_k)
+                if self.answer_cache is not None:
+                    cached = self.answer_cache.get(cache_key)
+            if cached is not None:
+                return QueryResponse(
+                    document_id=document_id,
+                    question=question,
+                    answer=cached["answer"],
+                    sources=[QuerySource(**source) for source in cached["sources"]],
+                    processing_time_seconds=round(time.time() - start_time, 3),
+                    cached=True,
+                )
 
-            # Perform FAISS similarity search
-            indices, scores = self.vector_store.search(query_vector, top_k=top_k)
+            # Create embedding for the user's question (CPU-bound, run off the event loop)
+            async with get_limiter("embedding").slot(deadline):
+                query_vector = (await run_in_threadpool(self.embedder.create_embeddings, [question]))[0]
+
+            # Perform FAISS similarity search within the document's shard, or corpus-wide (cosine scores)
+            indices, scores = await run_in_threadpool(
+                self.vector_store.search, query_vector, top_k, document_id
+            )
+
+            # Drop hits below the relevance cutoff; with nothing left, don't call the LLM
+            relevant = scores >= self.min_relevance
+            indices, scores = indices[relevant], scores[relevant]
+            if not len(indices):
+                metrics.inc("qa.no_relevant_context")
+                return QueryResponse(
+                    document_id=document_id,
+                    question=question,
+                    answer=NO_RELEVANT_CONTEXT_ANSWER,
+                    sources=[],
+                    processing_time_seconds=round(time.time() - start_time, 3),
+                )
 
             # Fetch context for document
-            context_chunks = self._fetch_context(document_id=document_id, top_k=top_k)
+            context_chunks = await self._fetch_context(document_id, indices, scores)
             context_text = "\n\n".join([c["text"] for c in context_chunks])
 
-            # Pass context and question into LLM
-            inputs = {"context": context_text, "question": question}
-            response = self.chain.invoke(inputs)
-            answer_text = getattr(response, "content", str(response)).strip()
-
             # Build structured sources
             sources = [
-                QuerySource(
-                    chunk_text=ctx["text"],
-                    relevance_score=float(scores[i]) if i < len(scores) else 0.0
-                )
-                for i, ctx in enumerate(context_chunks)
+                {"chunk_text": ctx["text"], "relevance_score": ctx["score"], "document_id": ctx["document_id"]}
+                for ctx in context_chunks
             ]
 
+            # Pass context and question into LLM, within the request's deadline
+            inputs = {"context": context_text, "question": question}
+            answer_text = await self._generate_within_deadline(inputs, deadline, cache_key, sources)
+
+            degraded = answer_text is None
+            if degraded:
+                try:
+                    async with get_limiter("embedding").slot(deadline):
+                        answer_text = await run_in_threadpool(
+                            self._extractive_answer, query_vector, context_chunks
+                        )
+                except HTTPException as e:
+                    if e.status_code != 429:
+                        raise
+                    # No time to embed sentences: fall back to the best chunk as-is
+                    answer_text = context_chunks[0]["text"] if context_chunks else ""
+                metrics.inc("qa.degraded_answers")
+            elif self.answer_cache is not None and cache_key is not None:
+                self.answer_cache.put(cache_key, {"answer": answer_text, "sources": sources})
+
             # Return clean typed response
             processing_time = round(time.time() - start_time, 3)
 
@@ -110,11 +262,12 @@ class QuestionAnsweringService:
                 document_id=document_id,
                 question=question,
                 answer=answer_text,
-                sources=sources,
+                sources=[QuerySource(**source) for source in sources],
                 processing_time_seconds=processing_time,
+                degraded=degraded,
             )
 
         except HTTPException:
             raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Question answering failed: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Question answering failed: {str(e)}")
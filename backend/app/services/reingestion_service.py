@@ -0,0 +1,185 @@
+import datetime
+import hashlib
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models.models import Document, DocumentChunk
+from backend.app.services.answer_cache import get_answer_cache
+from backend.app.services.embeddings_service import EmbeddingsService
+from backend.app.services.vector_store_sharded import ShardedFAISSVectorStore
+from backend.app.utils.admission import get_limiter
+from backend.app.utils.metrics import metrics
+
+
+class ReingestionService:
+    """
+    Re-ingests a new revision of an existing document.
+
+    New chunks are matched to the stored ones by content hash: unchanged chunks
+    keep their vector ids, only new or edited chunks are embedded, and vectors
+    of chunks that disappeared are removed.
+    """
+
+    @staticmethod
+    def chunk_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def diff_chunks(old_chunks: list[tuple[int, str]], new_chunks: list[str]) -> tuple[list, list[int]]:
+        """
+        Matches new chunk texts to stored (vector_id, text) pairs.
+
+        Args:
+            old_chunks (list[tuple[int, str]]): Stored chunks in reading order.
+            new_chunks (list[str]): Chunks of the new revision.
+
+        Returns:
+            tuple[list[int | None], list[int]]: The vector id each new chunk can reuse
+                (None when it must be embedded), and the vector ids no longer used.
+        """
+        available: dict[str, list[int]] = {}
+        for vector_id, text in old_chunks:
+            available.setdefault(ReingestionService.chunk_hash(text), []).append(vector_id)
+
+        reused = []
+        for text in new_chunks:
+            candidates = available.get(ReingestionService.chunk_hash(text))
+            reused.append(candidates.pop(0) if candidates else None)
+
+        removed = [vector_id for ids in available.values() for vector_id in ids]
+        return reused, removed
+
+    @staticmethod
+    async def update_document(
+        db: AsyncSession,
+        document_id: str,
+        filename: str,
+        chunks: list[str],
+        deadline: float | None = None,
+    ) -> dict:
+        """
+        Applies a new revision of a document to the vector store and database.
+
+        New vectors are added before the database commit (and rolled back if it
+        fails); dropped vectors, and for legacy documents all previous vectors,
+        are only removed once the commit succeeded, so searches never lose the
+        stored revision. The document row is locked only for the database write;
+        an update that raced this one in the meantime is refused with 409.
+
+        Args:
+            db (AsyncSession): SQLAlchemy async session.
+            document_id (str): Document to update.
+            filename (str): Filename of the new revision.
+            chunks (list[str]): Chunks of the new revision.
+            deadline (float | None): Request deadline for the embedding/indexing stages.
+
+        Returns:
+            dict: The updated document fields and re-embedding stats.
+        """
+        if not chunks:
+            raise HTTPException(status_code=400, detail="Text splitting produced no chunks.")
+
+        document = await db.get(Document, document_id)
+        if not document:
+            raise HTTPException(status_code=404, detail="Document not found.")
+        revision = document.revision
+
+        stored = await DocumentChunk.get_chunks_async(db, document_id)
+        # Documents ingested before chunk texts were stored are re-embedded in full
+        legacy = not stored
+        reused, removed = ReingestionService.diff_chunks(
+            [(row.vector_id, row.text) for row in stored], chunks
+        )
+        to_embed = [i for i, vector_id in enumerate(reused) if vector_id is None]
+        # End the read transaction so no connection is held while embedding
+        await db.commit()
+
+        extra_metadata = dict(document.extra_metadata or {})
+        embedding_dim = int(extra_metadata.get("embedding_dim", 384))
+        vector_store = ShardedFAISSVectorStore(embedding_dim=embedding_dim)
+        if legacy:
+            # Replaced only after the new vectors are committed; new ids come after these
+            removed = (await run_in_threadpool(vector_store.document_vector_ids, document_id)).tolist()
+
+        new_ids = []
+        if to_embed:
+            embedder = await run_in_threadpool(EmbeddingsService)
+            async with get_limiter("embedding").slot(deadline):
+                embeddings = await run_in_threadpool(embedder.create_embeddings, [chunks[i] for i in to_embed])
+            embedding_dim = embeddings.shape[1]
+            async with get_limiter("indexing").slot(deadline):
+                new_ids = await run_in_threadpool(
+                    vector_store.add_embeddings, embeddings, document_id=document_id
+                )
+            for i, vector_id in zip(to_embed, new_ids):
+                reused[i] = vector_id
+
+        updated_at = datetime.datetime.utcnow()
+        try:
+            # Row lock for the write only, so concurrent updates of the same document
+            # are applied one at a time; one that raced this update is refused
+            document = await db.get(Document, document_id, with_for_update=True, populate_existing=True)
+            if not document:
+                raise HTTPException(status_code=404, detail="Document not found.")
+            if document.revision != revision:
+                raise HTTPException(
+                    status_code=409, detail="Document was updated concurrently; retry with the latest revision."
+                )
+
+            kept = {vector_id: i for i, vector_id in enumerate(reused)}
+            for row in stored:
+                if row.vector_id in kept:
+                    row.ordinal = kept[row.vector_id]
+                else:
+                    await db.delete(row)
+            db.add_all(
+                DocumentChunk(document_id=document_id, vector_id=int(reused[i]), ordinal=i, text=chunks[i])
+                for i in to_embed
+            )
+
+            extra_metadata.update(
+                embedding_dim=embedding_dim,
+                total_chunks=len(chunks),
+                revision=revision + 1,
+                updated_at=updated_at.isoformat(),
+            )
+            document.filename = filename
+            document.chunk_count = len(chunks)
+            document.extra_metadata = extra_metadata
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            # Undo the vectors added for this revision; the stored revision stays searchable
+            if new_ids:
+                await run_in_threadpool(vector_store.remove_vectors, document_id, new_ids)
+            if isinstance(e, HTTPException):
+                raise
+            raise HTTPException(status_code=500, detail=f"Failed to update metadata: {str(e)}")
+
+        if removed:
+            try:
+                await run_in_threadpool(vector_store.remove_vectors, document_id, removed)
+            except Exception as e:
+                # The update is committed; stale vectors have no chunk rows, so they only
+                # cost search slots until the document is deleted
+                metrics.inc("reingestion.remove_failures")
+                print(f" Failed to remove {len(removed)} stale vectors of {document_id}: {e}")
+        get_answer_cache().invalidate_document(document_id)
+
+        reused_count = len(chunks) - len(to_embed)
+        print(
+            f"♻️ Re-ingested '{filename}' (doc_id={document_id}): "
+            f"{reused_count} reused, {len(to_embed)} embedded, {len(removed)} removed"
+        )
+        return {
+            "document_id": document_id,
+            "filename": filename,
+            "chunk_count": len(chunks),
+            "chunks_reused": reused_count,
+            "chunks_embedded": len(to_embed),
+            "chunks_removed": len(removed),
+            "embedding_work_saved": round(reused_count / len(chunks), 4),
+            "updated_at": updated_at.isoformat(),
+        }
@@ -1,12 +1,37 @@
+import re
+import zlib
+
+from backend.app.utils.database import load_optional_config
+
+# Word boundaries considered as content-defined cut points
+_WORD_BOUNDARY = re.compile(r"\s+")
+
+
 class TextSplitter:
     """
     Splits text into smaller chunks for embedding.
     Each chunk overlaps to preserve context.
+
+    With `content_defined=True`, chunk boundaries are picked from the text
+    itself (a hash of the words before each candidate cut) instead of fixed
+    offsets, so inserting or deleting text only changes the chunks around the
+    edit and the rest can be matched when a document is re-ingested.
     """
 
-    def __init__(self, chunk_size: int = 800, overlap: int = 100):
+    def __init__(self, chunk_size: int = 800, overlap: int = 100, content_defined: bool = False):
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.content_defined = content_defined
+
+    @classmethod
+    def from_config(cls) -> "TextSplitter":
+        """Splitter configured from the INGESTION section (used by upload and update)."""
+        conf = load_optional_config("INGESTION")
+        return cls(
+            chunk_size=int(conf.get("CHUNK_SIZE", 800)),
+            overlap=int(conf.get("CHUNK_OVERLAP", 100)),
+            content_defined=bool(conf.get("CONTENT_DEFINED_CHUNKS", False)),
+        )
 
     def split_text(self, text: str) -> list[str]:
         """
@@ -15,6 +40,8 @@ class TextSplitter:
         try:
             if not text:
                 return []
+            if self.content_defined:
+                return self._split_content_defined(text)
 
             chunks = []
             start = 0
@@ -25,4 +52,54 @@ class TextSplitter:
                 start += self.chunk_size - self.overlap
             return chunks
         except Exception as e:
-            raise ValueError(f"Text splitting failed: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Text splitting failed: {str(e)}")
+
+    def _cut_points(self, text: str) -> list[int]:
+        """
+        End offsets of the content-defined chunks.
+
+        A word boundary becomes a cut once the chunk is at least a quarter of
+        `chunk_size` and the CRC of the preceding 32 characters hits a target
+        (about one boundary in chunk_size / 16). Chunks never exceed `chunk_size`
+        (they are cut at the last boundary that fits instead). The small minimum
+        lets cut points realign within a chunk or two after an edit.
+        """
+        min_size = self.chunk_size // 4
+        divisor = max(1, self.chunk_size // 16)
+
+        cuts, start, last_boundary = [], 0, None
+        for match in _WORD_BOUNDARY.finditer(text):
+            boundary = match.end()
+            while boundary - start > self.chunk_size:
+                # Too long: cut at the last boundary that fits, or hard-cut a single long word
+                end = last_boundary if last_boundary and last_boundary > start else start + self.chunk_size
+                cuts.append(end)
+                start, last_boundary = end, None
+            size = boundary - start
+            if size >= min_size and zlib.crc32(text[max(0, boundary - 32):boundary].encode("utf-8")) % divisor == 0:
+                cuts.append(boundary)
+                start, last_boundary = boundary, None
+            else:
+                last_boundary = boundary
+
+        while len(text) - start > self.chunk_size:
+            end = last_boundary if last_boundary and last_boundary > start else start + self.chunk_size
+            cuts.append(end)
+            start, last_boundary = end, None
+        if start < len(text):
+            cuts.append(len(text))
+        return cuts
+
+    def _split_content_defined(self, text: str) -> list[str]:
+        chunks, start = [], 0
+        for end in self._cut_points(text):
+            # Overlap with the previous chunk, starting on a word boundary
+            overlap_start = start
+            if start and self.overlap:
+                space = text.find(" ", max(0, start - self.overlap), start)
+                overlap_start = space + 1 if space != -1 else start
+            chunk = text[overlap_start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            start = end
+        return chunks
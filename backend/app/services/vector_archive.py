@@ -0,0 +1,300 @@
+import json
+import os
+
+import numpy as np
+from fastapi import HTTPException
+
+from backend.app.utils.file_lock import FileLock
+
+
+class VectorArchive:
+    """
+    Append-only, memory-mappable archive of raw embeddings keyed by vector id.
+    It is the source of truth for rebuilding FAISS indexes without re-embedding.
+
+    Layout for path="data/faiss_index.vectors":
+        vectors.f32   row-major float32 rows (like an .npy body without the header)
+        ids.i64       int64 vector id of each row
+        deleted.i64   tombstones as int64 triples (start_id, end_id, rows_at_delete)
+        meta.json     {"dim": D, "count": N} — rows past `count` are ignored
+
+    Appends write the data files first and bump `count` last (atomic replace),
+    so a crash mid-append never exposes a partial row. A vector id may be
+    appended again after being deleted; the newest row for an id wins.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.ids_path = os.path.join(path, "ids.i64")
+        self.deleted_path = os.path.join(path, "deleted.i64")
+        self.meta_path = os.path.join(path, "meta.json")
+        self.lock_path = os.path.join(path, "archive.lock")
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self.meta_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"dim": None, "count": 0}
+
+    def _write_meta(self, meta: dict):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+    @staticmethod
+    def _append_bytes(path: str, valid_size: int, data: bytes):
+        """Drop any torn tail left by a crashed append, then append `data` durably."""
+        with open(path, "ab") as f:
+            if f.tell() != valid_size:
+                f.truncate(valid_size)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @property
+    def count(self) -> int:
+        return int(self._read_meta()["count"])
+
+    def append(self, ids, vectors: np.ndarray) -> None:
+        """
+        Append vectors with their ids.
+
+        :param ids: Vector ids, one per row.
+        :param vectors: (n, dim) float32 array.
+        """
+        try:
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            ids = np.ascontiguousarray(ids, dtype=np.int64)
+            if vectors.ndim != 2 or len(ids) != len(vectors):
+                raise ValueError("Expected one id per row of a 2-D vector array.")
+
+            os.makedirs(self.path, exist_ok=True)
+            with FileLock(self.lock_path):
+                meta = self._read_meta()
+                dim, count = meta["dim"], int(meta["count"])
+                if dim is not None and dim != vectors.shape[1]:
+                    raise ValueError(f"Archive dimension is {dim}, got {vectors.shape[1]}.")
+
+                self._append_bytes(self.vectors_path, count * vectors.shape[1] * 4, vectors.tobytes())
+                self._append_bytes(self.ids_path, count * 8, ids.tobytes())
+                self._write_meta({"dim": int(vectors.shape[1]), "count": count + len(vectors)})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Vector archive append failed: {str(e)}")
+
+    def delete_range(self, start_id: int, end_id: int) -> None:
+        """Tombstone every archived vector with start_id <= id < end_id."""
+        self.delete_ranges([(start_id, end_id)])
+
+    def delete_ids(self, ids) -> None:
+        """Tombstone individual vector ids (runs of consecutive ids become one range)."""
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if not len(ids):
+            return
+        breaks = np.flatnonzero(np.diff(ids) != 1) + 1
+        starts = ids[np.concatenate(([0], breaks))]
+        ends = ids[np.concatenate((breaks - 1, [len(ids) - 1]))] + 1
+        self.delete_ranges(np.column_stack([starts, ends]))
+
+    def delete_ranges(self, ranges) -> None:
+        """Tombstone several half-open id ranges in one write."""
+        ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+        if not len(ranges):
+            return
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with FileLock(self.lock_path):
+                count = int(self._read_meta()["count"])
+                records = np.column_stack([ranges, np.full(len(ranges), count, dtype=np.int64)])
+                size = os.path.getsize(self.deleted_path) if os.path.exists(self.deleted_path) else 0
+                self._append_bytes(self.deleted_path, size - size % 24, records.tobytes())
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Vector archive delete failed: {str(e)}")
+
+    def open(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Memory-map the archive.
+
+        :return: (ids, vectors) for every appended row, including superseded and deleted ones.
+        """
+        meta = self._read_meta()
+        count, dim = int(meta["count"]), meta["dim"]
+        if not count:
+            return np.empty(0, dtype=np.int64), np.empty((0, dim or 0), dtype=np.float32)
+        ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(count,))
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, dim))
+        return ids, vectors
+
+    def get_vectors(self, ids) -> np.ndarray:
+        """
+        Newest archived vector for each of `ids` (for indexes that cannot reconstruct,
+        such as IVF shards). Scans the id file once.
+        """
+        wanted = np.asarray(ids, dtype=np.int64)
+        all_ids, vectors = self.open()
+        rows = np.flatnonzero(np.isin(all_ids, wanted))
+        # Later rows win: keep the last occurrence of each id
+        row_ids = np.asarray(all_ids[rows])
+        order = np.argsort(row_ids, kind="stable")
+        row_ids, rows = row_ids[order], rows[order]
+        last_of_run = np.append(row_ids[1:] != row_ids[:-1], True) if len(rows) else np.empty(0, dtype=bool)
+        row_ids, rows = row_ids[last_of_run], rows[last_of_run]
+
+        positions = np.minimum(np.searchsorted(row_ids, wanted), max(len(row_ids) - 1, 0))
+        found = row_ids[positions] == wanted if len(row_ids) else np.zeros(len(wanted), dtype=bool)
+        if not found.all():
+            raise KeyError(f"Vector ids not in archive: {wanted[~found][:5].tolist()}")
+        return np.ascontiguousarray(vectors[rows[positions]], dtype=np.float32)
+
+    def _tombstones(self) -> np.ndarray:
+        """(n, 3) int64 tombstone records (start_id, end_id, rows_at_delete), oldest first."""
+        if not os.path.exists(self.deleted_path):
+            return np.empty((0, 3), dtype=np.int64)
+        tombstones = np.fromfile(self.deleted_path, dtype=np.int64)
+        return tombstones[: len(tombstones) - len(tombstones) % 3].reshape(-1, 3)
+
+    def live_rows(self) -> np.ndarray:
+        """
+        Row numbers of the current vector for every live id: the newest row per id,
+        skipping rows deleted after they were appended.
+        """
+        ids, _ = self.open()
+        count = len(ids)
+        if not count:
+            return np.empty(0, dtype=np.int64)
+
+        # Newest row per id
+        order = np.argsort(ids, kind="stable")
+        sorted_ids = np.asarray(ids[order])
+        last_of_run = np.append(sorted_ids[1:] != sorted_ids[:-1], True)
+        rows, row_ids = order[last_of_run], sorted_ids[last_of_run]
+
+        # A row is dead if a tombstone covering its id was written after it
+        tombstones = self._tombstones()
+        if len(tombstones):
+            lo = np.searchsorted(row_ids, tombstones[:, 0])
+            hi = np.searchsorted(row_ids, tombstones[:, 1])
+            covered = hi - lo
+            # Expand every tombstone to the (sorted) row positions it covers
+            run_starts = np.repeat(lo - (np.cumsum(covered) - covered), covered)
+            positions = run_starts + np.arange(int(covered.sum()))
+            deleted_at = np.zeros(len(row_ids), dtype=np.int64)
+            np.maximum.at(deleted_at, positions, np.repeat(tombstones[:, 2], covered))
+            rows = rows[rows >= deleted_at]
+
+        return np.sort(rows)
+
+
+# FAISS index_factory descriptions for `rebuild`; every index keeps explicit ids.
+INDEX_TYPES = {
+    "flat": "IDMap2,Flat",
+    "hnsw": "IDMap2,HNSW32",
+    "ivf": "IDMap2,IVF{nlist},Flat",
+    "ivfpq": "IDMap2,IVF{nlist},PQ{pq_m}",
+}
+
+
+def build_index(ids: np.ndarray, vectors: np.ndarray, index_type: str = "flat", metric: str = "l2",
+                batch_size: int = 100_000, normalize: bool = False):
+    """
+    Build a FAISS index of `index_type` from (ids, vectors), streaming from memory maps.
+    IVF variants are trained on a sample of up to 256 vectors per list.
+    Empty inputs always produce a flat index, since IVF/PQ cannot be trained without data.
+    With `normalize`, vectors are scaled to unit norm as they are added.
+    """
+    import faiss
+
+    dim = vectors.shape[1]
+    if not len(ids):
+        index_type = "flat"
+    if index_type == "ivfpq" and len(ids) < 256:
+        raise ValueError("ivfpq needs at least 256 vectors to train its quantizer.")
+    # FAISS wants roughly 39+ training points per inverted list
+    nlist = max(1, min(4096, int(np.sqrt(len(ids)) * 4), len(ids) // 39))
+    description = INDEX_TYPES[index_type].format(nlist=nlist, pq_m=max(1, dim // 8))
+    faiss_metric = faiss.METRIC_INNER_PRODUCT if metric == "ip" else faiss.METRIC_L2
+    index = faiss.index_factory(dim, description, faiss_metric)
+
+    if "IVF" in description:
+        # Probe ~1/16 of the lists; nprobe is stored with the index
+        faiss.extract_index_ivf(index).nprobe = max(1, nlist // 16)
+
+    if not index.is_trained:
+        sample = np.sort(np.random.default_rng(0).choice(len(ids), min(len(ids), nlist * 256), replace=False))
+        index.train(_prepare(vectors[sample], normalize))
+
+    for start in range(0, len(ids), batch_size):
+        index.add_with_ids(
+            _prepare(vectors[start:start + batch_size], normalize),
+            np.ascontiguousarray(ids[start:start + batch_size], dtype=np.int64),
+        )
+    return index
+
+
+def _prepare(vectors: np.ndarray, normalize: bool) -> np.ndarray:
+    """A contiguous float32 copy of a batch, unit-norm if `normalize`."""
+    batch = np.array(vectors, dtype=np.float32, order="C")
+    if normalize:
+        batch /= np.linalg.norm(batch, axis=1, keepdims=True) + 1e-12
+    return batch
+
+
+def rebuild(base_path: str | None = None, index_type: str = "flat", metric: str | None = None) -> dict:
+    """
+    Regenerate every shard of the sharded store (and the routing index, if
+    enabled) from the archive and publish the results as new snapshots.
+    Vectors are normalized on the way, so archived vectors from before
+    EMBEDDINGS.NORMALIZE score as cosines under either metric.
+    Pause ingestion while this runs.
+
+    :param metric: "l2" or "ip"; defaults to the store's VECTOR_STORE.METRIC.
+    :return: Vectors written per shard.
+    """
+    from backend.app.services.vector_store_sharded import CHUNK_BITS, ShardedFAISSVectorStore
+
+    store = ShardedFAISSVectorStore(base_path=base_path)
+    metric = metric or store.metric
+    archive = store.archive
+    ids, vectors = archive.open()
+    if not len(ids):
+        raise ValueError(f"Vector archive {archive.path} is empty; nothing to rebuild.")
+    rows = archive.live_rows()
+    live_ids = np.asarray(ids[rows])
+    shard_of = (live_ids >> CHUNK_BITS) % store.num_shards
+
+    written = {}
+    for shard_id, shard in enumerate(store.shards):
+        shard_rows = rows[shard_of == shard_id]
+        index = build_index(np.asarray(ids[shard_rows]), vectors[shard_rows], index_type, metric, normalize=True)
+        shard.publish_index(index)
+        written[shard_id] = int(index.ntotal)
+        print(f"🧱 Rebuilt shard {shard_id:02d} as {index_type} with {index.ntotal} vectors")
+    if store.routing is not None:
+        store.rebuild_routing()
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vector archive tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = sub.add_parser("rebuild", help="Rebuild all shards from the archive")
+    rebuild_parser.add_argument("--base-path", default=None)
+    rebuild_parser.add_argument("--index-type", choices=list(INDEX_TYPES), default="flat")
+    rebuild_parser.add_argument("--metric", choices=["l2", "ip"], default=None)
+    info_parser = sub.add_parser("info", help="Show archive statistics")
+    info_parser.add_argument("--base-path", default=None)
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        print(rebuild(args.base_path, args.index_type, args.metric))
+    else:
+        from backend.app.services.vector_store_sharded import ShardedFAISSVectorStore
+
+        archive = ShardedFAISSVectorStore(base_path=args.base_path).archive
+        print({"rows": archive.count, "live": len(archive.live_rows()), "path": archive.path})
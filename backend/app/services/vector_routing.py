@@ -0,0 +1,126 @@
+import numpy as np
+from fastapi import HTTPException
+
+from backend.app.services.vector_store_faiss import FAISSVectorStore, _faiss
+
+
+class DocumentRoutingIndex:
+    """
+    Small index of per-document summary vectors used to route corpus-wide
+    queries: each document is represented by its centroid plus a few k-means
+    representatives of its chunk vectors. A query first finds the nearest
+    summaries, then only the chunks of those candidate documents are searched.
+
+    Summary vectors live in their own snapshot-managed FAISSVectorStore and use
+    the same id scheme as the chunk vectors (<document key><ordinal>), so a hit
+    maps straight back to the document's id range and shard.
+    """
+
+    def __init__(
+        self,
+        index_path: str,
+        chunk_bits: int,
+        embedding_dim: int = 384,
+        representatives: int = 4,
+        metric: str = "l2",
+    ):
+        """
+        :param index_path: Path of the routing index (next to the shard files).
+        :param chunk_bits: Bits of a vector id used for the chunk ordinal.
+        :param representatives: k-means representatives per document, on top of the centroid.
+        :param metric: Metric of the chunk vectors; with "ip" summaries are re-normalized
+                       so they compare like the (unit-norm) chunks.
+        """
+        self.chunk_bits = chunk_bits
+        self.representatives = representatives
+        self.metric = metric
+        self.store = FAISSVectorStore(index_path=index_path, embedding_dim=embedding_dim, metric=metric)
+
+    def summarize(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Summary vectors of one document: its centroid followed by up to
+        `representatives` k-means centroids (or the vectors themselves for short documents).
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        centroid = vectors.mean(axis=0, keepdims=True)
+        if len(vectors) <= self.representatives:
+            summaries = np.vstack([centroid, vectors])
+        else:
+            kmeans = _faiss().Kmeans(vectors.shape[1], self.representatives, niter=10, seed=1234, verbose=False)
+            # Short documents are far below FAISS' 39-points-per-centroid guideline; that's fine here
+            kmeans.cp.min_points_per_centroid = 1
+            kmeans.train(vectors)
+            summaries = np.vstack([centroid, kmeans.centroids])
+
+        if self.metric == "ip":
+            summaries /= np.linalg.norm(summaries, axis=1, keepdims=True) + 1e-12
+        return summaries
+
+    def _summary_ids(self, document_key: int, count: int) -> np.ndarray:
+        return (document_key << self.chunk_bits) + np.arange(count, dtype=np.int64)
+
+    def _key_range(self, document_key: int) -> tuple[int, int]:
+        start = document_key << self.chunk_bits
+        return start, start + (1 << self.chunk_bits)
+
+    def update_document(self, document_key: int, vectors: np.ndarray) -> None:
+        """Replace a document's summaries (or drop them when it has no vectors left)."""
+        start, end = self._key_range(document_key)
+        if not len(vectors):
+            self.store.remove_id_range(start, end)
+            return
+        summaries = self.summarize(vectors)
+        self.store.replace_id_range(start, end, summaries, self._summary_ids(document_key, len(summaries)))
+
+    def remove_document(self, document_key: int) -> None:
+        self.store.remove_id_range(*self._key_range(document_key))
+
+    def rebuild(self, ids: np.ndarray, vectors: np.ndarray) -> int:
+        """
+        Recompute every summary from (ids, vectors) and publish them as one snapshot.
+
+        :return: Number of documents routed.
+        """
+        try:
+            ids = np.asarray(ids, dtype=np.int64)
+            keys = ids >> self.chunk_bits
+            order = np.argsort(keys, kind="stable")
+            unique_keys, starts = np.unique(keys[order], return_index=True)
+            bounds = np.append(starts, len(order))
+
+            summary_ids, summaries = [], []
+            for key, lo, hi in zip(unique_keys, bounds[:-1], bounds[1:]):
+                doc_summaries = self.summarize(vectors[np.sort(order[lo:hi])])
+                summaries.append(doc_summaries)
+                summary_ids.append(self._summary_ids(int(key), len(doc_summaries)))
+
+            self.store.embedding_dim = vectors.shape[1]
+            index = self.store.new_index()
+            if summaries:
+                index.add_with_ids(np.vstack(summaries), np.concatenate(summary_ids))
+            self.store.publish_index(index)
+            return len(unique_keys)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Routing index rebuild failed: {str(e)}")
+
+    def num_documents(self) -> int:
+        """Number of documents with summaries in the current snapshot."""
+        ids = self.store.sorted_ids()
+        if not len(ids):
+            return 0
+        keys = ids >> self.chunk_bits
+        return int(np.count_nonzero(keys[1:] != keys[:-1]) + 1)
+
+    def candidate_keys(self, query_vector: np.ndarray, num_documents: int) -> list[int]:
+        """Keys of the documents whose summaries are nearest to the query, best first."""
+        indices, _ = self.store.search(query_vector, top_k=num_documents * (self.representatives + 1))
+        keys = []
+        for vector_id in indices:
+            if vector_id == -1:
+                continue
+            key = int(vector_id) >> self.chunk_bits
+            if key not in keys:
+                keys.append(key)
+                if len(keys) == num_documents:
+                    break
+        return keys
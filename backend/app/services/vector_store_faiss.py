@@ -1,95 +1,862 @@
+import datetime
+import json
 import os
-import faiss
+import threading
 import numpy as np
 from fastapi import HTTPException
 
+from backend.app.utils.file_lock import FileLock
+
+
+def _faiss():
+    """Import faiss on first use so importing the app stays fast."""
+    import faiss
+
+    return faiss
+
+
+def cosine_scores(values: np.ndarray, metric_type: int) -> np.ndarray:
+    """
+    Calibrate raw FAISS scores of unit-norm vectors to cosine similarity in [-1, 1].
+    Inner-product scores already are cosines; squared L2 distances (legacy
+    IndexFlatL2 shards) map through ||a - b||² = 2 - 2·cos.
+    """
+    values = np.asarray(values, dtype=np.float32)
+    if metric_type == _faiss().METRIC_INNER_PRODUCT:
+        return np.clip(values, -1.0, 1.0)
+    return np.clip(1.0 - values / 2.0, -1.0, 1.0)
+
+
+class IdRangeInUseError(ValueError):
+    """Raised by an exclusive `add_embeddings` when its id range already holds vectors."""
+
+
+def _inner_index(index):
+    """The index doing the actual search (unwraps IndexIDMap/IndexIDMap2)."""
+    faiss = _faiss()
+    return faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+
+
+def _contains(sorted_values: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Boolean mask of `values` present in the sorted array `sorted_values`."""
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+    return sorted_values[positions] == values
+
+
+class _Layer:
+    """One immutable index file of a snapshot: the base index or a segment of later additions."""
+
+    def __init__(self, name: str | None, index, seq: int):
+        self.name = name  # path relative to the index directory; None until written
+        self.index = index
+        self.seq = seq
+        self._sorted_ids = None
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal)
+
+    def sorted_ids(self) -> np.ndarray:
+        if self._sorted_ids is None:
+            self._sorted_ids = np.sort(FAISSVectorStore._ids_of(self.index))
+        return self._sorted_ids
+
+    def reconstruct(self, ids: np.ndarray) -> np.ndarray:
+        index = self.index
+        if isinstance(index, _faiss().IndexIDMap2) or not FAISSVectorStore._is_id_mapped(index):
+            return np.asarray(index.reconstruct_batch(ids), dtype=np.float32)
+        # IndexIDMap keeps no reverse map: look the positions up in id_map
+        id_map = FAISSVectorStore._ids_of(index)
+        order = np.argsort(id_map, kind="stable")
+        positions = order[np.searchsorted(id_map[order], ids)]
+        return np.asarray(index.index.reconstruct_batch(positions), dtype=np.float32)
+
+
+class IndexSnapshot:
+    """
+    Immutable view of one published version of a FAISSVectorStore.
+
+    A snapshot is a base index plus segments holding the vectors added since
+    (flat, id-mapped, oldest first) and tombstones. Every layer and every
+    tombstone carries a write sequence number; tombstone (id, seq) hides that
+    id in every layer older than seq, so a removed id can be added again later.
+    """
+
+    def __init__(self, version: int, base: _Layer, segments=(), tombstones=None, tomb_name=None, next_seq=None):
+        self.version = version
+        self.base = base
+        self.segments = list(segments)
+        if tombstones is None:
+            tombstones = np.empty((0, 2), dtype="int64")
+        self.tombstones = tombstones  # (n, 2) int64 rows of (id, seq), sorted by id, ids unique
+        self.tomb_name = tomb_name
+        self.next_seq = next_seq if next_seq is not None else max(layer.seq for layer in self.layers) + 1
+        self._hidden = {}
+        self._hidden_selectors = {}
+        self._sorted_ids = None
+        self._ntotal = None
+
+    @property
+    def layers(self) -> list:
+        return [self.base] + self.segments
+
+    @property
+    def metric_type(self) -> int:
+        return self.base.index.metric_type
+
+    @property
+    def d(self) -> int:
+        return self.base.index.d
+
+    @property
+    def pending(self) -> int:
+        """Vectors and tombstones not folded into the base index yet."""
+        return sum(segment.ntotal for segment in self.segments) + len(self.tombstones)
+
+    def hidden(self, layer: _Layer) -> np.ndarray:
+        """Sorted ids tombstoned after `layer` was written."""
+        if layer not in self._hidden:
+            self._hidden[layer] = self.tombstones[self.tombstones[:, 1] > layer.seq, 0]
+        return self._hidden[layer]
+
+    def _live_mask(self, layer: _Layer, ids: np.ndarray) -> np.ndarray:
+        return _contains(layer.sorted_ids(), ids) & ~_contains(self.hidden(layer), ids)
+
+    @property
+    def ntotal(self) -> int:
+        if self._ntotal is None:
+            self._ntotal = sum(
+                layer.ntotal - int(_contains(layer.sorted_ids(), self.hidden(layer)).sum())
+                for layer in self.layers
+            )
+        return self._ntotal
+
+    def can_reconstruct(self) -> bool:
+        return all(FAISSVectorStore.can_reconstruct(layer.index) for layer in self.layers)
+
+    def sorted_ids(self) -> np.ndarray:
+        """Sorted ids of every live vector (computed once per snapshot)."""
+        if self._sorted_ids is None:
+            self._sorted_ids = self.ids_in_ranges(None)
+        return self._sorted_ids
+
+    def ids_in_ranges(self, id_ranges) -> np.ndarray:
+        """Sorted live ids inside any of the half-open (start_id, end_id) ranges (all ids for None)."""
+        parts = []
+        for layer in self.layers:
+            ids = layer.sorted_ids()
+            if id_ranges is not None:
+                bounds = np.searchsorted(ids, np.asarray(id_ranges, dtype="int64").reshape(-1, 2))
+                ids = np.concatenate([ids[lo:hi] for lo, hi in bounds]) if len(bounds) else ids[:0]
+            hidden = self.hidden(layer)
+            parts.append(ids[~_contains(hidden, ids)] if len(hidden) else ids)
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype="int64")
+
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        """Boolean mask of `ids` that are live in this snapshot."""
+        found = np.zeros(len(ids), dtype=bool)
+        for layer in self.layers:
+            found |= self._live_mask(layer, ids)
+        return found
+
+    def live_vectors(self, layer: _Layer):
+        """(ids, vectors) of the vectors of `layer` that are not hidden."""
+        ids = layer.sorted_ids()
+        ids = ids[~_contains(self.hidden(layer), ids)]
+        if not len(ids):
+            return ids, np.empty((0, self.d), dtype=np.float32)
+        return ids, layer.reconstruct(ids)
+
+    def reconstruct(self, ids) -> np.ndarray:
+        ids = np.ascontiguousarray(ids, dtype="int64")
+        vectors = np.empty((len(ids), self.d), dtype=np.float32)
+        missing = np.ones(len(ids), dtype=bool)
+        for layer in reversed(self.layers):
+            if not missing.any():
+                break
+            mask = missing & self._live_mask(layer, ids)
+            if mask.any():
+                vectors[mask] = layer.reconstruct(ids[mask])
+                missing &= ~mask
+        if missing.any():
+            raise KeyError(f"Vector ids not in the index: {ids[missing][:10].tolist()}")
+        return vectors
+
+    def cosine_hits(self, query: np.ndarray, indices: np.ndarray, scores: np.ndarray):
+        """
+        Hits with cosine similarities instead of raw scores, best first.
+
+        `cosine_scores` maps L2 distances through 2 - 2·cos, which only holds for
+        unit-norm vectors; shards written before embeddings were normalized do not
+        have them. L2 hits are therefore rescored from their stored vectors when the
+        index can reconstruct them (IVF shards come from `vector_archive rebuild`,
+        which normalizes).
+        """
+        if self.metric_type == _faiss().METRIC_INNER_PRODUCT or not len(indices) or not self.can_reconstruct():
+            return indices, cosine_scores(scores, self.metric_type)
+        vectors = self.reconstruct(indices)
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        cosines = (vectors @ query) / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query) + 1e-12)
+        order = np.argsort(-cosines, kind="stable")
+        return indices[order], np.clip(cosines[order], -1.0, 1.0)
+
+    def _selector(self, layer: _Layer, selector):
+        """Combine the caller's selector with the layer's tombstones (None when neither applies)."""
+        faiss = _faiss()
+        hidden = self.hidden(layer)
+        if not len(hidden):
+            return selector
+        if layer not in self._hidden_selectors:
+            # Cached with the batch selector it points to, so both outlive every search
+            batch = faiss.IDSelectorBatch(hidden)
+            self._hidden_selectors[layer] = (faiss.IDSelectorNot(batch), batch)
+        exclude = self._hidden_selectors[layer][0]
+        return exclude if selector is None else faiss.IDSelectorAnd(selector, exclude)
+
+    def search(self, query: np.ndarray, top_k: int, selector=None):
+        """Search every layer and merge the hits, best first. Returns (indices, distances)."""
+        ids, scores = [], []
+        for layer in self.layers:
+            if not layer.ntotal:
+                continue
+            layer_selector = self._selector(layer, selector)
+            params = FAISSVectorStore._search_params(layer.index, layer_selector) if layer_selector else None
+            distances, indices = layer.index.search(query, top_k, params=params)
+            found = indices[0] != -1
+            ids.append(indices[0][found])
+            scores.append(distances[0][found])
+        if not ids:
+            return np.empty(0, dtype="int64"), np.empty(0, dtype=np.float32)
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+        keys = -scores if self.metric_type == _faiss().METRIC_INNER_PRODUCT else scores
+        best = np.argsort(keys, kind="stable")[:top_k]
+        return ids[best], scores[best]
+
 
 class FAISSVectorStore:
     """
     Handles FAISS index creation, storage, and retrieval of embeddings.
     Responsible ONLY for vector operations — not database writes.
+
+    On-disk layout for index_path="data/faiss_index.index":
+        data/faiss_index.index.manifest.json   → {"version": N, "snapshot": "...", "segments": [...], ...}
+        data/faiss_index.index.snapshots/      → immutable index, segment and tombstone files
+        data/faiss_index.index.lock            → single-writer lock file
+
+    A published version is a base index plus small segments with the vectors
+    added since and a tombstone file for removals (see IndexSnapshot). Writers
+    take the file lock, write only the new segment or tombstones and publish by
+    replacing the manifest, so a write costs O(vectors written), not O(index).
+    Adjacent segments of similar size are merged as they accumulate, and once
+    they (plus tombstones) exceed `compact_ratio` of the base they are folded
+    into a new base. Readers never see a half-written file, reuse the layers
+    they already loaded and hot-swap to newer versions; searches already
+    running keep using the snapshot they started with.
     """
 
-    def __init__(self, index_path: str = "data/faiss_index.index", embedding_dim: int = 384):
+    # Process-wide cache of loaded snapshots: index_path -> {"version", "snapshot", "manifest_mtime"}
+    _loaded: dict = {}
+    _loaded_lock = threading.Lock()
+
+    def __init__(
+        self,
+        index_path: str = "data/faiss_index.index",
+        embedding_dim: int = 384,
+        keep_snapshots: int = 3,
+        metric: str = "l2",
+        compact_ratio: float = 0.1,
+        compact_min_vectors: int = 10_000,
+    ):
         """
         Initialize FAISS vector store.
         If index exists → load it, else create a new one.
+
+        :param metric: "l2" or "ip" (inner product; cosine for normalized embeddings),
+                       used when a new index is created. Existing indexes keep theirs.
+        :param compact_ratio: Fold segments and tombstones into the base index once they
+                              exceed this fraction of it...
+        :param compact_min_vectors: ...or this many vectors, whichever is larger.
         """
         self.index_path = index_path
         self.embedding_dim = embedding_dim
-        self.index = None
+        self.metric = metric
+        self.keep_snapshots = keep_snapshots
+        self.compact_ratio = compact_ratio
+        self.compact_min_vectors = compact_min_vectors
+        self.manifest_path = f"{index_path}.manifest.json"
+        self.snapshot_dir = f"{index_path}.snapshots"
+        self.lock_path = f"{index_path}.lock"
+        self.snapshot: IndexSnapshot | None = None
+        self.version = None
         self._load_or_create_index()
 
+    # ------------------------------------------------------------------
+    # Snapshot / manifest handling
+    # ------------------------------------------------------------------
+    def _read_manifest(self) -> dict | None:
+        """Return the current manifest, or None if no snapshot has been published."""
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _manifest_mtime(self) -> int | None:
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(os.path.dirname(self.index_path), name)
+
+    def _snapshot_from_manifest(self, manifest: dict, cached: IndexSnapshot | None) -> IndexSnapshot:
+        """Open the files of a manifest, reusing the layers `cached` already has in memory."""
+        faiss = _faiss()
+        known = {layer.name: layer for layer in cached.layers} if cached else {}
+
+        def layer(name: str, seq: int) -> _Layer:
+            if name in known:
+                return known[name]
+            print(f"📂 Loading FAISS snapshot file {name}")
+            return _Layer(name, faiss.read_index(self._path(name)), seq)
+
+        base = layer(manifest["snapshot"], manifest.get("base_seq", 0))
+        segments = [layer(s["file"], s["seq"]) for s in manifest.get("segments", [])]
+        tomb_name = manifest.get("tombstones")
+        if tomb_name and cached is not None and cached.tomb_name == tomb_name:
+            tombstones = cached.tombstones
+        elif tomb_name:
+            tombstones = np.load(self._path(tomb_name))
+        else:
+            tombstones = None
+        return IndexSnapshot(
+            manifest["version"], base, segments, tombstones, tomb_name, manifest.get("next_seq"),
+        )
+
+    def _load_latest(self) -> dict:
+        """
+        Load the newest published snapshot into the process cache.
+        Falls back to a legacy single-file index at index_path (version 0),
+        or to a new empty index when nothing exists yet.
+        """
+        faiss = _faiss()
+        for _ in range(3):
+            mtime = self._manifest_mtime()
+            manifest = self._read_manifest()
+
+            cached = FAISSVectorStore._loaded.get(self.index_path)
+            version = manifest["version"] if manifest else 0
+            if cached and cached["version"] == version:
+                cached["manifest_mtime"] = mtime
+                return cached
+
+            try:
+                if manifest:
+                    snapshot = self._snapshot_from_manifest(manifest, cached["snapshot"] if cached else None)
+                elif os.path.exists(self.index_path):
+                    print(f"📂 Loading FAISS index from {self.index_path}")
+                    base = _Layer(os.path.basename(self.index_path), faiss.read_index(self.index_path), 0)
+                    snapshot = IndexSnapshot(0, base)
+                else:
+                    print(f"🆕 Creating new FAISS index (dim={self.embedding_dim})")
+                    snapshot = IndexSnapshot(0, _Layer(None, self.new_index(), 0))
+            except (RuntimeError, OSError):
+                # Files pruned between reading the manifest and opening them — retry
+                continue
+
+            entry = {"version": version, "snapshot": snapshot, "manifest_mtime": mtime}
+            with FAISSVectorStore._loaded_lock:
+                current = FAISSVectorStore._loaded.get(self.index_path)
+                if current is None or current["version"] <= version:
+                    FAISSVectorStore._loaded[self.index_path] = entry
+                return FAISSVectorStore._loaded[self.index_path]
+
+        raise RuntimeError(f"Could not load a consistent snapshot for {self.index_path}")
+
+    def new_index(self, metric_type: int | None = None):
+        """
+        Empty flat index with explicit 64-bit ids (needed for sharding and deletes).
+
+        :param metric_type: FAISS metric; defaults to the store's configured metric.
+        """
+        faiss = _faiss()
+        if metric_type is None:
+            metric_type = faiss.METRIC_INNER_PRODUCT if self.metric == "ip" else faiss.METRIC_L2
+        if metric_type == faiss.METRIC_INNER_PRODUCT:
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedding_dim))
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(self.embedding_dim))
+
+    @staticmethod
+    def _is_id_mapped(index) -> bool:
+        """True for IndexIDMap/IndexIDMap2; legacy plain indexes use positional ids."""
+        return hasattr(index, "id_map")
+
+    @staticmethod
+    def _ids_of(index) -> np.ndarray:
+        """Return all vector ids stored in `index`."""
+        if FAISSVectorStore._is_id_mapped(index):
+            return _faiss().vector_to_array(index.id_map)
+        return np.arange(index.ntotal, dtype="int64")
+
+    @staticmethod
+    def can_reconstruct(index) -> bool:
+        """Whether vectors can be read back by id (IVF indexes need a direct map)."""
+        faiss = _faiss()
+        inner = _inner_index(index)
+        if isinstance(inner, faiss.IndexIVF):
+            return inner.direct_map.type != faiss.DirectMap.NoMap
+        return True
+
+    @staticmethod
+    def _search_params(index, selector):
+        """SearchParameters of the type the underlying index expects (flat, IVF or HNSW)."""
+        faiss = _faiss()
+        inner = _inner_index(index)
+        if isinstance(inner, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=inner.nprobe)
+        if isinstance(inner, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+        return faiss.SearchParameters(sel=selector)
+
     def _load_or_create_index(self):
         """Load existing FAISS index or create a new one."""
         try:
-            if os.path.exists(self.index_path):
-                print(f"📂 Loading FAISS index from {self.index_path}")
-                self.index = faiss.read_index(self.index_path)
-            else:
-                print(f"🆕 Creating new FAISS index (dim={self.embedding_dim})")
-                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-                self.index = faiss.IndexFlatL2(self.embedding_dim)
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            entry = self._load_latest()
+            self.snapshot = entry["snapshot"]
+            self.version = entry["version"]
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"FAISS index load/create failed: {str(e)}")
 
+    def refresh(self) -> bool:
+        """
+        Hot-swap to the newest published snapshot if the manifest changed.
+
+        Returns:
+            bool: True if a newer snapshot was loaded.
+        """
+        cached = FAISSVectorStore._loaded.get(self.index_path)
+        if cached and cached["manifest_mtime"] == self._manifest_mtime() and cached["version"] == self.version:
+            return False
+        entry = self._load_latest()
+        swapped = entry["version"] != self.version
+        self.snapshot = entry["snapshot"]
+        self.version = entry["version"]
+        return swapped
+
+    @property
+    def ntotal(self) -> int:
+        """Number of live vectors in the current snapshot."""
+        self.refresh()
+        return self.snapshot.ntotal
+
+    def _write_index_file(self, index, name: str) -> None:
+        faiss = _faiss()
+        path = self._path(name)
+        tmp_path = f"{path}.tmp"
+        faiss.write_index(index, tmp_path)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
 
-    def add_embeddings(self, embeddings: list[list[float]]) -> list[int]:
+    def _publish(self, base: _Layer, segments: list, tombstones: np.ndarray, next_seq: int,
+                 current: IndexSnapshot) -> int:
         """
-        Add embeddings to the FAISS index and persist the index to disk.
+        Write the layers that have no file yet, then atomically point the manifest
+        at the new version. Must be called with the writer lock held.
+        """
+        manifest = self._read_manifest()
+        version = (manifest["version"] if manifest else 0) + 1
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        snapshot_dir = os.path.relpath(self.snapshot_dir, os.path.dirname(self.index_path) or ".")
+        for i, layer in enumerate([base] + segments):
+            if layer.name is None:
+                kind = "index" if layer is base else f"seg{i}.index"
+                layer.name = os.path.join(snapshot_dir, f"v{version:08d}.{kind}")
+                self._write_index_file(layer.index, layer.name)
+
+        tomb_name = None
+        if len(tombstones):
+            if current.tomb_name and tombstones is current.tombstones:
+                tomb_name = current.tomb_name
+            else:
+                tomb_name = os.path.join(snapshot_dir, f"v{version:08d}.tomb.npy")
+                tmp_path = f"{self._path(tomb_name)}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, tombstones)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self._path(tomb_name))
+
+        snapshot = IndexSnapshot(version, base, segments, tombstones, tomb_name, next_seq)
+        new_manifest = {
+            "version": version,
+            "snapshot": base.name,
+            "base_seq": base.seq,
+            "segments": [{"file": s.name, "seq": s.seq, "ntotal": s.ntotal} for s in segments],
+            "tombstones": tomb_name,
+            "next_seq": next_seq,
+            "ntotal": snapshot.ntotal,
+            "embedding_dim": int(snapshot.d),
+            "created_at": datetime.datetime.utcnow().isoformat(),
+        }
+        tmp_manifest = f"{self.manifest_path}.tmp"
+        with open(tmp_manifest, "w") as f:
+            json.dump(new_manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_manifest, self.manifest_path)
+
+        entry = {"version": version, "snapshot": snapshot, "manifest_mtime": self._manifest_mtime()}
+        with FAISSVectorStore._loaded_lock:
+            FAISSVectorStore._loaded[self.index_path] = entry
+        self.snapshot = snapshot
+        self.version = version
+
+        self._prune_snapshots(version)
+        return version
+
+    def _prune_snapshots(self, current_version: int):
+        """
+        Delete files only referenced by versions older than the last `keep_snapshots`.
+        Files are named after the version that wrote them and layers are shared
+        between versions, so anything the current manifest still uses is kept.
         """
         try:
-            if not embeddings:
+            in_use = {os.path.basename(layer.name) for layer in self.snapshot.layers if layer.name}
+            if self.snapshot.tomb_name:
+                in_use.add(os.path.basename(self.snapshot.tomb_name))
+            for name in os.listdir(self.snapshot_dir):
+                if not name.startswith("v") or name in in_use or name.endswith(".tmp"):
+                    continue
+                version = int(name[1:9])
+                if version <= current_version - self.keep_snapshots:
+                    os.remove(os.path.join(self.snapshot_dir, name))
+        except (OSError, ValueError) as e:
+            print(f" Snapshot pruning skipped: {e}")
+
+    def _merged_layer(self, snapshot: IndexSnapshot, older: _Layer, newer: _Layer) -> _Layer:
+        """One flat segment with the live vectors of two adjacent segments (tombstoned ones dropped)."""
+        index = self.new_index(snapshot.metric_type)
+        for layer in (older, newer):
+            ids, vectors = snapshot.live_vectors(layer)
+            if len(ids):
+                index.add_with_ids(vectors, ids)
+        return _Layer(None, index, newer.seq)
+
+    def _compacted_base(self, snapshot: IndexSnapshot):
+        """A copy of the base index with every segment folded in and tombstoned vectors removed."""
+        faiss = _faiss()
+        base = snapshot.base
+        hidden = snapshot.hidden(base)
+        if not self._is_id_mapped(base.index):
+            # Legacy positional index: move to explicit ids, keeping the positions as ids
+            index = self.new_index(snapshot.metric_type)
+            ids, vectors = snapshot.live_vectors(base)
+            if len(ids):
+                index.add_with_ids(vectors, ids)
+        elif isinstance(_inner_index(base.index), faiss.IndexHNSW):
+            # HNSW graphs cannot remove vectors: rebuild from the live ones
+            ids, vectors = snapshot.live_vectors(base)
+            index = faiss.clone_index(base.index)
+            index.reset()
+            if len(ids):
+                index.add_with_ids(vectors, ids)
+        else:
+            index = faiss.clone_index(base.index)
+            if len(hidden):
+                index.remove_ids(faiss.IDSelectorBatch(hidden))
+        for segment in snapshot.segments:
+            ids, vectors = snapshot.live_vectors(segment)
+            if len(ids):
+                index.add_with_ids(vectors, ids)
+        return index
+
+    def _write(self, snapshot: IndexSnapshot, added: np.ndarray | None = None, added_ids=None,
+               removed: np.ndarray | None = None) -> int:
+        """
+        Publish `snapshot` plus one write: tombstones for the `removed` ids, then a
+        segment with the `added` vectors. Merges similar-sized segments and
+        compacts into a new base when enough has accumulated. Lock must be held.
+        """
+        seq = snapshot.next_seq
+        tombstones = snapshot.tombstones
+        if removed is not None and len(removed):
+            removed = np.unique(np.asarray(removed, dtype="int64"))
+            kept = tombstones[~_contains(removed, tombstones[:, 0])]
+            tombstones = np.concatenate([kept, np.column_stack([removed, np.full(len(removed), seq)])])
+            tombstones = tombstones[np.argsort(tombstones[:, 0], kind="stable")]
+            seq += 1
+
+        segments = list(snapshot.segments)
+        if added is not None and len(added):
+            index = self.new_index(snapshot.metric_type)
+            index.add_with_ids(added, np.asarray(added_ids, dtype="int64"))
+            segments.append(_Layer(None, index, seq))
+            seq += 1
+
+        merged = IndexSnapshot(snapshot.version, snapshot.base, segments, tombstones, snapshot.tomb_name, seq)
+        while len(segments) > 1 and segments[-2].ntotal <= 2 * segments[-1].ntotal:
+            segments[-2:] = [self._merged_layer(merged, segments[-2], segments[-1])]
+            merged = IndexSnapshot(snapshot.version, snapshot.base, segments, tombstones, snapshot.tomb_name, seq)
+
+        if merged.pending > max(self.compact_min_vectors, self.compact_ratio * merged.base.ntotal):
+            base = _Layer(None, self._compacted_base(merged), seq)
+            return self._publish(base, [], np.empty((0, 2), dtype="int64"), seq + 1, snapshot)
+        return self._publish(snapshot.base, segments, tombstones, seq, snapshot)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def publish_index(self, index) -> int:
+        """
+        Replace the whole store with `index` (e.g. one rebuilt as IVF/HNSW) as a new base.
+
+        :return: The new snapshot version.
+        """
+        with FileLock(self.lock_path):
+            current = self._load_latest()["snapshot"]
+            seq = current.next_seq
+            return self._publish(_Layer(None, index, seq), [], np.empty((0, 2), dtype="int64"), seq + 1, current)
+
+    def add_embeddings(
+        self,
+        embeddings: np.ndarray,
+        ids: list[int] | None = None,
+        id_range: tuple[int, int] | None = None,
+        exclusive: bool = False,
+    ) -> list[int]:
+        """
+        Add embeddings to the FAISS index and persist them as a new segment.
+        Safe to call concurrently from several processes: writes are serialized
+        by a file lock and always start from the newest snapshot.
+
+        :param embeddings: Vectors to add.
+        :param ids: Optional explicit vector ids. Defaults to consecutive ids after the current maximum.
+        :param id_range: Optional (start_id, end_id); new ids are allocated after the
+                         largest existing id inside this range instead of globally.
+        :param exclusive: Claim `id_range` for these vectors: raise IdRangeInUseError
+                          (checked under the writer lock) if it already holds any.
+        :return: The ids assigned to the vectors.
+        """
+        try:
+            if not len(embeddings):
                 raise ValueError("No embeddings provided to add to FAISS index.")
 
-            vectors = np.array(embeddings).astype("float32")
-            start_id = self.index.ntotal
-            self.index.add(vectors)
-            self.save_index()
-            print(f"✅ Added {len(embeddings)} vectors. Total vectors: {self.index.ntotal}")
-            return list(range(start_id, self.index.ntotal))
+            vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+            with FileLock(self.lock_path):
+                # Another writer may have published since we loaded
+                snapshot = self._load_latest()["snapshot"]
+
+                existing = None
+                if ids is None or exclusive:
+                    existing = snapshot.ids_in_ranges([id_range] if id_range is not None else None)
+                if exclusive and id_range is not None and len(existing):
+                    raise IdRangeInUseError(f"Id range {id_range} already holds {len(existing)} vectors.")
+
+                if ids is None:
+                    floor, ceiling = id_range if id_range is not None else (0, None)
+                    start_id = int(existing[-1]) + 1 if len(existing) else floor
+                    if ceiling is not None and start_id + len(vectors) > ceiling:
+                        raise ValueError(f"No free ids left in range {id_range}.")
+                    new_ids = np.arange(start_id, start_id + len(vectors), dtype="int64")
+                else:
+                    new_ids = np.asarray(ids, dtype="int64")
+                    if len(new_ids) != len(vectors):
+                        raise ValueError("ids and embeddings must have the same length.")
+
+                version = self._write(snapshot, vectors, new_ids)
+            print(f"✅ Added {len(vectors)} vectors. Total vectors: {self.snapshot.ntotal} (snapshot v{version})")
+            return new_ids.tolist()
+        except IdRangeInUseError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to add embeddings: {str(e)}")
 
-    def search(self, query_vector: list[float], top_k: int = 5):
+    def replace_id_range(self, start_id: int, end_id: int, embeddings: np.ndarray, ids) -> int:
+        """
+        Atomically replace every vector in [start_id, end_id) with `embeddings`
+        (one snapshot, so readers never see the range empty).
+
+        :param ids: Ids for the new vectors, inside the range.
+        :return: The new snapshot version.
+        """
+        try:
+            vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+            new_ids = np.asarray(ids, dtype="int64")
+            if len(new_ids) != len(vectors):
+                raise ValueError("ids and embeddings must have the same length.")
+            with FileLock(self.lock_path):
+                snapshot = self._load_latest()["snapshot"]
+                return self._write(snapshot, vectors, new_ids, removed=snapshot.ids_in_ranges([(start_id, end_id)]))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to replace embeddings: {str(e)}")
+
+    def _remove(self, select) -> int:
+        """Tombstone the live ids chosen by `select(snapshot)` and publish a new snapshot."""
+        with FileLock(self.lock_path):
+            snapshot = self._load_latest()["snapshot"]
+            ids = select(snapshot)
+            if len(ids):
+                self._write(snapshot, removed=ids)
+        return len(ids)
+
+    def remove_id_range(self, start_id: int, end_id: int) -> int:
+        """
+        Remove every vector with start_id <= id < end_id and publish a new snapshot.
+
+        :return: Number of vectors removed.
+        """
+        try:
+            return self._remove(lambda snapshot: snapshot.ids_in_ranges([(start_id, end_id)]))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to remove embeddings: {str(e)}")
+
+    def remove_ids(self, ids) -> int:
+        """
+        Remove the vectors with the given ids and publish a new snapshot.
+
+        :return: Number of vectors removed.
+        """
+        try:
+            ids = np.unique(np.asarray(ids, dtype="int64"))
+            if not len(ids):
+                return 0
+            return self._remove(lambda snapshot: ids[snapshot.contains(ids)])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to remove embeddings: {str(e)}")
+
+    def vector_ids(self) -> np.ndarray:
+        """Return the ids of all vectors in the current snapshot."""
+        return self.sorted_ids()
+
+    def sorted_ids(self) -> np.ndarray:
+        """
+        Sorted ids of the current snapshot, computed once per snapshot and
+        shared by every store instance in the process.
+        """
+        self.refresh()
+        return self.snapshot.sorted_ids()
+
+    def ids_in_ranges(self, id_ranges) -> np.ndarray:
+        """Ids of the current snapshot inside any of the half-open (start_id, end_id) ranges."""
+        self.refresh()
+        return self.snapshot.ids_in_ranges(id_ranges)
+
+    def can_reconstruct_vectors(self) -> bool:
+        """Whether `reconstruct` works for the current snapshot (False for IVF without a direct map)."""
+        self.refresh()
+        return self.snapshot.can_reconstruct()
+
+    def reconstruct(self, ids) -> np.ndarray:
+        """Return the stored vectors for `ids`."""
+        self.refresh()
+        return self.snapshot.reconstruct(ids)
+
+    def search_id_ranges(self, query_vector: np.ndarray, top_k: int, id_ranges, cosine: bool = False):
+        """
+        Exact search restricted to a few id ranges (e.g. candidate documents).
+        The vectors in those ranges are reconstructed and scored with NumPy, so the
+        cost is proportional to the candidates rather than to the whole index.
+        Indexes that cannot reconstruct (IVF) run a FAISS search filtered to the ids.
+        Returns (indices, distances) like `search`.
+
+        :param id_ranges: Half-open (start_id, end_id) ranges to search.
+        :param cosine: As in `search`.
+        """
+        try:
+            self.refresh()
+            snapshot = self.snapshot
+            ids = snapshot.ids_in_ranges(id_ranges)
+            if not len(ids):
+                return ids, np.empty(0, dtype=np.float32)
+            if not snapshot.can_reconstruct():
+                selector = _faiss().IDSelectorBatch(ids)
+                query = np.ascontiguousarray(query_vector, dtype=np.float32).reshape(1, -1)
+                indices, distances = snapshot.search(query, top_k, selector)
+                return snapshot.cosine_hits(query, indices, distances) if cosine else (indices, distances)
+
+            vectors = snapshot.reconstruct(ids)
+            query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+            if snapshot.metric_type == _faiss().METRIC_INNER_PRODUCT:
+                # Larger is better: rank by negated score, report the score itself
+                scores = vectors @ query
+                keys = -scores
+            else:
+                scores = ((vectors - query) ** 2).sum(axis=1)
+                keys = scores
+            top = min(top_k, len(ids))
+            best = np.argpartition(keys, top - 1)[:top]
+            best = best[np.argsort(keys[best], kind="stable")]
+            ids, scores = ids[best], scores[best]
+            return snapshot.cosine_hits(query, ids, scores) if cosine else (ids, scores)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"FAISS search failed: {str(e)}")
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 5,
+        id_range: tuple[int, int] | None = None,
+        cosine: bool = False,
+    ):
         """
         Search the FAISS index for the nearest embeddings.
-        Returns (indices, distances).
+        Returns (indices, distances) as NumPy arrays, best match first; missing hits are dropped.
+
+        :param id_range: Optional (start_id, end_id) to only consider ids in that half-open range.
+        :param cosine: Return cosine similarities (see `IndexSnapshot.cosine_hits`) instead of raw scores.
         """
         try:
-            if self.index is None:
+            self.refresh()
+            # Keep a local reference so a concurrent hot-swap doesn't affect this search
+            snapshot = self.snapshot
+            if snapshot is None:
                 raise ValueError("FAISS index not loaded.")
-            query = np.array([query_vector]).astype("float32")
-            distances, indices = self.index.search(query, top_k)
-            return indices[0].tolist(), distances[0].tolist()
+            query = np.ascontiguousarray(query_vector, dtype=np.float32).reshape(1, -1)
+            # Keep the selector referenced for the duration of the search
+            selector = _faiss().IDSelectorRange(*id_range) if id_range is not None else None
+            indices, distances = snapshot.search(query, top_k, selector)
+            return snapshot.cosine_hits(query, indices, distances) if cosine else (indices, distances)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"FAISS search failed: {str(e)}")
 
     def save_index(self):
         """
-        Save the FAISS index to disk.
+        Fold every segment and tombstone into a new base snapshot (compaction).
+        Refuses to overwrite a snapshot published by another writer since this one was loaded.
         """
         try:
-            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-            faiss.write_index(self.index, self.index_path)
-            print(f"💾 Saved FAISS index → {self.index_path}")
+            with FileLock(self.lock_path):
+                manifest = self._read_manifest()
+                if (manifest["version"] if manifest else 0) != self.version:
+                    raise ValueError("Index is stale: a newer snapshot was published by another writer.")
+                snapshot = self.snapshot
+                seq = snapshot.next_seq
+                base = _Layer(None, self._compacted_base(snapshot), seq)
+                version = self._publish(base, [], np.empty((0, 2), dtype="int64"), seq + 1, snapshot)
+            print(f"💾 Saved FAISS index → {self.index_path} (snapshot v{version})")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"FAISS index save failed: {str(e)}")
 
-
     @staticmethod
-    def create_new_index(embeddings: list[list[float]], output_path: str, dimension: int | None = None) -> str:
+    def create_new_index(embeddings: np.ndarray, output_path: str, dimension: int | None = None) -> str:
         """
         Create and save a NEW FAISS index from embeddings (without touching global index).
         Useful for per-document indexing if desired.
         """
         try:
-            if not embeddings:
+            if not len(embeddings):
                 raise ValueError("No embeddings provided to create FAISS index.")
 
-            dimension = dimension or len(embeddings[0])
-            vectors = np.array(embeddings).astype("float32")
+            vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+            dimension = dimension or vectors.shape[1]
 
+            faiss = _faiss()
             index = faiss.IndexFlatL2(dimension)
             index.add(vectors)
 
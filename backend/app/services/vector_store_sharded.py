@@ -0,0 +1,440 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from fastapi import HTTPException
+
+from backend.app.services.vector_archive import VectorArchive
+from backend.app.services.vector_routing import DocumentRoutingIndex
+from backend.app.services.vector_store_faiss import FAISSVectorStore, IdRangeInUseError
+from backend.app.utils.database import load_optional_config
+from backend.app.utils.file_lock import FileLock
+
+# Vector ids are <document key: 40 bits><chunk ordinal: 23 bits>, so a document's
+# vectors form one contiguous id range and can be found in (or removed from) a
+# shard without an external id map. Keys are hashes, so some pair of n documents
+# shares one with probability ~n²/2⁴¹ (about 0.5% at 100k documents, 45% at 1M).
+# New documents therefore claim their range exclusively (add_embeddings with
+# new_document=True raises DocumentKeyCollisionError if it is taken) and the
+# upload route retries with a fresh document id, so live documents never share a range.
+CHUNK_BITS = 23
+DOC_KEY_BITS = 40
+
+
+class DocumentKeyCollisionError(IdRangeInUseError):
+    """A new document's id range is already used by another document."""
+
+
+def document_key(document_id: str) -> int:
+    """Stable 40-bit key derived from the document id."""
+    digest = hashlib.blake2b(document_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & ((1 << DOC_KEY_BITS) - 1)
+
+
+def document_id_range(document_id: str) -> tuple[int, int]:
+    """Half-open vector id range reserved for a document."""
+    start = document_key(document_id) << CHUNK_BITS
+    return start, start + (1 << CHUNK_BITS)
+
+
+class ShardedFAISSVectorStore:
+    """
+    Splits vectors over N FAISSVectorStore shards, one shard per document
+    (chosen by document key hash). Searches fan out over a thread pool — FAISS
+    releases the GIL while searching — and the per-shard top-k lists are
+    calibrated to cosine similarity and merged with NumPy. Document-scoped
+    searches only touch the document's shard.
+    Corpus-wide searches are routed through per-document summary vectors
+    (DocumentRoutingIndex) when VECTOR_STORE.ROUTING is enabled.
+
+    On-disk layout for base_path="data/faiss_index":
+        data/faiss_index.shards.json        → {"num_shards": N}
+        data/faiss_index.shard-00.index...  → one snapshot-managed FAISSVectorStore per shard
+        data/faiss_index.vectors/           → VectorArchive with every raw embedding,
+                                              used to rebuild shards without re-embedding
+        data/faiss_index.routing.index...   → per-document summary vectors for routing
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(
+        self,
+        base_path: str | None = None,
+        num_shards: int | None = None,
+        embedding_dim: int = 384,
+    ):
+        """
+        :param base_path: Path prefix for the shard files (VECTOR_STORE.BASE_PATH by default).
+        :param num_shards: Shard count used when the store is first created
+                           (VECTOR_STORE.NUM_SHARDS by default). Existing stores keep
+                           their recorded count until `rebalance` is called.
+        :param embedding_dim: Dimension for newly created shards.
+        """
+        conf = load_optional_config("VECTOR_STORE")
+        self.base_path = base_path or conf.get("BASE_PATH", "data/faiss_index")
+        self.embedding_dim = embedding_dim
+        self.shard_config_path = f"{self.base_path}.shards.json"
+        self.shard_lock_path = f"{self.base_path}.shards.lock"
+        self.search_threads = int(conf.get("SEARCH_THREADS", 0)) or (os.cpu_count() or 1)
+        # Metric for newly created indexes; "ip" expects normalized embeddings (cosine)
+        self.metric = conf.get("METRIC", "ip")
+
+        self.archive = VectorArchive(f"{self.base_path}.vectors")
+        routing_conf = conf.get("ROUTING", {}) or {}
+        self.routing_candidates = int(routing_conf.get("CANDIDATE_DOCUMENTS", 16))
+        self.routing = None
+        if routing_conf.get("ENABLED", False):
+            self.routing = DocumentRoutingIndex(
+                f"{self.base_path}.routing.index",
+                chunk_bits=CHUNK_BITS,
+                embedding_dim=embedding_dim,
+                representatives=int(routing_conf.get("REPRESENTATIVES", 4)),
+                metric=self.metric,
+            )
+        self.num_shards = self._load_or_init_shard_count(num_shards or int(conf.get("NUM_SHARDS", 1)))
+        self.shards = [self._open_shard(i) for i in range(self.num_shards)]
+
+    @property
+    def index_path(self) -> str:
+        """Logical path recorded in Document.faiss_index_path."""
+        return self.base_path
+
+    def shard_path(self, shard_id: int) -> str:
+        return f"{self.base_path}.shard-{shard_id:02d}.index"
+
+    def _open_shard(self, shard_id: int) -> FAISSVectorStore:
+        return FAISSVectorStore(
+            index_path=self.shard_path(shard_id), embedding_dim=self.embedding_dim, metric=self.metric
+        )
+
+    def _load_or_init_shard_count(self, default: int) -> int:
+        """Read the recorded shard count, writing `default` on first use."""
+        try:
+            with open(self.shard_config_path, "r") as f:
+                return int(json.load(f)["num_shards"])
+        except FileNotFoundError:
+            with FileLock(self.shard_lock_path):
+                if os.path.exists(self.shard_config_path):
+                    with open(self.shard_config_path, "r") as f:
+                        return int(json.load(f)["num_shards"])
+                self._write_shard_count(default)
+                return default
+
+    def _write_shard_count(self, num_shards: int):
+        os.makedirs(os.path.dirname(self.shard_config_path) or ".", exist_ok=True)
+        tmp_path = f"{self.shard_config_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"num_shards": num_shards}, f)
+        os.replace(tmp_path, self.shard_config_path)
+
+    @classmethod
+    def _pool(cls, workers: int) -> ThreadPoolExecutor:
+        """Process-wide search pool shared by all store instances."""
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="faiss-shard")
+        return cls._executor
+
+    def shard_for(self, document_id: str) -> int:
+        """Shard that owns a document."""
+        return document_key(document_id) % self.num_shards
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def add_embeddings(self, embeddings: np.ndarray, document_id: str, new_document: bool = False) -> list[int]:
+        """
+        Add a document's embeddings to its shard and to the raw vector archive.
+        New vectors get the next free chunk ordinals inside the document's id range.
+
+        :param new_document: The document has no vectors yet; raise DocumentKeyCollisionError
+                             instead of adding if its id range is already in use.
+        """
+        shard = self.shards[self.shard_for(document_id)]
+        try:
+            ids = shard.add_embeddings(embeddings, id_range=document_id_range(document_id), exclusive=new_document)
+        except IdRangeInUseError:
+            raise DocumentKeyCollisionError(
+                f"Vector id range of document {document_id} is already used by another document."
+            )
+        try:
+            self.archive.append(ids, embeddings)
+        except Exception:
+            # Keep index and archive consistent: an unarchived vector could not be rebuilt
+            shard.remove_ids(ids)
+            raise
+        self._update_routing(document_id)
+        return ids
+
+    def _stored_vectors(self, shard: FAISSVectorStore, ids) -> np.ndarray:
+        """Vectors of `ids` from their shard or, for shards that cannot reconstruct (IVF), the archive."""
+        if shard.can_reconstruct_vectors():
+            return shard.reconstruct(ids)
+        return self.archive.get_vectors(ids)
+
+    def document_vector_ids(self, document_id: str) -> np.ndarray:
+        """Sorted ids of all current vectors of a document."""
+        return self.shards[self.shard_for(document_id)].ids_in_ranges([document_id_range(document_id)])
+
+    def _document_vectors(self, document_id: str) -> np.ndarray:
+        """All current vectors of a document."""
+        shard = self.shards[self.shard_for(document_id)]
+        return self._stored_vectors(shard, self.document_vector_ids(document_id))
+
+    def _update_routing(self, document_id: str) -> None:
+        """
+        Recompute a document's routing summaries. Routing is an optimization, so a
+        failure is logged rather than failing the write; `rebuild-routing` repairs it.
+        """
+        if self.routing is None:
+            return
+        try:
+            self.routing.update_document(document_key(document_id), self._document_vectors(document_id))
+        except Exception as e:
+            print(f" Routing update failed for {document_id}: {e}")
+
+    def remove_vectors(self, document_id: str, vector_ids) -> int:
+        """
+        Remove specific vectors of a document (e.g. chunks dropped by a re-ingestion).
+        Returns the number removed.
+        """
+        start, end = document_id_range(document_id)
+        vector_ids = np.asarray(vector_ids, dtype=np.int64)
+        if not len(vector_ids):
+            return 0
+        if ((vector_ids < start) | (vector_ids >= end)).any():
+            raise ValueError(f"Vector ids outside the id range of document {document_id}")
+        removed = self.shards[self.shard_for(document_id)].remove_ids(vector_ids)
+        self.archive.delete_ids(vector_ids)
+        self._update_routing(document_id)
+        return removed
+
+    def delete_document(self, document_id: str) -> int:
+        """Remove all of a document's vectors. Returns the number removed."""
+        start, end = document_id_range(document_id)
+        removed = self.shards[self.shard_for(document_id)].remove_id_range(start, end)
+        self.archive.delete_range(start, end)
+        if self.routing is not None:
+            self.routing.remove_document(document_key(document_id))
+        return removed
+
+    def rebuild_routing(self) -> int:
+        """
+        Recompute every document's routing summaries from the vector archive.
+
+        :return: Number of documents routed.
+        """
+        if self.routing is None:
+            raise ValueError("Routing is disabled (VECTOR_STORE.ROUTING.ENABLED).")
+        ids, vectors = self.archive.open()
+        rows = self.archive.live_rows()
+        routed = self.routing.rebuild(np.asarray(ids[rows]), vectors[rows])
+        print(f"🧭 Rebuilt routing index for {routed} documents")
+        return routed
+
+    def rebalance(self, num_shards: int) -> dict:
+        """
+        Change the shard count and move documents whose shard changed.
+
+        Vectors are copied into their new shard before being removed from the old
+        one, so concurrent searches may briefly see duplicates (merged away by id)
+        but never miss a document. This is a maintenance operation: pause ingestion
+        while it runs, since writers that opened the store earlier still route by
+        the old shard count.
+
+        :return: Stats with the number of vectors moved.
+        """
+        if num_shards < 1:
+            raise ValueError("num_shards must be >= 1")
+
+        with FileLock(self.shard_lock_path):
+            old_shards = self.shards
+            new_shards = [self._open_shard(i) for i in range(max(num_shards, len(old_shards)))]
+            moved = 0
+
+            for source_id, source in enumerate(old_shards):
+                ids = source.vector_ids()
+                if not len(ids):
+                    continue
+                targets = (ids >> CHUNK_BITS) % num_shards
+                for target_id in np.unique(targets):
+                    if target_id == source_id:
+                        continue
+                    move_ids = ids[targets == target_id]
+                    new_shards[int(target_id)].add_embeddings(
+                        self._stored_vectors(source, move_ids), ids=move_ids.tolist()
+                    )
+                    moved += len(move_ids)
+                # One snapshot per source shard for everything that left it
+                source.remove_ids(ids[targets != source_id])
+
+            self._write_shard_count(num_shards)
+            self.num_shards = num_shards
+            self.shards = new_shards[:num_shards]
+
+        print(f"🔀 Rebalanced {self.base_path} to {num_shards} shards, moved {moved} vectors")
+        return {"num_shards": num_shards, "vectors_moved": moved}
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def search(self, query_vector, top_k: int = 5, document_id: str | None = None, exhaustive: bool = False):
+        """
+        Search for the nearest embeddings.
+        Returns (indices, scores) as NumPy arrays, best first, where scores are
+        cosine similarities regardless of the shards' FAISS metric.
+
+        :param document_id: Restrict the search to one document (single shard).
+        :param exhaustive: Scan every chunk even when routing is enabled.
+        """
+        try:
+            if document_id is not None:
+                shard = self.shards[self.shard_for(document_id)]
+                return shard.search(
+                    query_vector, top_k=top_k, id_range=document_id_range(document_id), cosine=True
+                )
+
+            if (
+                not exhaustive
+                and self.routing is not None
+                and self.routing.num_documents() > self.routing_candidates
+            ):
+                return self._routed_search(query_vector, top_k)
+
+            if self.num_shards == 1:
+                return self.shards[0].search(query_vector, top_k=top_k, cosine=True)
+
+            pool = self._pool(self.search_threads)
+            futures = [pool.submit(shard.search, query_vector, top_k, cosine=True) for shard in self.shards]
+            return self._merge([f.result() for f in futures], top_k)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"FAISS search failed: {str(e)}")
+
+    def _routed_search(self, query_vector, top_k: int):
+        """Search only the chunks of the documents whose summaries are nearest to the query."""
+        by_shard: dict[int, list] = {}
+        for key in self.routing.candidate_keys(query_vector, self.routing_candidates):
+            start = key << CHUNK_BITS
+            by_shard.setdefault(key % self.num_shards, []).append((start, start + (1 << CHUNK_BITS)))
+
+        if len(by_shard) == 1:
+            shard_id, ranges = next(iter(by_shard.items()))
+            return self.shards[shard_id].search_id_ranges(query_vector, top_k, ranges, cosine=True)
+
+        pool = self._pool(self.search_threads)
+        futures = [
+            pool.submit(self.shards[shard_id].search_id_ranges, query_vector, top_k, ranges, cosine=True)
+            for shard_id, ranges in by_shard.items()
+        ]
+        return self._merge([f.result() for f in futures], top_k)
+
+    @staticmethod
+    def _merge(results, top_k: int):
+        """Merge per-shard (indices, scores) into a global top-k (highest cosine first, unique ids)."""
+        ids = np.concatenate([np.asarray(indices, dtype=np.int64) for indices, _ in results])
+        scores = np.concatenate([np.asarray(s, dtype=np.float32) for _, s in results])
+        order = np.argsort(-scores, kind="stable")
+        ids, scores = ids[order], scores[order]
+        # Duplicates (e.g. mid-rebalance) keep their best-scored occurrence
+        _, first = np.unique(ids, return_index=True)
+        keep = np.sort(first)[:top_k]
+        return ids[keep], scores[keep]
+
+
+def migrate_legacy(db, legacy_path: str = "data/faiss_index.index", base_path: str | None = None) -> dict:
+    """
+    Move documents indexed in the pre-sharding single index (IndexFlatL2 with
+    positional ids, or the id-mapped snapshot store at the same path) into the
+    sharded store and point their faiss_index_path at it.
+
+    The single index did not record which vectors belong to which document:
+    they were appended in upload order, chunk_count vectors per document. That
+    mapping is only used when the chunk counts of the documents still pointing
+    at `legacy_path` add up to exactly the vectors in the index (deleting a
+    document used to leave its vectors behind); otherwise nothing is migrated
+    and those documents need re-ingesting (PUT /api/documents/{id} re-embeds
+    them). Safe to re-run: migrated documents no longer point at `legacy_path`.
+
+    :param db: Sync SQLAlchemy session.
+    :return: Stats with the documents migrated and skipped.
+    """
+    from backend.app.models.models import Document
+
+    documents = (
+        db.query(Document)
+        .filter(Document.faiss_index_path == legacy_path)
+        .order_by(Document.uploaded_at, Document.id)
+        .all()
+    )
+    if not documents:
+        return {"migrated": 0, "skipped": []}
+
+    legacy = FAISSVectorStore(index_path=legacy_path)
+    legacy_ids = legacy.sorted_ids()
+    expected = sum(doc.chunk_count or 0 for doc in documents)
+    if expected != len(legacy_ids):
+        raise ValueError(
+            f"{legacy_path} holds {len(legacy_ids)} vectors but its {len(documents)} documents have "
+            f"{expected} chunks; vectors cannot be attributed to documents. Re-ingest them instead."
+        )
+
+    store = ShardedFAISSVectorStore(base_path=base_path, embedding_dim=legacy.snapshot.d)
+    migrated, skipped, offset = 0, [], 0
+    for doc in documents:
+        ids = legacy_ids[offset:offset + doc.chunk_count]
+        offset += doc.chunk_count
+        # Legacy vectors predate EMBEDDINGS.NORMALIZE; shard scores (inner product,
+        # or L2 calibrated as 1 - d/2) are only cosines for unit-norm vectors
+        vectors = legacy.reconstruct(ids)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+
+        shard = store.shards[store.shard_for(doc.id)]
+        in_range = len(shard.ids_in_ranges([document_id_range(doc.id)]))
+        if in_range and in_range != len(ids):
+            # Range taken by another document: this one can only be re-ingested
+            skipped.append(doc.id)
+            continue
+        if not in_range:
+            store.add_embeddings(vectors, doc.id, new_document=True)
+        # else: vectors added by an earlier run that stopped before the commit
+        doc.faiss_index_path = store.index_path
+        db.commit()
+        migrated += 1
+
+    print(f"🚚 Migrated {migrated} documents from {legacy_path}, skipped {len(skipped)}")
+    return {"migrated": migrated, "skipped": skipped}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sharded FAISS store maintenance")
+    parser.add_argument("command", choices=["rebalance", "rebuild-routing", "migrate-legacy", "info"])
+    parser.add_argument("--base-path", default=None)
+    parser.add_argument("--num-shards", type=int, default=None)
+    parser.add_argument("--legacy-path", default="data/faiss_index.index", help="Single index to migrate from")
+    args = parser.parse_args()
+
+    store = ShardedFAISSVectorStore(base_path=args.base_path)
+    if args.command == "rebalance":
+        if not args.num_shards:
+            parser.error("rebalance requires --num-shards")
+        print(store.rebalance(args.num_shards))
+    elif args.command == "rebuild-routing":
+        print({"documents_routed": store.rebuild_routing()})
+    elif args.command == "migrate-legacy":
+        from backend.app.utils.database import SessionLocal, get_engine
+
+        get_engine()
+        with SessionLocal() as session:
+            print(migrate_legacy(session, legacy_path=args.legacy_path, base_path=args.base_path))
+    else:
+        for i, shard in enumerate(store.shards):
+            print(f"shard {i:02d}: {shard.ntotal} vectors (snapshot v{shard.version})")
@@ -0,0 +1,137 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from backend.app.utils.database import load_optional_config
+from backend.app.utils.metrics import metrics
+
+# Defaults per stage, overridable under ADMISSION.STAGES in the config file
+DEFAULT_STAGES = {
+    "embedding": {"MAX_CONCURRENCY": 2, "MAX_QUEUE": 32},
+    "indexing": {"MAX_CONCURRENCY": 1, "MAX_QUEUE": 64},
+    "llm": {"MAX_CONCURRENCY": 4, "MAX_QUEUE": 64},
+}
+DEFAULT_REQUEST_BUDGET_SECONDS = 30.0
+
+
+def request_deadline(budget_seconds: Optional[float] = None) -> float:
+    """
+    Absolute deadline (time.monotonic()) for a request starting now.
+    Defaults to ADMISSION.REQUEST_BUDGET_SECONDS.
+    """
+    if budget_seconds is None:
+        conf = load_optional_config("ADMISSION")
+        budget_seconds = float(conf.get("REQUEST_BUDGET_SECONDS", DEFAULT_REQUEST_BUDGET_SECONDS))
+    return time.monotonic() + budget_seconds
+
+
+class StageLimiter:
+    """
+    Bounded-concurrency gate for one pipeline stage (embedding, indexing, LLM).
+
+    At most `max_concurrency` callers run the stage at once and at most
+    `max_queue` wait behind them. A caller is rejected up front with
+    429 + Retry-After when the queue is full or the expected wait (queue
+    position × recent service time / concurrency) would overrun its deadline,
+    and also if it is still queued when the deadline passes.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._in_flight = 0
+        self._queued = 0
+        # Exponentially weighted mean of time spent inside the stage
+        self._service_seconds = 0.0
+
+        metrics.register_gauge(f"admission.{name}.in_flight", lambda: self._in_flight)
+        metrics.register_gauge(f"admission.{name}.queue_depth", lambda: self._queued)
+        metrics.register_gauge(f"admission.{name}.service_seconds", lambda: round(self._service_seconds, 6))
+
+    def expected_wait(self) -> float:
+        """Estimated queue wait for a caller arriving now, in seconds."""
+        if not self._semaphore.locked() and not self._queued:
+            return 0.0
+        return (self._queued + 1) * self._service_seconds / self.max_concurrency
+
+    def _reject(self, reason: str, retry_after: float):
+        metrics.inc(f"admission.{self.name}.rejected")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server busy ({self.name} {reason}), retry later.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None):
+        """
+        Hold one slot of the stage for the duration of the block.
+
+        :param deadline: Absolute time.monotonic() by which the request must finish.
+        :raises HTTPException: 429 when the stage cannot be entered in time.
+        """
+        start = time.perf_counter()
+        if self._semaphore.locked() or self._queued:
+            expected = self.expected_wait()
+            if self._queued >= self.max_queue:
+                self._reject("queue full", expected)
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and (remaining <= 0 or expected > remaining):
+                self._reject("queue wait exceeds request budget", expected)
+
+            self._queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=remaining)
+            except asyncio.TimeoutError:
+                self._reject("queue wait exceeded request budget", self.expected_wait())
+            finally:
+                self._queued -= 1
+        else:
+            # A free slot is taken without yielding to the event loop
+            await self._semaphore.acquire()
+        metrics.observe(f"admission.{self.name}.wait_seconds", time.perf_counter() - start)
+
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if self._service_seconds:
+                self._service_seconds = 0.8 * self._service_seconds + 0.2 * elapsed
+            else:
+                self._service_seconds = elapsed
+            metrics.observe(f"admission.{self.name}.service_seconds", elapsed)
+            self._in_flight -= 1
+            self._semaphore.release()
+
+
+_limiters: Dict[str, StageLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(stage: str) -> StageLimiter:
+    """
+    Process-wide limiter for a stage, built from ADMISSION.STAGES.<STAGE> on first use.
+    """
+    limiter = _limiters.get(stage)
+    if limiter is not None:
+        return limiter
+
+    with _limiters_lock:
+        if stage not in _limiters:
+            conf = load_optional_config("ADMISSION").get("STAGES", {}) or {}
+            stage_conf = {**DEFAULT_STAGES.get(stage, {}), **(conf.get(stage.upper(), {}) or {})}
+            _limiters[stage] = StageLimiter(
+                stage,
+                max_concurrency=int(stage_conf.get("MAX_CONCURRENCY", 1)),
+                max_queue=int(stage_conf.get("MAX_QUEUE", 0)),
+            )
+        return _limiters[stage]
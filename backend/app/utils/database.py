@@ -1,10 +1,18 @@
+import copy
 import os
+import threading
+import time
 import yaml
 import urllib.parse
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from typing import Generator, Optional, Dict, Any
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from typing import AsyncGenerator, Generator, Optional, Dict, Any, Tuple
+
+from backend.app.utils.metrics import metrics
 
 # Load environment variables
 load_dotenv()
@@ -14,37 +22,80 @@ BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # p
 CONFIG_DIR: str = os.path.join(BASE_DIR, "config")
 
 
+# Parsed config cache: path -> (mtime_ns, config). Reloaded when the file changes on disk.
+_config_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+_config_lock = threading.Lock()
+
+
+def _resolve_config_file() -> str:
+    """
+    Locate the YAML config file for the current APP_ENV.
+    """
+    env = os.getenv("APP_ENV", "LOCAL").upper()
+    candidates = [
+        os.path.join(CONFIG_DIR, f"{env}.yml"),
+        os.path.join(CONFIG_DIR, f"{env.lower()}.yml"),
+        # Fallback: root/local.yml
+        os.path.join(BASE_DIR, "local.yml"),
+    ]
+    for config_file in candidates:
+        if os.path.exists(config_file):
+            return config_file
+    raise FileNotFoundError(f"Config file not found: {candidates[-1]}")
+
+
+def _read_config(config_file: str) -> Dict[str, Any]:
+    """
+    Return the parsed config, re-parsing the YAML only when its mtime changes.
+    """
+    mtime = os.stat(config_file).st_mtime_ns
+    cached = _config_cache.get(config_file)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _config_lock:
+        cached = _config_cache.get(config_file)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(config_file, "r") as f:
+            config: Dict[str, Any] = yaml.safe_load(f) or {}
+        _config_cache[config_file] = (mtime, config)
+        return config
+
+
 def load_config(section: Optional[str] = None) -> Dict[str, Any]:
     """
     Load configuration from YAML file based on APP_ENV.
+    The parsed file is cached and only re-read when it changes on disk.
 
     Args:
         section (Optional[str]): Section name (e.g., "LOCAL_DATABASE").
     Returns:
-        Dict[str, Any]: Config dictionary or subsection.
+        Dict[str, Any]: Config dictionary or subsection (a copy, safe to modify).
     """
-    env = os.getenv("APP_ENV", "LOCAL").upper()
-    config_file = os.path.join(CONFIG_DIR, f"{env.lower()}.yml")
-
-    # Fallback: root/local.yml
-    if not os.path.exists(config_file):
-        config_file = os.path.join(BASE_DIR, "local.yml")
-
-    if not os.path.exists(config_file):
-        raise FileNotFoundError(f"Config file not found: {config_file}")
-
-    with open(config_file, "r") as f:
-        config: Dict[str, Any] = yaml.safe_load(f) or {}
+    config_file = _resolve_config_file()
+    config = _read_config(config_file)
 
     if section:
         if section not in config:
             raise KeyError(f"Expected section '{section}' in {config_file}, found {list(config.keys())}")
-        return config[section]
+        return copy.deepcopy(config[section])
 
-    return config
+    return copy.deepcopy(config)
 
 
-def build_base_url(config: Dict[str, Any]) -> str:
+def load_optional_config(section: str) -> Dict[str, Any]:
+    """
+    Like `load_config(section)` but returns an empty dict when the section is absent.
+    Used for tuning sections that have built-in defaults.
+    """
+    try:
+        return load_config(section) or {}
+    except KeyError:
+        return {}
+
+
+def build_base_url(config: Dict[str, Any], driver: str = "psycopg2") -> str:
     """
     Build SQLAlchemy connection URL without specifying database.
     """
@@ -52,14 +103,63 @@ def build_base_url(config: Dict[str, Any]) -> str:
     password = urllib.parse.quote_plus(config["PASSWORD"])
     host = config["HOST"]
     port = config["PORT"]
-    return f"postgresql+psycopg2://{user}:{password}@{host}:{port}/"
+    return f"postgresql+{driver}://{user}:{password}@{host}:{port}/"
 
 
-def build_database_url(config: Dict[str, Any]) -> str:
+def build_database_url(config: Dict[str, Any], driver: str = "psycopg2") -> str:
     """
     Build SQLAlchemy connection URL including the database name.
     """
-    return build_base_url(config) + config["DATABASE_NAME"]
+    return build_base_url(config, driver) + config["DATABASE_NAME"]
+
+
+def get_pool_settings(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Read connection pool settings from the DATABASE.POOL config section.
+
+    Returns:
+        Dict[str, Any]: size, max_overflow, recycle_seconds, timeout_seconds, statement_timeout_ms.
+    """
+    pool_conf = config.get("POOL") or {}
+    return {
+        "size": int(pool_conf.get("SIZE", 5)),
+        "max_overflow": int(pool_conf.get("MAX_OVERFLOW", 10)),
+        "recycle_seconds": int(pool_conf.get("RECYCLE_SECONDS", 1800)),
+        "timeout_seconds": float(pool_conf.get("TIMEOUT_SECONDS", 30)),
+        "statement_timeout_ms": int(pool_conf.get("STATEMENT_TIMEOUT_MS", 30000)),
+    }
+
+
+def register_pool_metrics(name: str, pool) -> None:
+    """
+    Expose pool usage gauges (size, checked out, overflow, idle) under `db.pool.<name>.*`.
+    """
+    metrics.register_gauge(f"db.pool.{name}.size", pool.size)
+    metrics.register_gauge(f"db.pool.{name}.checked_out", pool.checkedout)
+    metrics.register_gauge(f"db.pool.{name}.checked_in", pool.checkedin)
+    metrics.register_gauge(f"db.pool.{name}.overflow", pool.overflow)
+
+
+def timed_pool_class(base, name: str):
+    """
+    Pool class that records how long each connection checkout waited
+    (`db.pool.<name>.wait_seconds`) and counts checkout timeouts.
+    Measured in the pool, so sessions still check out lazily on first use.
+    """
+
+    class TimedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                metrics.inc(f"db.pool.{name}.timeouts")
+                raise
+            metrics.observe(f"db.pool.{name}.wait_seconds", time.perf_counter() - start)
+            return connection
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
 
 
 def create_db_engine():
@@ -79,23 +179,145 @@ def create_db_engine():
         if not result.scalar():
             conn.execute(text(f'CREATE DATABASE "{db_name}"'))
 
+    base_engine.dispose()
+
     # Step 3: Connect to actual database
-    return create_engine(build_database_url(db_conf), pool_pre_ping=True)
+    pool = get_pool_settings(db_conf)
+    db_engine = create_engine(
+        build_database_url(db_conf),
+        poolclass=timed_pool_class(QueuePool, "sync"),
+        pool_pre_ping=True,
+        pool_size=pool["size"],
+        max_overflow=pool["max_overflow"],
+        pool_recycle=pool["recycle_seconds"],
+        pool_timeout=pool["timeout_seconds"],
+        connect_args={"options": f"-c statement_timeout={pool['statement_timeout_ms']}"},
+    )
+    register_pool_metrics("sync", db_engine.pool)
+    return db_engine
+
+
+def create_async_db_engine():
+    """
+    Create an async PostgreSQL engine using asyncpg.
+    Shares the DATABASE.POOL settings with the sync engine; the database itself
+    is created by `create_db_engine`.
+    """
+    db_conf = load_config("DATABASE")
+    pool = get_pool_settings(db_conf)
+    async_db_engine = create_async_engine(
+        build_database_url(db_conf, driver="asyncpg"),
+        poolclass=timed_pool_class(AsyncAdaptedQueuePool, "async"),
+        pool_pre_ping=True,
+        pool_size=pool["size"],
+        max_overflow=pool["max_overflow"],
+        pool_recycle=pool["recycle_seconds"],
+        pool_timeout=pool["timeout_seconds"],
+        connect_args={
+            "server_settings": {"statement_timeout": str(pool["statement_timeout_ms"])},
+            "command_timeout": pool["statement_timeout_ms"] / 1000,
+        },
+    )
+    register_pool_metrics("async", async_db_engine.sync_engine.pool)
+    return async_db_engine
 
 
-# --- Initialize Engine, Session, Base ---
-engine = create_db_engine()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# --- Engine, Session, Base ---
+# Engines are created on first use (normally from the FastAPI lifespan) so that
+# importing the app does not connect to PostgreSQL.
 Base = declarative_base()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+_engine = None
+_async_engine = None
+_AsyncSessionLocal = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Returns the sync engine, creating it (and the database, if missing) on first call.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine()
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def get_async_sessionmaker():
+    """
+    Returns the async session factory, creating the asyncpg engine on first call.
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        with _engine_lock:
+            if _AsyncSessionLocal is None:
+                _async_engine = create_async_db_engine()
+                _AsyncSessionLocal = async_sessionmaker(
+                    bind=_async_engine, autoflush=False, expire_on_commit=False
+                )
+    return _AsyncSessionLocal
+
+
+def init_db() -> None:
+    """
+    Create the engine and any missing tables, then upgrade existing ones.
+    Called from the app lifespan.
+    """
+    from backend.app.models.models import Document
+
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        Document.upgrade_schema(connection)
+
+
+async def dispose_engines() -> None:
+    """
+    Close pooled connections of both engines. Called on app shutdown.
+    """
+    global _engine, _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+
+
+def __getattr__(name: str):
+    # Backwards compatibility for `from backend.app.utils.database import engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency for FastAPI routes.
     Provides and closes SQLAlchemy session.
+    The connection is checked out on first use, not for every request.
     """
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for async FastAPI routes.
+    Provides and closes an asyncpg-backed AsyncSession so DB round trips don't block the event loop.
+    The connection is checked out on first use, not for every request.
+    """
+    session = get_async_sessionmaker()()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Exclusive inter-process lock backed by a lock file (flock on POSIX, msvcrt on Windows).
+    Also serializes threads of the same process, since flock is per open file description.
+    Not reentrant: do not nest two FileLocks on the same path in one thread.
+
+    Usage:
+        with FileLock("data/faiss_index.index.lock"):
+            ...
+    """
+
+    _thread_locks: dict = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str, timeout: float | None = None, poll_interval: float = 0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+        with FileLock._registry_lock:
+            self._thread_lock = FileLock._thread_locks.setdefault(
+                os.path.abspath(path), threading.Lock()
+            )
+
+    def acquire(self) -> None:
+        """Block until the lock is held (or raise TimeoutError after `timeout` seconds)."""
+        if not self._thread_lock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise TimeoutError(f"Timed out waiting for lock {self.path}")
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            deadline = None if self.timeout is None else time.monotonic() + self.timeout
+            while True:
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX | (fcntl.LOCK_NB if deadline else 0))
+                    else:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if deadline is not None and time.monotonic() > deadline:
+                        os.close(fd)
+                        raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                    time.sleep(self.poll_interval)
+            self._fd = fd
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self) -> None:
+        """Release the lock."""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,73 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Dict
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry.
+    Keeps counters, callable gauges and recent timing samples for the /api/metrics endpoint.
+    """
+
+    def __init__(self, max_samples: int = 1024):
+        self._lock = threading.Lock()
+        self._max_samples = max_samples
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+        self._timings: Dict[str, dict] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a timing/size sample (e.g. wait time in seconds)."""
+        with self._lock:
+            timing = self._timings.setdefault(
+                name, {"count": 0, "total": 0.0, "max": 0.0, "samples": deque(maxlen=self._max_samples)}
+            )
+            timing["count"] += 1
+            timing["total"] += value
+            timing["max"] = max(timing["max"], value)
+            timing["samples"].append(value)
+
+    def register_gauge(self, name: str, fn: Callable[[], Any]) -> None:
+        """Register a gauge evaluated lazily on every snapshot."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the current value of every metric.
+
+        Timings are summarised as count / mean / p50 / p95 / max over the recent samples.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timings = {name: dict(t, samples=list(t["samples"])) for name, t in self._timings.items()}
+
+        gauge_values = {}
+        for name, fn in gauges.items():
+            try:
+                gauge_values[name] = fn()
+            except Exception as e:
+                gauge_values[name] = f"unavailable: {e}"
+
+        timing_values = {}
+        for name, t in timings.items():
+            samples = sorted(t["samples"])
+            timing_values[name] = {
+                "count": t["count"],
+                "mean": round(t["total"] / t["count"], 6) if t["count"] else 0.0,
+                "p50": round(samples[len(samples) // 2], 6) if samples else 0.0,
+                "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 6) if samples else 0.0,
+                "max": round(t["max"], 6),
+            }
+
+        return {"counters": counters, "gauges": gauge_values, "timings": timing_values}
+
+
+# Shared registry for the whole process
+metrics = MetricsRegistry()
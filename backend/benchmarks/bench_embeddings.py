@@ -0,0 +1,75 @@
+"""
+Benchmark for the CPU embedding backends.
+
+Encodes the same corpus with each backend and reports throughput (chunks/sec)
+and cosine drift against the fp32 PyTorch baseline.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_embeddings --backends torch int8 onnx --chunks 1000
+    python -m backend.benchmarks.bench_embeddings --text-file sample_docs/report.txt
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.app.services.embedding_backends import BACKENDS, autotune_samples
+from backend.app.services.text_spitter import TextSplitter
+
+
+def load_corpus(text_file: str | None, chunks: int) -> list[str]:
+    """Chunks from a real text file, or synthetic chunk-sized texts."""
+    if text_file:
+        with open(text_file, "r", encoding="utf-8") as f:
+            corpus = TextSplitter(chunk_size=800, overlap=100).split_text(f.read())
+        return (corpus * (chunks // max(1, len(corpus)) + 1))[:chunks]
+    return autotune_samples(count=chunks)
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity between two equally shaped matrices."""
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--text-file", default=None)
+    parser.add_argument("--no-autotune", action="store_true", help="Use batch_size=32 and default threads")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.text_file, args.chunks)
+    print(f"model={args.model} chunks={len(texts)}")
+    print(f"{'backend':<8} {'batch':>6} {'threads':>8} {'chunks/s':>10} {'cos mean':>9} {'cos min':>9}")
+
+    baseline = None
+    for name in ["torch"] + [b for b in args.backends if b != "torch"]:
+        try:
+            backend = BACKENDS[name](args.model)
+        except Exception as e:
+            print(f"{name:<8} unavailable: {e}")
+            continue
+
+        if not args.no_autotune:
+            backend.autotune(autotune_samples())
+
+        backend.encode(texts[:backend.batch_size])  # warm-up
+        start = time.perf_counter()
+        embeddings = backend.encode(texts)
+        rate = len(texts) / (time.perf_counter() - start)
+
+        if baseline is None:
+            baseline = embeddings
+        cos = cosine_rows(baseline, embeddings)
+
+        if name in args.backends:
+            print(f"{name:<8} {backend.batch_size:>6} {str(backend.num_threads):>8} {rate:>10.1f} "
+                  f"{cos.mean():>9.5f} {cos.min():>9.5f}")
+
+
+if __name__ == "__main__":
+    main()
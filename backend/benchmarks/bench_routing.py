@@ -0,0 +1,125 @@
+"""
+Benchmark for corpus-wide search routed through per-document summary vectors.
+
+Builds a synthetic corpus where each document covers a few sub-topics, then
+compares the routed search (pick candidate documents from the routing index,
+search only their chunks) against a full scan of every chunk: recall@k of the
+routed results w.r.t. the full scan, and per-query latency.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_routing --docs 2000 --chunks-per-doc 100 --candidates 4 8 16 32
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from backend.app.services.vector_routing import DocumentRoutingIndex
+from backend.app.services.vector_store_sharded import CHUNK_BITS, ShardedFAISSVectorStore, document_key
+
+
+def make_corpus(rng, num_docs: int, chunks_per_doc: int, dim: int, topics_per_doc: int = 4):
+    """
+    Chunks scattered around a few sub-topic centres per document. Sub-topics are
+    drawn from a shared pool (plus a per-document offset), so related documents
+    overlap and a query's neighbours can span several documents.
+    """
+    pool = rng.normal(size=(max(8, num_docs // 4), dim)).astype(np.float32)
+    shared = pool[rng.integers(0, len(pool), size=(num_docs, topics_per_doc))]
+    centres = shared + 0.5 * rng.normal(size=(num_docs, topics_per_doc, dim)).astype(np.float32)
+    topic = rng.integers(0, topics_per_doc, size=(num_docs, chunks_per_doc))
+    noise = rng.normal(scale=0.6, size=(num_docs, chunks_per_doc, dim)).astype(np.float32)
+    vectors = centres[np.arange(num_docs)[:, None], topic] + noise
+    return vectors.reshape(-1, dim)
+
+
+def build_store(path: str, num_shards: int, vectors: np.ndarray, doc_ids: list[str], chunks_per_doc: int,
+                representatives: int):
+    """Load the corpus with one bulk add per shard and build the routing index in one pass."""
+    store = ShardedFAISSVectorStore(base_path=path, num_shards=num_shards, embedding_dim=vectors.shape[1])
+    ids = np.empty(len(vectors), dtype="int64")
+    shard_of = np.empty(len(vectors), dtype="int64")
+    for d, doc_id in enumerate(doc_ids):
+        rows = slice(d * chunks_per_doc, (d + 1) * chunks_per_doc)
+        key = document_key(doc_id)
+        ids[rows] = (key << CHUNK_BITS) + np.arange(chunks_per_doc)
+        shard_of[rows] = key % num_shards
+    for shard_id, shard in enumerate(store.shards):
+        mask = shard_of == shard_id
+        if mask.any():
+            shard.add_embeddings(vectors[mask], ids=ids[mask].tolist())
+
+    store.routing = DocumentRoutingIndex(
+        f"{path}.routing.index", chunk_bits=CHUNK_BITS, embedding_dim=vectors.shape[1],
+        representatives=representatives,
+    )
+    start = time.perf_counter()
+    store.routing.rebuild(ids, vectors)
+    print(f"routing index: {len(doc_ids)} documents in {time.perf_counter() - start:.2f}s")
+    return store
+
+
+def timed_search(store, queries: np.ndarray, top_k: int, exhaustive: bool):
+    results, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        indices, _ = store.search(q, top_k=top_k, exhaustive=exhaustive)
+        latencies.append(time.perf_counter() - start)
+        results.append(indices)
+    latencies.sort()
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--chunks-per-doc", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--representatives", type=int, default=4)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_corpus(rng, args.docs, args.chunks_per_doc, args.dim)
+    doc_ids = [str(uuid.UUID(int=int(rng.integers(0, 2**63)))) for _ in range(args.docs)]
+    # Queries are perturbed chunks, so the true neighbours sit in a few documents
+    picks = rng.integers(0, len(vectors), size=args.queries)
+    queries = vectors[picks] + rng.normal(scale=0.3, size=(args.queries, args.dim)).astype(np.float32)
+
+    print(f"corpus={len(vectors)} vectors docs={args.docs} dim={args.dim} queries={args.queries} "
+          f"top_k={args.top_k} shards={args.shards} representatives={args.representatives}")
+
+    workdir = tempfile.mkdtemp(prefix="faiss_routing_")
+    try:
+        store = build_store(os.path.join(workdir, "faiss_index"), args.shards, vectors, doc_ids,
+                            args.chunks_per_doc, args.representatives)
+        store.search(queries[0], top_k=args.top_k, exhaustive=True)  # warm-up
+        truth, full = timed_search(store, queries, args.top_k, exhaustive=True)
+
+        print(f"{'mode':>14} {'recall@k':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        print(f"{'full scan':>14} {1.0:>9.3f} {statistics.median(full) * 1000:>9.2f} "
+              f"{full[int(len(full) * 0.95) - 1] * 1000:>9.2f}")
+
+        for candidates in args.candidates:
+            store.routing_candidates = candidates
+            store.search(queries[0], top_k=args.top_k)  # warm-up (sorted id cache)
+            routed, latencies = timed_search(store, queries, args.top_k, exhaustive=False)
+            recall = np.mean([
+                len(set(r) & set(t)) / max(1, len(t)) for r, t in zip(routed, truth)
+            ])
+            print(f"{f'routed@{candidates}':>14} {recall:>9.3f} {statistics.median(latencies) * 1000:>9.2f} "
+                  f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>9.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark for ShardedFAISSVectorStore fan-out search.
+
+Builds stores with the same synthetic corpus split over 1, 2, 4, ... shards and
+reports corpus-wide search latency (single client) and throughput (concurrent
+clients) for each shard count.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_sharded_search --vectors 500000 --shards 1 2 4 8
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backend.app.services.vector_store_sharded import (
+    CHUNK_BITS,
+    ShardedFAISSVectorStore,
+    document_key,
+)
+
+
+def build_store(path: str, num_shards: int, vectors: np.ndarray, doc_ids: list[str], chunks_per_doc: int):
+    """Load the corpus with one bulk add per shard."""
+    store = ShardedFAISSVectorStore(base_path=path, num_shards=num_shards, embedding_dim=vectors.shape[1])
+    ids = np.empty(len(vectors), dtype="int64")
+    shard_of = np.empty(len(vectors), dtype="int64")
+    for d, doc_id in enumerate(doc_ids):
+        rows = slice(d * chunks_per_doc, (d + 1) * chunks_per_doc)
+        key = document_key(doc_id)
+        ids[rows] = (key << CHUNK_BITS) + np.arange(chunks_per_doc)
+        shard_of[rows] = key % num_shards
+    for shard_id, shard in enumerate(store.shards):
+        mask = shard_of == shard_id
+        if mask.any():
+            shard.add_embeddings(vectors[mask], ids=ids[mask].tolist())
+    return store
+
+
+def run_queries(store, queries: np.ndarray, top_k: int, clients: int):
+    """Run all queries over `clients` threads; return (latencies_s, wall_s)."""
+    def one(q):
+        start = time.perf_counter()
+        store.search(q, top_k=top_k)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = list(pool.map(one, queries))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--chunks-per-doc", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    num_docs = args.vectors // args.chunks_per_doc
+    vectors = rng.random((num_docs * args.chunks_per_doc, args.dim), dtype=np.float32)
+    queries = rng.random((args.queries, args.dim), dtype=np.float32)
+    doc_ids = [str(uuid.UUID(int=int(rng.integers(0, 2**63)))) for _ in range(num_docs)]
+
+    print(f"corpus={len(vectors)} vectors dim={args.dim} queries={args.queries} "
+          f"top_k={args.top_k} cores={os.cpu_count()} clients={args.clients}")
+    print(f"{'shards':>6} {'p50 ms':>9} {'p99 ms':>9} {'1-client QPS':>13} {'N-client QPS':>13}")
+
+    for num_shards in args.shards:
+        workdir = tempfile.mkdtemp(prefix="faiss_shards_")
+        try:
+            store = build_store(os.path.join(workdir, "faiss_index"), num_shards, vectors, doc_ids,
+                                args.chunks_per_doc)
+            store.search(queries[0], top_k=args.top_k)  # warm-up
+
+            latencies, wall = run_queries(store, queries, args.top_k, clients=1)
+            latencies.sort()
+            single_qps = len(queries) / wall
+            _, wall_n = run_queries(store, queries, args.top_k, clients=args.clients)
+
+            print(f"{num_shards:>6} {statistics.median(latencies) * 1000:>9.2f} "
+                  f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:>9.2f} "
+                  f"{single_qps:>13.1f} {len(queries) / wall_n:>13.1f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
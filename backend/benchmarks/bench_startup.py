@@ -0,0 +1,116 @@
+"""
+Startup-time benchmark for the FastAPI app.
+
+Measures, in fresh interpreter processes:
+  - import time of `backend.app.main`
+  - time-to-first-request: from launching uvicorn until `GET /` returns 200
+  - optionally the slowest imports (`python -X importtime`)
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_startup --runs 5 --importtime
+"""
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import backend.app.main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure_import(runs: int) -> list[float]:
+    """Time `import backend.app.main` in `runs` fresh interpreters."""
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_request(runs: int, path: str, timeout: float) -> list[float]:
+    """Launch uvicorn and time until the first successful response on `path`."""
+    samples = []
+    for _ in range(runs):
+        port = free_port()
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(port), "--log-level", "warning"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"Server did not answer within {timeout}s")
+                if proc.poll() is not None:
+                    raise RuntimeError("uvicorn exited before serving a request")
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as resp:
+                        if resp.status == 200:
+                            break
+                except OSError:
+                    time.sleep(0.02)
+            samples.append(time.perf_counter() - start)
+        finally:
+            proc.terminate()
+            proc.wait()
+    return samples
+
+
+def top_imports(limit: int) -> list[tuple[int, str]]:
+    """Return the `limit` slowest imports by cumulative time (microseconds)."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.app.main"],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def summarize(name: str, samples: list[float]):
+    print(
+        f"  {name:<24} median={statistics.median(samples) * 1000:8.1f} ms  "
+        f"min={min(samples) * 1000:8.1f} ms  max={max(samples) * 1000:8.1f} ms  (n={len(samples)})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/", help="Endpoint used for the first request")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--importtime", action="store_true", help="Print the slowest imports")
+    parser.add_argument("--skip-server", action="store_true", help="Only measure import time")
+    args = parser.parse_args()
+
+    print("Startup benchmark")
+    summarize("import backend.app.main", measure_import(args.runs))
+    if not args.skip_server:
+        summarize(f"first request {args.path}", measure_first_request(args.runs, args.path, args.timeout))
+
+    if args.importtime:
+        print("\nSlowest imports (cumulative):")
+        for cumulative_us, name in top_imports(15):
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Local stand-in for the hosted LLM, for load testing and profiling the QA path
+without a live provider or real spend.
+
+Serves the OpenAI chat completions API (also under /openai/v1, the path the
+Groq SDK uses) with a configurable time-to-first-token, token rate and
+injected errors. Answers are deterministic per prompt.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.fake_llm_server --port 8100 --latency-ms 400 --tokens-per-second 60 --error-rate 0.02
+
+and point the app at it in the config:
+    LLM:
+        PROVIDER: "openai"
+        BASE_URL: "http://localhost:8100/v1"
+(or keep PROVIDER "groq" with BASE_URL "http://localhost:8100").
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from backend.app.services.llm_providers import FakeLLM
+
+
+def create_app(fake: FakeLLM, error_status: int = 503) -> FastAPI:
+    app = FastAPI(title="Fake LLM server")
+    stats = {"requests": 0, "errors": 0}
+
+    def _prompt(body: dict) -> str:
+        return "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+
+    def _completion(body: dict, text: str, prompt: str) -> dict:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": len(prompt.split()),
+                "completion_tokens": len(text.split()),
+                "total_tokens": len(prompt.split()) + len(text.split()),
+            },
+        }
+
+    def _error() -> JSONResponse:
+        stats["errors"] += 1
+        headers = {"Retry-After": "1"} if error_status == 429 else None
+        return JSONResponse(
+            status_code=error_status,
+            content={"error": {"message": "Injected failure", "type": "server_error", "code": error_status}},
+            headers=headers,
+        )
+
+    async def _stream(body: dict, text: str):
+        """SSE chunks: first token after the latency, then one word per token interval."""
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        words = text.split(" ")
+        interval = 1 / fake.tokens_per_second if fake.tokens_per_second > 0 else 0.0
+        await asyncio.sleep(fake.duration(0))
+        for i, word in enumerate(words):
+            delta = {"content": word if i == 0 else " " + word}
+            chunk = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(interval)
+        done = dict(chunk, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        yield f"data: {json.dumps(done)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = _prompt(body)
+        output_tokens = min(fake.output_tokens, int(body.get("max_tokens") or fake.output_tokens))
+        stats["requests"] += 1
+        if fake.should_fail():
+            # Failures still take the time to first token, like an overloaded backend
+            await asyncio.sleep(fake.duration(0))
+            return _error()
+        text = fake.text(prompt, output_tokens)
+        if body.get("stream"):
+            return StreamingResponse(_stream(body, text), media_type="text/event-stream")
+        await asyncio.sleep(fake.duration(output_tokens))
+        return _completion(body, text, prompt)
+
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/v1/models")
+    def models():
+        return {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "local"}]}
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=500, help="Time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--output-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected failures")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    fake = FakeLLM(
+        latency_seconds=args.latency_ms / 1000,
+        jitter_seconds=args.jitter_ms / 1000,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(fake, args.error_status), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
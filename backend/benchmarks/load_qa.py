@@ -0,0 +1,164 @@
+"""
+Open-loop load generator for the upload and query endpoints.
+
+Requests are started on a fixed schedule (the target RPS) whether or not
+earlier ones have finished, and latency is measured from each request's
+scheduled start, so a server that falls behind shows up in the tail instead
+of silently lowering the offered load. Reports throughput, status codes
+(429 = shed by admission control), degraded/cached answers and p50/p90/p99
+latency per phase.
+
+Run the API against the fake LLM (benchmarks/fake_llm_server.py, or
+LLM.PROVIDER "fake") to load-test retrieval and serving without a live provider.
+
+Usage (from the repository root, with the API on :8000):
+    python -m backend.benchmarks.load_qa --uploads 20 --upload-rps 2 --rps 20 --duration 60
+    python -m backend.benchmarks.load_qa --document-ids <uuid> <uuid> --rps 50 --duration 30 --deadline-ms 2000
+"""
+import argparse
+import asyncio
+import collections
+import random
+import time
+
+import httpx
+
+QUESTIONS = [
+    "What is this document about?",
+    "Summarize the main findings.",
+    "Which risks are mentioned?",
+    "What does the document say about the schedule?",
+    "Who is responsible for the budget?",
+    "What are the next steps?",
+]
+
+_WORDS = ("project budget schedule risk team customer report analysis result "
+          "quarter revenue plan milestone review contract delivery scope").split()
+
+
+def synthetic_document(rng: random.Random, paragraphs: int) -> str:
+    """A plain-text document of random sentences (enough to produce several chunks)."""
+    lines = []
+    for _ in range(paragraphs):
+        sentences = [
+            " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(rng.randint(3, 6))
+        ]
+        lines.append(" ".join(sentences))
+    return "\n\n".join(lines)
+
+
+class PhaseStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: list[float] = []
+        self.statuses = collections.Counter()
+        self.flags = collections.Counter()
+        self.started = 0
+        self.wall_seconds = 0.0
+
+    def record(self, status: int, latency: float, body: dict | None = None) -> None:
+        self.statuses[status] += 1
+        self.latencies.append(latency)
+        for flag in ("degraded", "cached"):
+            if body and body.get(flag):
+                self.flags[flag] += 1
+
+    def report(self) -> None:
+        ok = self.statuses.get(200, 0)
+        latencies = sorted(self.latencies)
+
+        def pct(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+        print(f"\n[{self.name}] sent={self.started} completed={len(latencies)} ok={ok} "
+              f"throughput={ok / self.wall_seconds if self.wall_seconds else 0:.1f} ok/s "
+              f"over {self.wall_seconds:.1f}s")
+        print("  status: " + ", ".join(f"{status}={count}" for status, count in sorted(self.statuses.items())))
+        if self.flags:
+            print("  answers: " + ", ".join(f"{flag}={count}" for flag, count in sorted(self.flags.items())))
+        print(f"  latency ms: p50={pct(0.50):.0f} p90={pct(0.90):.0f} p99={pct(0.99):.0f} max={pct(1.0):.0f}")
+
+
+async def _timed(stats: PhaseStats, scheduled: float, request) -> dict | None:
+    try:
+        response = await request()
+    except httpx.HTTPError as e:
+        # Connection errors/timeouts are reported as status 0
+        stats.record(0, time.perf_counter() - scheduled)
+        print(f"  request failed: {type(e).__name__}: {e}")
+        return None
+    body = response.json() if response.headers.get("content-type", "").startswith("application/json") else None
+    stats.record(response.status_code, time.perf_counter() - scheduled, body)
+    return body if response.status_code == 200 else None
+
+
+async def run_phase(stats: PhaseStats, rps: float, count: int, make_request) -> list:
+    """Start `count` requests at `rps` on a fixed schedule and wait for all of them."""
+    tasks = []
+    start = time.perf_counter()
+    for i in range(count):
+        scheduled = start + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_timed(stats, scheduled, make_request(i))))
+        stats.started += 1
+    results = await asyncio.gather(*tasks)
+    stats.wall_seconds = time.perf_counter() - start
+    return results
+
+
+async def main_async(args) -> None:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        document_ids = list(args.document_ids or [])
+
+        if args.uploads:
+            upload_stats = PhaseStats("upload")
+
+            def make_upload(i: int):
+                text = synthetic_document(rng, args.paragraphs)
+                files = {"file": (f"load_{i}.txt", text.encode("utf-8"), "text/plain")}
+                return lambda: client.post("/api/documents/upload", files=files)
+
+            results = await run_phase(upload_stats, args.upload_rps, args.uploads, make_upload)
+            document_ids += [body["document_id"] for body in results if body]
+            upload_stats.report()
+
+        if not document_ids:
+            print("No documents to query (pass --document-ids or --uploads).")
+            return
+
+        query_stats = PhaseStats("query")
+
+        def make_query(i: int):
+            params = {"document_id": rng.choice(document_ids), "question": rng.choice(QUESTIONS)}
+            if args.deadline_ms:
+                params["deadline_ms"] = args.deadline_ms
+            return lambda: client.post("/api/qa/query", params=params)
+
+        await run_phase(query_stats, args.rps, int(args.rps * args.duration), make_query)
+        query_stats.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--document-ids", nargs="*", help="Query these documents (in addition to any uploaded)")
+    parser.add_argument("--uploads", type=int, default=0, help="Synthetic documents to upload first")
+    parser.add_argument("--upload-rps", type=float, default=1.0)
+    parser.add_argument("--paragraphs", type=int, default=20, help="Paragraphs per synthetic document")
+    parser.add_argument("--rps", type=float, default=10.0, help="Target query rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="Query phase length in seconds")
+    parser.add_argument("--deadline-ms", type=int, default=None, help="Per-query latency budget sent to the API")
+    parser.add_argument("--max-connections", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Stress test for concurrent FAISS index writes and reads.
+
+Starts several writer processes that each add batches of unique random vectors
+to the same FAISSVectorStore, plus reader processes that search continuously
+while snapshots are being published. At the end it checks that:
+  - the final index holds exactly writers * batches * batch_size vectors
+  - every vector written is stored unchanged under the id it was given
+  - readers never failed to load or search a snapshot
+
+Usage (from the repository root):
+    python -m backend.benchmarks.stress_index_writes --writers 4 --readers 2 --batches 20
+"""
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from backend.app.services.vector_store_faiss import FAISSVectorStore
+
+DIM = 32
+
+
+def writer_vectors(writer_id: int, batch: int, batch_size: int) -> np.ndarray:
+    """Deterministic, unique vectors for (writer, batch) so they can be verified later."""
+    rng = np.random.default_rng(writer_id * 100_000 + batch)
+    return rng.random((batch_size, DIM), dtype=np.float32)
+
+
+def writer(index_path: str, writer_id: int, batches: int, batch_size: int, results):
+    ids = []
+    for batch in range(batches):
+        store = FAISSVectorStore(index_path=index_path, embedding_dim=DIM)
+        ids.extend(store.add_embeddings(writer_vectors(writer_id, batch, batch_size)))
+    results.put(("writer", writer_id, ids))
+
+
+def reader(index_path: str, reader_id: int, stop, results):
+    searches, errors, swaps = 0, 0, 0
+    store = FAISSVectorStore(index_path=index_path, embedding_dim=DIM)
+    rng = np.random.default_rng(10_000 + reader_id)
+    while not stop.is_set():
+        try:
+            before = store.version
+            store.search(rng.random(DIM, dtype=np.float32), top_k=5)
+            swaps += store.version != before
+            searches += 1
+        except Exception as e:
+            errors += 1
+            print(f"reader {reader_id} error: {e}")
+    results.put(("reader", reader_id, (searches, errors, swaps)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="faiss_stress_")
+    index_path = os.path.join(workdir, "faiss_index.index")
+    results, stop = mp.Queue(), mp.Event()
+
+    start = time.perf_counter()
+    readers = [mp.Process(target=reader, args=(index_path, r, stop, results)) for r in range(args.readers)]
+    writers = [
+        mp.Process(target=writer, args=(index_path, w, args.batches, args.batch_size, results))
+        for w in range(args.writers)
+    ]
+    for p in readers + writers:
+        p.start()
+
+    written = {}
+    for _ in writers:
+        _, writer_id, ids = results.get()
+        written[writer_id] = ids
+    for p in writers:
+        p.join()
+    stop.set()
+    reads = [results.get()[2] for _ in readers]
+    for p in readers:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    store = FAISSVectorStore(index_path=index_path, embedding_dim=DIM)
+    expected = args.writers * args.batches * args.batch_size
+    all_ids = [i for ids in written.values() for i in ids]
+
+    lost = 0
+    stored_ids = store.sorted_ids()
+    for writer_id, ids in written.items():
+        vectors = np.vstack([writer_vectors(writer_id, b, args.batch_size) for b in range(args.batches)])
+        ids = np.asarray(ids, dtype=np.int64)
+        present = np.isin(ids, stored_ids)
+        lost += int((~present).sum())
+        # Every vector must be stored unchanged under the id it was given
+        mismatched = np.abs(store.reconstruct(ids[present]) - vectors[present]).max(axis=1) > 1e-6
+        lost += int(mismatched.sum())
+
+    searches = sum(r[0] for r in reads)
+    read_errors = sum(r[1] for r in reads)
+    swaps = sum(r[2] for r in reads)
+
+    print(f"elapsed={elapsed:.1f}s snapshot_version={store.version}")
+    print(f"vectors: expected={expected} in_index={store.ntotal} unique_ids={len(set(all_ids))} lost={lost}")
+    print(f"readers: searches={searches} errors={read_errors} hot_swaps={swaps}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    ok = store.ntotal == expected and len(set(all_ids)) == expected and lost == 0 and read_errors == 0
+    print("PASS" if ok else "FAIL")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
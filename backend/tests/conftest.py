@@ -0,0 +1,177 @@
+import contextlib
+import copy
+import hashlib
+import re
+import uuid
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.utils import database
+from backend.app.utils.database import Base
+
+# Minimal config for tests; LOCAL.yml is never read. Tests tweak sections through `app_config`.
+TEST_CONFIG = {
+    "GROQ_API_KEY": {"API_KEY": "test"},
+    "EMBEDDINGS": {"NORMALIZE": True},
+    "INGESTION": {"CHUNK_SIZE": 200, "CHUNK_OVERLAP": 20, "CONTENT_DEFINED_CHUNKS": True},
+    "VECTOR_STORE": {"NUM_SHARDS": 2, "METRIC": "ip", "ROUTING": {"ENABLED": False}},
+    "ADMISSION": {"REQUEST_BUDGET_SECONDS": 5},
+    "QA": {"ANSWER_CACHE": {"ENABLED": True}},
+    "LLM": {"PROVIDER": "fake"},
+}
+
+
+@pytest.fixture(autouse=True)
+def app_config(monkeypatch):
+    """The config every `load_config` call sees during a test (mutable per test)."""
+    config = copy.deepcopy(TEST_CONFIG)
+    monkeypatch.setattr(database, "_resolve_config_file", lambda: "test.yml")
+    monkeypatch.setattr(database, "_read_config", lambda config_file: config)
+    return config
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    """Sync session on a scratch SQLite database with all tables created."""
+    import backend.app.models.models  # noqa: F401 (registers the tables)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def async_db(tmp_path):
+    """
+    Opens AsyncSessions (aiosqlite) on a scratch database with all tables created.
+    Use inside the test's event loop: `async with async_db() as db: ...`
+    """
+    import backend.app.models.models  # noqa: F401 (registers the tables)
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test_async.db'}"
+
+    @contextlib.asynccontextmanager
+    async def open_session():
+        engine = create_async_engine(url)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session = async_sessionmaker(bind=engine, expire_on_commit=False)()
+        try:
+            yield session
+        finally:
+            await session.close()
+            await engine.dispose()
+
+    return open_session
+
+
+class HashingBackend:
+    """
+    Deterministic bag-of-words embedding backend for tests: each word is hashed
+    into one of `dim` buckets and rows are L2-normalized, so texts sharing words
+    are close. Stands in for the SentenceTransformer backends.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.normalize = True
+        self.batch_size = 32
+
+    def encode(self, texts: list[str], batch_size: int | None = None) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        return vectors
+
+
+@pytest.fixture
+def embeddings_backend(monkeypatch):
+    """Makes EmbeddingsService use HashingBackend for the default model."""
+    from backend.app.services.embeddings_service import EmbeddingsService
+
+    backend = HashingBackend()
+    monkeypatch.setitem(EmbeddingsService._backends, ("torch", "all-MiniLM-L6-v2"), backend)
+    return backend
+
+
+@pytest.fixture
+def vector_store_env(app_config, embeddings_backend, tmp_path, monkeypatch):
+    """Scratch vector store under tmp_path, HashingBackend embeddings and fresh admission limiters."""
+    from backend.app.services.vector_store_faiss import FAISSVectorStore
+    from backend.app.utils import admission
+
+    app_config["VECTOR_STORE"]["BASE_PATH"] = str(tmp_path / "faiss_index")
+    monkeypatch.setattr(admission, "_limiters", {})
+    FAISSVectorStore._loaded.clear()
+    yield app_config
+    FAISSVectorStore._loaded.clear()
+
+
+@pytest.fixture
+def ingest(vector_store_env):
+    """
+    Embeds chunks into the scratch store and saves the document's metadata:
+    `document_id, vector_ids = await ingest(db, chunks)`. With `with_chunk_rows=False`
+    no chunk rows are saved, like documents ingested before chunk texts were stored.
+    """
+    from backend.app.services.embeddings_service import EmbeddingsService
+    from backend.app.services.metadata_service import MetadataService
+    from backend.app.services.vector_store_sharded import ShardedFAISSVectorStore
+
+    async def ingest_document(db, chunks: list[str], filename: str = "doc.txt", with_chunk_rows: bool = True):
+        document_id = str(uuid.uuid4())
+        embeddings = EmbeddingsService().create_embeddings(chunks)
+        store = ShardedFAISSVectorStore(embedding_dim=embeddings.shape[1])
+        vector_ids = store.add_embeddings(embeddings, document_id, new_document=True)
+        await MetadataService.save_metadata_async(
+            db, document_id, filename, chunks, embeddings.shape[1], store.index_path,
+            vector_ids if with_chunk_rows else None,
+        )
+        return document_id, vector_ids
+
+    return ingest_document
+
+
+@pytest.fixture
+def fake_server_provider():
+    """
+    Builds LLM providers that call benchmarks/fake_llm_server.py in-process
+    (httpx ASGI transport), like the openai provider does over HTTP:
+    `fake_server_provider(FakeLLM(...), error_status=503)`.
+    """
+    import httpx
+
+    from backend.app.services.llm_providers import LLMProvider
+    from backend.benchmarks.fake_llm_server import create_app
+
+    class FakeServerProvider(LLMProvider):
+        name = "fake_server"
+
+        def __init__(self, app):
+            super().__init__({})
+            self.app = app
+
+        async def _agenerate(self, prompt: str) -> str:
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://fake-llm") as client:
+                response = await client.post(
+                    "/v1/chat/completions",
+                    json={"model": self.model, "messages": [{"role": "user", "content": prompt}]},
+                )
+                response.raise_for_status()
+                return response.json()["choices"][0]["message"]["content"]
+
+    return lambda fake, error_status=503: FakeServerProvider(create_app(fake, error_status))
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.utils import admission
+from backend.app.utils.admission import StageLimiter, get_limiter, request_deadline
+from backend.app.utils.metrics import metrics
+
+
+async def _hold(limiter: StageLimiter, release: asyncio.Event, deadline=None):
+    async with limiter.slot(deadline):
+        await release.wait()
+
+
+def test_free_slots_are_granted_up_to_concurrency():
+    async def scenario():
+        limiter = StageLimiter("test_free", max_concurrency=2, max_queue=0)
+        release = asyncio.Event()
+        holders = [asyncio.create_task(_hold(limiter, release)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert limiter._in_flight == 2
+        release.set()
+        await asyncio.gather(*holders)
+        assert limiter._in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        limiter = StageLimiter("test_queue", max_concurrency=1, max_queue=1)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, release))
+        waiter = asyncio.create_task(_hold(limiter, release))
+        await asyncio.sleep(0)
+        assert limiter._queued == 1
+
+        rejected_before = metrics.snapshot()["counters"].get("admission.test_queue.rejected", 0)
+        with pytest.raises(HTTPException) as exc:
+            async with limiter.slot():
+                pass
+        assert exc.value.status_code == 429
+        assert int(exc.value.headers["Retry-After"]) >= 1
+        assert metrics.snapshot()["counters"]["admission.test_queue.rejected"] == rejected_before + 1
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+
+    asyncio.run(scenario())
+
+
+def test_expected_wait_past_the_deadline_is_rejected_up_front():
+    async def scenario():
+        limiter = StageLimiter("test_budget", max_concurrency=1, max_queue=10)
+        limiter._service_seconds = 5.0
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, release))
+        await asyncio.sleep(0)
+
+        start = time.monotonic()
+        with pytest.raises(HTTPException) as exc:
+            async with limiter.slot(deadline=time.monotonic() + 1.0):
+                pass
+        assert exc.value.status_code == 429
+        assert "exceeds request budget" in exc.value.detail
+        assert time.monotonic() - start < 0.5
+
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
+
+
+def test_queued_caller_is_rejected_when_its_deadline_passes():
+    async def scenario():
+        limiter = StageLimiter("test_timeout", max_concurrency=1, max_queue=10)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as exc:
+            async with limiter.slot(deadline=time.monotonic() + 0.05):
+                pass
+        assert exc.value.status_code == 429
+        assert limiter._queued == 0
+
+        release.set()
+        await holder
+        # The stage is usable again once the holder is done
+        async with limiter.slot(deadline=time.monotonic() + 1.0):
+            assert limiter._in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_limiters_and_budget_come_from_config(app_config, monkeypatch):
+    monkeypatch.setattr(admission, "_limiters", {})
+    app_config["ADMISSION"]["STAGES"] = {"EMBEDDING": {"MAX_CONCURRENCY": 3}}
+
+    limiter = get_limiter("embedding")
+    assert (limiter.max_concurrency, limiter.max_queue) == (3, admission.DEFAULT_STAGES["embedding"]["MAX_QUEUE"])
+    assert get_limiter("embedding") is limiter
+    assert request_deadline() - time.monotonic() == pytest.approx(5, abs=0.5)
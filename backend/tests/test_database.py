@@ -0,0 +1,126 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from backend.app.utils import database
+from backend.app.utils.database import _read_config, load_config, load_optional_config, timed_pool_class
+from backend.app.utils.metrics import metrics
+
+
+def _timing_count(name: str) -> int:
+    return metrics.snapshot()["timings"].get(name, {}).get("count", 0)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=timed_pool_class(QueuePool, "test"),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_sessions_check_out_lazily_and_checkouts_are_timed(engine):
+    session = sessionmaker(bind=engine)()
+    before = _timing_count("db.pool.test.wait_seconds")
+
+    # A session that never runs a query does not take a connection
+    assert engine.pool.checkedout() == 0
+    session.close()
+    assert _timing_count("db.pool.test.wait_seconds") == before
+
+    session = sessionmaker(bind=engine)()
+    assert session.execute(text("SELECT 1")).scalar() == 1
+    assert engine.pool.checkedout() == 1
+    assert _timing_count("db.pool.test.wait_seconds") == before + 1
+    session.close()
+
+
+def test_checkout_timeouts_are_counted(engine):
+    held = engine.connect()
+    before = metrics.snapshot()["counters"].get("db.pool.test.timeouts", 0)
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    assert metrics.snapshot()["counters"]["db.pool.test.timeouts"] == before + 1
+    held.close()
+
+
+def test_optional_config_sections_default_to_empty(app_config):
+    app_config["QA"] = {"MIN_RELEVANCE": 0.5}
+    assert load_optional_config("QA") == {"MIN_RELEVANCE": 0.5}
+    assert load_optional_config("MISSING") == {}
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    """A real YAML config behind `load_config`, instead of the `app_config` dict."""
+    path = tmp_path / "LOCAL.yml"
+    path.write_text("QA:\n  TOP_K: 5\n  STOP_WORDS: [a, the]\n")
+    monkeypatch.setattr(database, "_config_cache", {})
+    monkeypatch.setattr(database, "_resolve_config_file", lambda: str(path))
+    monkeypatch.setattr(database, "_read_config", _read_config)
+    return path
+
+
+def test_config_is_reread_only_when_the_file_changes(config_file):
+    parsed = _read_config(str(config_file))
+    assert _read_config(str(config_file)) is parsed
+
+    mtime = os.stat(config_file).st_mtime_ns
+    config_file.write_text("QA:\n  TOP_K: 8\n")
+    os.utime(config_file, ns=(mtime + 10**9, mtime + 10**9))
+    assert load_config("QA") == {"TOP_K": 8}
+    assert _read_config(str(config_file)) is not parsed
+
+
+def test_loaded_config_is_a_copy_of_the_cache(config_file):
+    qa = load_config("QA")
+    qa["TOP_K"] = 50
+    qa["STOP_WORDS"].append("an")
+    load_config()["QA"]["STOP_WORDS"].clear()
+    assert load_config("QA") == {"TOP_K": 5, "STOP_WORDS": ["a", "the"]}
+
+
+def test_importing_the_module_creates_no_engine():
+    # Fresh interpreter: engine factories that fail, so any import-time engine or connection would raise
+    script = textwrap.dedent("""
+        import sqlalchemy, sqlalchemy.ext.asyncio
+
+        def fail(*args, **kwargs):
+            raise AssertionError("engine created at import time")
+
+        sqlalchemy.create_engine = sqlalchemy.ext.asyncio.create_async_engine = fail
+        from backend.app.utils import database
+        assert database._engine is None and database._AsyncSessionLocal is None
+    """)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_engine_is_created_once_on_first_use(tmp_path, monkeypatch):
+    created = []
+
+    def create_db_engine():
+        created.append(create_engine(f"sqlite:///{tmp_path / 'lazy.db'}"))
+        return created[-1]
+
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker())
+    monkeypatch.setattr(database, "create_db_engine", create_db_engine)
+    assert created == []
+    engine = database.get_engine()
+    assert database.get_engine() is engine and database.engine is engine
+    assert created == [engine]
+    engine.dispose()
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services import embeddings_service
+from backend.app.services.embedding_backends import EmbeddingBackend, OnnxBackend, autotune_samples
+from backend.app.services.embeddings_service import EmbeddingsService
+
+
+class StubModel:
+    """Stands in for a SentenceTransformer: fewer, larger batches and more threads are faster."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.fail = False
+
+    def encode(self, texts, batch_size, **kwargs):
+        if self.fail:
+            raise RuntimeError("out of memory")
+        batches = -(-len(texts) // batch_size)
+        time.sleep(0.002 * batches / (self.backend.num_threads or 1))
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+class StubBackend(EmbeddingBackend):
+    name = "stub"
+
+    def _load(self):
+        self.thread_changes = []
+        return StubModel(self)
+
+    def set_num_threads(self, num_threads: int) -> None:
+        self.thread_changes.append(num_threads)
+        self.num_threads = num_threads
+
+
+class StubOnnxBackend(OnnxBackend):
+    def _load(self):
+        return StubModel(self)
+
+    def set_num_threads(self, num_threads: int) -> None:
+        raise AssertionError("ONNX sessions are not rebuilt while autotuning")
+
+
+@pytest.fixture
+def stub_backends(app_config, monkeypatch):
+    monkeypatch.setitem(embeddings_service.BACKENDS, "stub", StubBackend)
+    monkeypatch.setattr(EmbeddingsService, "_backends", {})
+    monkeypatch.setattr(EmbeddingsService, "_autotuned", {})
+    app_config["EMBEDDINGS"] = {"MODEL_NAME": "stub-model", "BACKEND": "stub", "NORMALIZE": False}
+    return app_config
+
+
+def test_backend_and_settings_come_from_config(stub_backends):
+    stub_backends["EMBEDDINGS"].update(BATCH_SIZE=16, NUM_THREADS=3)
+    service = EmbeddingsService()
+    backend = service.backend
+    assert isinstance(backend, StubBackend) and backend.model_name == "stub-model"
+    assert (backend.batch_size, backend.num_threads, backend.normalize) == (16, 3, False)
+    assert EmbeddingsService().backend is backend
+
+    # Both settings are fixed: nothing left to autotune
+    assert EmbeddingsService.preload() is None
+
+    stub_backends["EMBEDDINGS"]["BACKEND"] = "tpu"
+    with pytest.raises(HTTPException) as exc:
+        EmbeddingsService()
+    assert exc.value.status_code == 500 and "Unknown embedding backend" in exc.value.detail
+
+
+def test_autotune_runs_once_at_preload(stub_backends):
+    backend = EmbeddingsService().backend
+    # Loading never autotunes
+    assert (backend.batch_size, backend.thread_changes) == (32, [])
+
+    result = EmbeddingsService.preload()
+    assert result["batch_size"] == 128 == backend.batch_size
+    assert result["num_threads"] == backend.num_threads
+    assert result["chunks_per_sec"] > 0
+
+    backend.model.fail = True
+    assert EmbeddingsService.preload() is result
+
+
+def test_failed_autotune_keeps_the_configured_settings(stub_backends):
+    stub_backends["EMBEDDINGS"]["NUM_THREADS"] = 2
+    backend = EmbeddingsService().backend
+    backend.model.fail = True
+
+    assert EmbeddingsService.preload() is None
+    assert (backend.batch_size, backend.num_threads) == (32, 2)
+
+
+def test_onnx_autotune_only_tunes_the_batch_size():
+    backend = StubOnnxBackend("stub-model", num_threads=2)
+    result = backend.autotune(autotune_samples(count=64), batch_sizes=(8, 64), thread_counts=(1, 4))
+    assert (result["batch_size"], result["num_threads"]) == (64, 2)
@@ -0,0 +1,53 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+pytest.importorskip("PyPDF2")
+pytest.importorskip("multipart")
+
+from backend.app.routes import file_upload  # noqa: E402
+from backend.app.services.metadata_service import MetadataService  # noqa: E402
+from backend.app.services.vector_store_sharded import ShardedFAISSVectorStore  # noqa: E402
+
+TEXT = b"The harbour lighthouse was rebuilt after the storm. The keeper lit the new lamp in May."
+
+
+@pytest.fixture
+def upload_env(vector_store_env, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # uploads are saved under data/uploads
+    return vector_store_env
+
+
+def _upload(db):
+    return file_upload.upload_document(UploadFile(file=io.BytesIO(TEXT), filename="notes.txt"), db=db)
+
+
+def test_upload_stores_vectors_and_metadata(upload_env, async_db):
+    async def scenario():
+        async with async_db() as db:
+            response = await _upload(db)
+            store = ShardedFAISSVectorStore(embedding_dim=64)
+            assert len(store.document_vector_ids(response.document_id)) == response.chunks_created
+
+    asyncio.run(scenario())
+
+
+def test_failed_metadata_save_removes_the_new_vectors(upload_env, async_db, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise HTTPException(status_code=500, detail="Failed to save metadata: database is gone")
+
+    monkeypatch.setattr(MetadataService, "save_metadata_async", staticmethod(fail))
+
+    async def scenario():
+        async with async_db() as db:
+            with pytest.raises(HTTPException) as exc:
+                await _upload(db)
+            assert exc.value.status_code == 500
+
+        store = ShardedFAISSVectorStore(embedding_dim=64)
+        assert sum(shard.ntotal for shard in store.shards) == 0
+        assert store.archive.live_rows().size == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,138 @@
+import asyncio
+import datetime
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from backend.app.models.models import Document
+from backend.app.routes.list_documents_route import get_all_documents
+
+
+def _add_documents(db, count: int, same_time_every: int = 3):
+    """Documents with repeated upload times, so pagination has to break ties on id."""
+    base = datetime.datetime(2024, 1, 1)
+    for i in range(count):
+        db.add(Document(
+            id=f"doc-{i:04d}",
+            filename=f"{'invoice' if i % 2 else 'report'}_{i}.pdf",
+            uploaded_at=base + datetime.timedelta(minutes=i // same_time_every),
+            chunk_count=i,
+        ))
+    db.commit()
+
+
+def _walk(db, limit: int, **kwargs) -> list[dict]:
+    documents, cursor = Document.list_documents(db, limit=limit, **kwargs)
+    pages = [documents]
+    while cursor:
+        documents, cursor = Document.list_documents(db, limit=limit, cursor=cursor, **kwargs)
+        pages.append(documents)
+    return [d for page in pages for d in page]
+
+
+def test_keyset_walk_returns_every_document_once_newest_first(db_session):
+    _add_documents(db_session, 23)
+    documents = _walk(db_session, limit=5)
+
+    ids = [d["document_id"] for d in documents]
+    assert sorted(ids) == sorted(f"doc-{i:04d}" for i in range(23))
+    keys = [(d["uploaded_at"], d["document_id"]) for d in documents]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_last_page_has_no_cursor(db_session):
+    _add_documents(db_session, 4)
+    documents, cursor = Document.list_documents(db_session, limit=4)
+    assert len(documents) == 4 and cursor is None
+
+
+def test_filename_prefix_is_matched_literally(db_session):
+    _add_documents(db_session, 10)
+    db_session.add(Document(id="wild", filename="invoice%_x.pdf", uploaded_at=datetime.datetime(2025, 1, 1)))
+    db_session.commit()
+
+    assert {d["filename"] for d in _walk(db_session, limit=2, filename_prefix="invoice%")} == {"invoice%_x.pdf"}
+    assert len(_walk(db_session, limit=2, filename_prefix="invoice")) == 6
+
+
+def test_route_pages_with_cursor_header_and_estimate(async_db):
+    async def scenario():
+        async with async_db() as db:
+            await db.run_sync(lambda session: _add_documents(session, 7))
+
+            first = Response()
+            documents = await get_all_documents(first, limit=5, cursor=None, filename_prefix="invoice", db=db)
+            assert len(documents) == 3 and "X-Next-Cursor" not in first.headers
+            assert first.headers["X-Total-Count-Estimate"] == "3"
+
+            response = Response()
+            page = await get_all_documents(response, limit=5, cursor=None, filename_prefix=None, db=db)
+            cursor = response.headers["X-Next-Cursor"]
+            response = Response()
+            rest = await get_all_documents(response, limit=5, cursor=cursor, filename_prefix=None, db=db)
+            assert len(page) + len(rest) == 7 and "X-Total-Count-Estimate" not in response.headers
+
+    asyncio.run(scenario())
+
+
+def test_explain_estimate_is_parsed_from_json_text():
+    plan = [{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 42}}]
+    assert Document._parse_estimate(plan, "explain") == 42
+    # asyncpg returns EXPLAIN (FORMAT JSON) as a string
+    assert Document._parse_estimate('[{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 42}}]', "explain") == 42
+    assert Document._parse_estimate(-1, "reltuples") is None
+
+
+def test_malformed_cursor_is_a_400(db_session):
+    with pytest.raises(HTTPException) as err:
+        Document.list_documents(db_session, limit=5, cursor="not-a-cursor")
+    assert err.value.status_code == 400
+
+
+def test_uploaded_at_is_required(db_session):
+    with pytest.raises(IntegrityError):
+        db_session.execute(text("INSERT INTO documents (id, filename, uploaded_at) VALUES ('x', 'x.pdf', NULL)"))
+
+
+def test_upgrade_schema_backfills_null_upload_times(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        # Table as created before uploaded_at was NOT NULL
+        conn.execute(text(
+            "CREATE TABLE documents (id VARCHAR PRIMARY KEY, filename VARCHAR NOT NULL, uploaded_at DATETIME, "
+            "chunk_count INTEGER, extra_metadata JSON, faiss_index_path VARCHAR)"
+        ))
+        conn.execute(text("INSERT INTO documents (id, filename, uploaded_at) VALUES ('a', 'a.pdf', NULL)"))
+        conn.execute(text("INSERT INTO documents (id, filename, uploaded_at) VALUES ('b', 'b.pdf', '2024-01-01 00:00:00.000000')"))
+        Document.upgrade_schema(conn)
+
+    from sqlalchemy.orm import Session
+
+    with Session(engine) as db:
+        documents, _ = Document.list_documents(db, limit=1)
+        assert documents[0]["document_id"] == "b"
+        _, cursor = Document.list_documents(db, limit=1)
+        documents, cursor = Document.list_documents(db, limit=1, cursor=cursor)
+        assert documents[0]["document_id"] == "a" and cursor is None
+    engine.dispose()
+
+
+def test_init_db_adds_listing_indexes_to_an_existing_table(tmp_path, monkeypatch):
+    from backend.app.utils import database
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        # Table created before the listing indexes existed; create_all leaves it alone
+        conn.execute(text(
+            "CREATE TABLE documents (id VARCHAR PRIMARY KEY, filename VARCHAR NOT NULL, uploaded_at DATETIME, "
+            "chunk_count INTEGER, extra_metadata JSON, faiss_index_path VARCHAR)"
+        ))
+    monkeypatch.setattr(database, "get_engine", lambda: engine)
+
+    for _ in range(2):  # safe to run on every startup
+        database.init_db()
+        names = {index["name"] for index in inspect(engine).get_indexes("documents")}
+        assert {"ix_documents_uploaded_at_id", "ix_documents_filename_prefix"} <= names
+    engine.dispose()
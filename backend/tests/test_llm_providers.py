@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.app.services import llm_providers
+from backend.app.services.llm_providers import FakeLLM, FakeProvider, RecordingProvider, get_llm_provider
+from backend.app.utils.metrics import metrics
+
+FAKE = {"LATENCY_SECONDS": 0, "JITTER_SECONDS": 0, "TOKENS_PER_SECOND": 0, "OUTPUT_TOKENS": 8}
+
+
+def _counter(name: str) -> float:
+    return metrics.snapshot()["counters"].get(name, 0)
+
+
+def test_record_then_replay_without_the_provider(tmp_path):
+    path = str(tmp_path / "recordings" / "llm.jsonl")
+    recorder = RecordingProvider(FakeProvider({"FAKE": FAKE}), path=path, mode="record")
+    answers = {prompt: asyncio.run(recorder.agenerate(prompt)) for prompt in ("first", "second")}
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry["prompt"] for entry in entries] == ["first", "second"]
+    assert recorder.model == "llama-3.3-70b-versatile" and recorder.timeout_seconds == 30
+
+    # The wrapped provider now always fails: recorded prompts are still answered
+    failing = FakeProvider({"FAKE": dict(FAKE, ERROR_RATE=1.0)})
+    replayer = RecordingProvider(failing, path=path, mode="replay")
+    hits, misses = _counter("llm.replay.hits"), _counter("llm.replay.misses")
+    for prompt, answer in answers.items():
+        assert asyncio.run(replayer.agenerate(prompt)) == answer
+    assert _counter("llm.replay.hits") == hits + 2
+
+    errors = _counter("llm.fake.errors")
+    with pytest.raises(RuntimeError):
+        asyncio.run(replayer.agenerate("never recorded"))
+    assert _counter("llm.replay.misses") == misses + 1
+    assert _counter("llm.fake.errors") == errors + 1
+
+
+def test_fake_server_errors_are_counted_and_raised(fake_server_provider):
+    provider = fake_server_provider(FakeLLM(latency_seconds=0, jitter_seconds=0, error_rate=1.0))
+    errors = _counter("llm.fake_server.errors")
+
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        asyncio.run(provider.agenerate("question"))
+    assert exc.value.response.status_code == 503
+    assert _counter("llm.fake_server.errors") == errors + 1
+
+
+def test_fake_server_answers_deterministically(fake_server_provider):
+    fake = FakeLLM(latency_seconds=0, jitter_seconds=0, tokens_per_second=0, output_tokens=5)
+    provider = fake_server_provider(fake)
+    answer = asyncio.run(provider.agenerate("question"))
+    assert answer == asyncio.run(provider.agenerate("question"))
+    assert len(answer.split()) == 5
+
+
+def test_invalid_configuration_raises_value_error(app_config, monkeypatch):
+    monkeypatch.setattr(llm_providers, "_provider", None)
+    app_config["LLM"] = {"PROVIDER": "nope"}
+    with pytest.raises(ValueError, match="Unknown LLM provider"):
+        get_llm_provider()
+
+    app_config["LLM"] = {"PROVIDER": "fake", "RECORD": {"MODE": "rewind"}}
+    with pytest.raises(ValueError, match="RECORD.MODE"):
+        get_llm_provider()
+
+    app_config["LLM"] = {"PROVIDER": "fake", "TIMEOUT_SECONDS": 5, "MAX_RETRIES": 2}
+    provider = get_llm_provider()
+    assert (provider.timeout_seconds, provider.max_retries) == (5.0, 2)
+    assert get_llm_provider() is provider
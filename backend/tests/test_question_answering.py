@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.models.models import Document
+from backend.app.services import answer_cache, llm_providers
+from backend.app.services.answer_cache import AnswerCache
+from backend.app.services.llm_providers import FakeLLM
+from backend.app.services.question_answering import QuestionAnsweringService
+from backend.app.utils.metrics import metrics
+
+CHUNKS = [
+    "The project budget was approved in March and covers two full quarters of work.",
+    "Delivery of the first milestone is scheduled for the end of June this year.",
+    "The main risk is the vendor contract, which is still under legal review.",
+]
+
+
+@pytest.fixture
+def qa_env(vector_store_env, monkeypatch):
+    """Scratch vector store plus a fake LLM without latency and fresh answer/provider singletons."""
+    vector_store_env["LLM"] = {
+        "PROVIDER": "fake",
+        "FAKE": {"LATENCY_SECONDS": 0, "JITTER_SECONDS": 0, "TOKENS_PER_SECOND": 0, "ERROR_RATE": 0},
+    }
+    vector_store_env["QA"]["MIN_RELEVANCE"] = 0.0
+    monkeypatch.setattr(llm_providers, "_provider", None)
+    monkeypatch.setattr(answer_cache, "_answer_cache", None)
+    return vector_store_env
+
+
+def _counter(name: str) -> float:
+    return metrics.snapshot()["counters"].get(name, 0)
+
+
+def test_answers_are_cached_per_document_revision(qa_env, ingest, async_db):
+    async def scenario():
+        async with async_db() as db:
+            document_id, _ = await ingest(db, CHUNKS)
+            qa = QuestionAnsweringService(db)
+
+            first = await qa.answer_question(document_id, "When is the milestone due?")
+            assert not first.cached and not first.degraded
+            assert "milestone" in first.sources[0].chunk_text
+            second = await qa.answer_question(document_id, "  when is the MILESTONE due? ")
+            assert second.cached and second.answer == first.answer
+
+            # A re-ingestion committed by another worker bumps the revision; this worker's
+            # cache was never invalidated but must not serve the old answer
+            document = await db.get(Document, document_id)
+            document.extra_metadata = dict(document.extra_metadata or {}, revision=2)
+            await db.commit()
+            third = await qa.answer_question(document_id, "When is the milestone due?")
+            assert not third.cached
+
+    asyncio.run(scenario())
+
+
+def test_deleted_document_is_not_served_from_cache(qa_env, ingest, async_db):
+    async def scenario():
+        async with async_db() as db:
+            document_id, _ = await ingest(db, CHUNKS)
+            qa = QuestionAnsweringService(db)
+            await qa.answer_question(document_id, "What is the main risk?")
+
+            # Deleted by another worker: its local cache still holds the answer
+            await Document.delete_metadata_async(db, document_id)
+            with pytest.raises(HTTPException) as exc:
+                await qa.answer_question(document_id, "What is the main risk?")
+            assert exc.value.status_code == 404
+
+    asyncio.run(scenario())
+
+
+def test_llm_failure_returns_degraded_extractive_answer(qa_env, ingest, async_db):
+    qa_env["LLM"]["FAKE"]["ERROR_RATE"] = 1.0
+
+    async def scenario():
+        async with async_db() as db:
+            document_id, _ = await ingest(db, CHUNKS)
+            qa = QuestionAnsweringService(db)
+            errors = _counter("qa.llm.errors")
+
+            response = await qa.answer_question(document_id, "What is the main risk?")
+            assert response.degraded and not response.cached
+            # Extractive: source sentences only, the most relevant one first
+            assert response.answer.startswith(CHUNKS[2])
+            assert all(sentence in response.answer for sentence in CHUNKS)
+            assert _counter("qa.llm.errors") == errors + 1
+
+            # Degraded answers are not cached
+            again = await qa.answer_question(document_id, "What is the main risk?")
+            assert again.degraded and not again.cached
+
+    asyncio.run(scenario())
+
+
+def test_llm_server_error_returns_degraded_answer(qa_env, ingest, async_db, fake_server_provider, monkeypatch):
+    provider = fake_server_provider(FakeLLM(latency_seconds=0, jitter_seconds=0, error_rate=1.0), error_status=503)
+    monkeypatch.setattr(llm_providers, "_provider", provider)
+
+    async def scenario():
+        async with async_db() as db:
+            document_id, _ = await ingest(db, CHUNKS)
+            errors = _counter("llm.fake_server.errors")
+            response = await QuestionAnsweringService(db).answer_question(document_id, "What is the main risk?")
+            assert response.degraded and response.answer.startswith(CHUNKS[2])
+            assert _counter("llm.fake_server.errors") == errors + 1
+
+    asyncio.run(scenario())
+
+
+def test_llm_past_the_deadline_returns_degraded_answer(qa_env, ingest, async_db):
+    qa_env["LLM"]["FAKE"]["LATENCY_SECONDS"] = 5
+    qa_env["QA"]["FALLBACK_RESERVE_SECONDS"] = 0.1
+
+    async def scenario():
+        async with async_db() as db:
+            document_id, _ = await ingest(db, CHUNKS)
+            qa = QuestionAnsweringService(db)
+            start = time.monotonic()
+            response = await qa.answer_question(
+                document_id, "What does the budget cover?", deadline=time.monotonic() + 0.5
+            )
+            assert response.degraded
+            assert time.monotonic() - start < 2
+
+    asyncio.run(scenario())
+
+
+def test_answer_cache_ttl_and_lru(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now[0])
+    cache = AnswerCache(max_entries=2, ttl_seconds=10)
+    a, b, c = (AnswerCache.key("doc", 1, q, 5) for q in ("a", "b", "c"))
+
+    cache.put(a, {"answer": "A"})
+    now[0] += 9
+    assert cache.get(a) == {"answer": "A"}
+    now[0] += 2
+    assert cache.get(a) is None
+
+    cache.put(a, {"answer": "A"})
+    cache.put(b, {"answer": "B"})
+    cache.get(a)
+    cache.put(c, {"answer": "C"})
+    # b was least recently used
+    assert cache.get(b) is None and cache.get(a) and cache.get(c)
+
+    assert AnswerCache.key("doc", 1, "q", 5) != AnswerCache.key("doc", 2, "q", 5)
+    cache.invalidate_document("doc")
+    assert cache.get(a) is None and cache.get(c) is None
+
+
+def test_question_without_document_searches_the_corpus(qa_env, ingest, async_db):
+    qa_env["VECTOR_STORE"]["ROUTING"] = {"ENABLED": True, "CANDIDATE_DOCUMENTS": 1}
+    other_chunks = [
+        "The cafeteria menu changes every Monday with seasonal soups.",
+        "Parking permits are renewed at the front desk in January.",
+    ]
+
+    async def scenario():
+        async with async_db() as db:
+            plan_id, _ = await ingest(db, CHUNKS)
+            other_id, _ = await ingest(db, other_chunks)
+            qa = QuestionAnsweringService(db)
+
+            response = await qa.answer_question(None, "When are parking permits renewed?", top_k=2)
+            assert response.document_id is None and not response.degraded
+            assert response.sources[0].document_id == other_id
+            assert response.sources[0].chunk_text == other_chunks[1]
+
+            response = await qa.answer_question(None, "Who reviews the vendor contract?", top_k=2)
+            assert {source.document_id for source in response.sources} == {plan_id}
+            # Corpus-wide answers depend on every document and are never cached
+            again = await qa.answer_question(None, "Who reviews the vendor contract?", top_k=2)
+            assert not again.cached
+
+    asyncio.run(scenario())
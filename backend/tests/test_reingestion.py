@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.models.models import Document, DocumentChunk
+from backend.app.services import reingestion_service
+from backend.app.services.reingestion_service import ReingestionService
+from backend.app.services.vector_store_sharded import ShardedFAISSVectorStore
+from backend.app.utils import admission
+from backend.app.utils.metrics import metrics
+
+CHUNKS = [
+    "Chapter one introduces the harbour town and its lighthouse keeper.",
+    "Chapter two follows the storm that wrecks the fishing fleet.",
+    "Chapter three ends with the keeper rebuilding the lamp.",
+]
+
+
+def _store_ids(document_id: str) -> list[int]:
+    return ShardedFAISSVectorStore(embedding_dim=64).document_vector_ids(document_id).tolist()
+
+
+def _race_at_indexing(monkeypatch, bump):
+    """Run `bump` (another writer's commit) when the update reaches the indexing stage."""
+    get_limiter = reingestion_service.get_limiter
+
+    class RacingStage:
+        @staticmethod
+        @contextlib.asynccontextmanager
+        async def slot(deadline=None):
+            await bump()
+            yield
+
+    monkeypatch.setattr(
+        reingestion_service, "get_limiter", lambda stage: RacingStage if stage == "indexing" else get_limiter(stage)
+    )
+
+
+def test_diff_chunks_reuses_unchanged_texts_once():
+    old = [(10, "a"), (11, "b"), (12, "a"), (13, "c")]
+    reused, removed = ReingestionService.diff_chunks(old, ["a", "x", "a", "a", "c"])
+    assert reused == [10, None, 12, None, 13]
+    assert removed == [11]
+
+
+def test_update_embeds_only_changed_chunks(vector_store_env, ingest, async_db):
+    async def scenario():
+        async with async_db() as db:
+            document_id, ids = await ingest(db, CHUNKS, "story.txt")
+            new_chunks = [CHUNKS[0], "Chapter two is now about a calm summer.", CHUNKS[2]]
+
+            result = await ReingestionService.update_document(db, document_id, "story.txt", new_chunks)
+            assert (result["chunks_reused"], result["chunks_embedded"], result["chunks_removed"]) == (2, 1, 1)
+
+            rows = await DocumentChunk.get_chunks_async(db, document_id)
+            assert [row.text for row in rows] == new_chunks
+            assert rows[0].vector_id == ids[0] and rows[2].vector_id == ids[2]
+            assert rows[1].vector_id not in ids
+            assert _store_ids(document_id) == sorted(row.vector_id for row in rows)
+            assert (await db.get(Document, document_id)).revision == 2
+
+    asyncio.run(scenario())
+
+
+def test_legacy_document_keeps_its_vectors_until_the_update_commits(vector_store_env, ingest, async_db, monkeypatch):
+    async def scenario():
+        async with async_db() as db, async_db() as other:
+            # Ingested before chunk texts were stored: re-embedded in full
+            document_id, old_ids = await ingest(db, CHUNKS, "story.txt", with_chunk_rows=False)
+
+            async def bump():
+                document = await other.get(Document, document_id)
+                document.extra_metadata = dict(document.extra_metadata, revision=5)
+                await other.commit()
+
+            _race_at_indexing(monkeypatch, bump)
+            with pytest.raises(HTTPException) as exc:
+                await ReingestionService.update_document(db, document_id, "story.txt", CHUNKS[:2])
+            assert exc.value.status_code == 409
+            # The refused update neither removed the stored vectors nor left its own behind
+            assert _store_ids(document_id) == old_ids
+
+            monkeypatch.setattr(reingestion_service, "get_limiter", admission.get_limiter)
+            result = await ReingestionService.update_document(db, document_id, "story.txt", CHUNKS[:2])
+            assert (result["chunks_embedded"], result["chunks_removed"]) == (2, 3)
+            rows = await DocumentChunk.get_chunks_async(db, document_id)
+            assert _store_ids(document_id) == [row.vector_id for row in rows]
+            assert not set(old_ids) & {row.vector_id for row in rows}
+
+    asyncio.run(scenario())
+
+
+def test_failed_stale_vector_removal_does_not_fail_the_update(vector_store_env, ingest, async_db, monkeypatch):
+    def fail(self, document_id, vector_ids):
+        raise OSError("disk full")
+
+    async def scenario():
+        async with async_db() as db:
+            document_id, _ = await ingest(db, CHUNKS, "story.txt")
+            failures = metrics.snapshot()["counters"].get("reingestion.remove_failures", 0)
+            monkeypatch.setattr(ShardedFAISSVectorStore, "remove_vectors", fail)
+
+            result = await ReingestionService.update_document(db, document_id, "story.txt", CHUNKS[:2])
+            assert result["chunk_count"] == 2
+            assert metrics.snapshot()["counters"]["reingestion.remove_failures"] == failures + 1
+            assert (await db.get(Document, document_id)).chunk_count == 2
+
+    asyncio.run(scenario())
+
+
+def test_update_of_unknown_document_is_404(vector_store_env, async_db):
+    async def scenario():
+        async with async_db() as db:
+            with pytest.raises(HTTPException) as exc:
+                await ReingestionService.update_document(db, str(uuid.uuid4()), "x.txt", ["text"])
+            assert exc.value.status_code == 404
+
+    asyncio.run(scenario())
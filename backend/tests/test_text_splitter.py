@@ -0,0 +1,32 @@
+from backend.app.services.text_spitter import TextSplitter
+
+TEXT = " ".join(f"word{i:03d}" for i in range(400))
+
+
+def test_content_defined_chunks_cover_the_text_within_size():
+    splitter = TextSplitter(chunk_size=200, overlap=20, content_defined=True)
+    chunks = splitter.split_text(TEXT)
+    assert all(len(chunk) <= 200 + 20 for chunk in chunks)
+    assert " ".join(chunks).split()[-1] == "word399"
+    # Every chunk after the first starts inside the previous one, on a word boundary
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.split()[0] in previous.split()[-3:]
+
+
+def test_edit_only_changes_chunks_around_it():
+    splitter = TextSplitter(chunk_size=200, overlap=0, content_defined=True)
+    before = splitter.split_text(TEXT)
+    edited = TEXT.replace("word200", "a much longer replacement for word two hundred")
+    after = splitter.split_text(edited)
+    changed = set(after) - set(before)
+    assert 0 < len(changed) <= 3
+    assert len(set(before) & set(after)) >= len(before) - 3
+
+
+def test_overlap_longer_than_the_previous_text_is_clamped():
+    splitter = TextSplitter(chunk_size=40, overlap=200, content_defined=True)
+    chunks = splitter.split_text(TEXT[:400])
+    assert len(chunks) > 2
+    # The overlap window is clamped to the start of the text instead of wrapping around,
+    # so the second chunk repeats the first one from its first word boundary
+    assert chunks[1].split()[0] == chunks[0].split()[1]
@@ -0,0 +1,114 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from backend.app.services import vector_archive
+from backend.app.services.vector_archive import VectorArchive
+from backend.app.services.vector_store_faiss import FAISSVectorStore
+from backend.app.services.vector_store_sharded import ShardedFAISSVectorStore, document_id_range
+
+DIM = 8
+
+
+def _unit_vectors(seed: int, count: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _live_rows_reference(archive: VectorArchive) -> np.ndarray:
+    """Row-by-row definition of live_rows: newest row per id, not deleted after it was written."""
+    ids, _ = archive.open()
+    tombstones = archive._tombstones()
+    newest = {int(i): row for row, i in enumerate(ids)}
+    return np.array(sorted(
+        row for i, row in newest.items()
+        if not any(s <= i < e and row < c for s, e, c in tombstones)
+    ), dtype=np.int64)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    FAISSVectorStore._loaded.clear()
+    yield
+    FAISSVectorStore._loaded.clear()
+
+
+def test_live_rows_follow_appends_and_deletes(tmp_path):
+    archive = VectorArchive(str(tmp_path / "archive"))
+    rng = np.random.default_rng(0)
+    for step in range(30):
+        ids = rng.choice(200, size=rng.integers(1, 20), replace=False)
+        archive.append(ids, rng.random((len(ids), DIM), dtype=np.float32))
+        if step % 3 == 0:
+            archive.delete_ids(rng.choice(200, size=15, replace=False))
+        if step % 7 == 0:
+            start = int(rng.integers(0, 190))
+            archive.delete_range(start, start + 10)
+
+    np.testing.assert_array_equal(archive.live_rows(), _live_rows_reference(archive))
+
+
+def test_delete_ids_writes_consecutive_ids_as_one_range(tmp_path):
+    archive = VectorArchive(str(tmp_path / "archive"))
+    archive.append(np.arange(10), np.zeros((10, DIM), dtype=np.float32))
+    archive.delete_ids([3, 4, 5, 5, 8, 1])
+
+    np.testing.assert_array_equal(archive._tombstones(), [[1, 2, 10], [3, 6, 10], [8, 9, 10]])
+    ids, _ = archive.open()
+    np.testing.assert_array_equal(ids[archive.live_rows()], [0, 2, 6, 7, 9])
+
+
+def test_get_vectors_returns_newest_row_per_id(tmp_path):
+    archive = VectorArchive(str(tmp_path / "archive"))
+    archive.append([5, 6], np.full((2, DIM), 1, dtype=np.float32))
+    archive.append([5], np.full((1, DIM), 2, dtype=np.float32))
+
+    vectors = archive.get_vectors([6, 5, 5])
+    np.testing.assert_array_equal(vectors[:, 0], [1, 2, 2])
+    with pytest.raises(KeyError):
+        archive.get_vectors([7])
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf"])
+def test_rebuilt_shards_support_deletes_and_rebalance(tmp_path, index_type):
+    base_path = str(tmp_path / "faiss_index")
+    store = ShardedFAISSVectorStore(base_path=base_path, embedding_dim=DIM)
+    documents = {str(uuid.uuid4()): _unit_vectors(seed, 40) for seed in range(10)}
+    for document_id, vectors in documents.items():
+        store.add_embeddings(vectors, document_id, new_document=True)
+
+    vector_archive.rebuild(base_path, index_type)
+    store = ShardedFAISSVectorStore(base_path=base_path, embedding_dim=DIM)
+    first, second = list(documents)[:2]
+
+    assert store.delete_document(first) == 40
+    assert len(store.search(documents[first][0], top_k=5, document_id=first)[0]) == 0
+    ids = store.shards[store.shard_for(second)].ids_in_ranges([document_id_range(second)])
+    assert store.remove_vectors(second, ids[:10]) == 10
+    found, _ = store.search(documents[second][20], top_k=5, document_id=second)
+    assert len(found) and not np.isin(found, ids[:10]).any()
+
+    # Rebalancing reads vectors back from the archive when a shard cannot reconstruct (IVF)
+    assert store.rebalance(3)["vectors_moved"] > 0
+    total = sum(shard.ntotal for shard in store.shards)
+    assert total == 10 * 40 - 40 - 10
+    found, scores = store.search(documents[second][20], top_k=1, document_id=second)
+    assert found[0] == ids[20] and scores[0] > 0.99
+
+
+
+def test_rebuild_normalizes_archived_vectors(tmp_path):
+    base_path = str(tmp_path / "faiss_index")
+    store = ShardedFAISSVectorStore(base_path=base_path, embedding_dim=DIM)
+    document_id = str(uuid.uuid4())
+    # Archived before embeddings were normalized
+    vectors = _unit_vectors(0, 300) * np.random.default_rng(1).uniform(0.2, 5.0, (300, 1)).astype(np.float32)
+    store.add_embeddings(vectors, document_id, new_document=True)
+
+    vector_archive.rebuild(base_path, "ivf", metric="l2")
+    store = ShardedFAISSVectorStore(base_path=base_path, embedding_dim=DIM)
+    # Queries are normalized embeddings
+    found, scores = store.search(_unit_vectors(0, 300)[7], top_k=1, document_id=document_id)
+    assert found[0] == document_id_range(document_id)[0] + 7
+    assert scores[0] == pytest.approx(1.0, abs=1e-4)
@@ -0,0 +1,198 @@
+import multiprocessing as mp
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from backend.app.services.vector_store_faiss import FAISSVectorStore
+
+DIM = 16
+
+
+def _vectors(seed: int, count: int) -> np.ndarray:
+    return np.random.default_rng(seed).random((count, DIM), dtype=np.float32)
+
+
+def _store(path, **kwargs) -> FAISSVectorStore:
+    kwargs.setdefault("compact_min_vectors", 200)
+    return FAISSVectorStore(index_path=str(path), embedding_dim=DIM, **kwargs)
+
+
+def _reopen(path, **kwargs) -> FAISSVectorStore:
+    """A store that reads everything back from disk, like a fresh process."""
+    FAISSVectorStore._loaded.pop(str(path), None)
+    return _store(path, **kwargs)
+
+
+def _write_batches(index_path: str, writer_id: int, batches: int, batch_size: int, results) -> None:
+    ids = []
+    for batch in range(batches):
+        store = _store(index_path)
+        ids.extend(store.add_embeddings(_vectors(writer_id * 1000 + batch, batch_size)))
+    results.put((writer_id, ids))
+
+
+def _assert_all_stored(store, written: dict, batches: int, batch_size: int) -> None:
+    all_ids = [i for ids in written.values() for i in ids]
+    assert len(set(all_ids)) == len(all_ids)
+    assert store.ntotal == len(all_ids)
+    np.testing.assert_array_equal(store.sorted_ids(), np.sort(all_ids))
+    for writer_id, ids in written.items():
+        expected = np.vstack([_vectors(writer_id * 1000 + b, batch_size) for b in range(batches)])
+        np.testing.assert_allclose(store.reconstruct(ids), expected)
+        found, distances = store.search(expected[0], top_k=1)
+        assert found[0] == ids[0] and distances[0] < 1e-6
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    FAISSVectorStore._loaded.clear()
+    yield
+    FAISSVectorStore._loaded.clear()
+
+
+def test_concurrent_process_writers_lose_no_vectors(tmp_path):
+    index_path = str(tmp_path / "index.faiss")
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    writers, batches, batch_size = 4, 15, 20
+    processes = [
+        ctx.Process(target=_write_batches, args=(index_path, w, batches, batch_size, results))
+        for w in range(writers)
+    ]
+    for p in processes:
+        p.start()
+    written = dict(results.get(timeout=120) for _ in processes)
+    for p in processes:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+    # 1200 vectors with compaction at 200: segments were merged and folded into the base
+    _assert_all_stored(_reopen(index_path), written, batches, batch_size)
+
+
+def test_concurrent_thread_writers_lose_no_vectors(tmp_path):
+    index_path = str(tmp_path / "index.faiss")
+    written, lock = {}, threading.Lock()
+    batches, batch_size = 10, 15
+
+    def write(writer_id):
+        ids = []
+        for batch in range(batches):
+            ids.extend(_store(index_path).add_embeddings(_vectors(writer_id * 1000 + batch, batch_size)))
+        with lock:
+            written[writer_id] = ids
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    _assert_all_stored(_store(index_path), written, batches, batch_size)
+    _assert_all_stored(_reopen(index_path), written, batches, batch_size)
+
+
+def test_small_write_does_not_rewrite_base(tmp_path):
+    store = _store(tmp_path / "index.faiss", compact_min_vectors=10_000)
+    store.add_embeddings(_vectors(0, 5000))
+    store.save_index()
+    base = store._read_manifest()["snapshot"]
+    base_size = os.path.getsize(store._path(base))
+
+    store.add_embeddings(_vectors(1, 3))
+    manifest = store._read_manifest()
+    assert manifest["snapshot"] == base
+    assert os.path.getsize(store._path(manifest["segments"][-1]["file"])) < base_size / 100
+    assert manifest["ntotal"] == 5003
+
+
+def test_removed_ids_are_hidden_and_can_be_reused(tmp_path):
+    path = tmp_path / "index.faiss"
+    store = _store(path, metric="ip")
+    first = _vectors(0, 10)
+    ids = store.add_embeddings(first, id_range=(100, 200))
+    assert ids == list(range(100, 110))
+
+    assert store.remove_id_range(100, 105) == 5
+    assert store.remove_ids([105, 105, 999]) == 1
+    assert store.ntotal == 4
+    found, _ = store.search(first[0], top_k=10)
+    assert set(found.tolist()) == {106, 107, 108, 109}
+    found, _ = store.search(first[0], top_k=10, id_range=(100, 107))
+    assert found.tolist() == [106]
+
+    # Re-adding a removed id makes the new vector visible, not the tombstoned one
+    replacement = _vectors(1, 1)
+    store.add_embeddings(replacement, ids=[100])
+    np.testing.assert_allclose(store.reconstruct([100]), replacement)
+    assert store.add_embeddings(_vectors(2, 1), id_range=(100, 200)) == [110]
+
+    for reopened in (_reopen(path, metric="ip"), store):
+        reopened.refresh()
+        reopened.save_index()
+        assert reopened.ntotal == 6
+        np.testing.assert_array_equal(reopened.sorted_ids(), [100, 106, 107, 108, 109, 110])
+        np.testing.assert_allclose(reopened.reconstruct([100, 106]), np.vstack([replacement, first[6:7]]))
+
+
+def test_replace_id_range_is_one_version(tmp_path):
+    store = _store(tmp_path / "index.faiss")
+    store.add_embeddings(_vectors(0, 4), ids=[10, 11, 12, 13])
+    version = store.version
+    store.replace_id_range(10, 20, _vectors(1, 2), [10, 11])
+    assert store.version == version + 1
+    np.testing.assert_array_equal(store.sorted_ids(), [10, 11])
+    np.testing.assert_allclose(store.reconstruct([10, 11]), _vectors(1, 2))
+
+
+def test_readers_pick_up_new_versions(tmp_path):
+    path = tmp_path / "index.faiss"
+    writer = _store(path)
+    reader = _store(path)
+    writer.add_embeddings(_vectors(0, 3))
+    FAISSVectorStore._loaded.pop(str(path))
+    writer_vectors = _vectors(1, 2)
+    writer.add_embeddings(writer_vectors)
+
+    assert reader.ntotal == 5
+    found, _ = reader.search(writer_vectors[1], top_k=1)
+    assert found.tolist() == [4]
+
+
+def test_legacy_single_file_index_is_upgraded(tmp_path):
+    import faiss
+
+    path = tmp_path / "index.faiss"
+    legacy = faiss.IndexFlatL2(DIM)
+    legacy.add(_vectors(0, 6))
+    faiss.write_index(legacy, str(path))
+
+    store = _store(path)
+    assert store.ntotal == 6
+    assert store.add_embeddings(_vectors(1, 2)) == [6, 7]
+    store.remove_ids([0])
+    store.save_index()
+    assert FAISSVectorStore._is_id_mapped(store.snapshot.base.index)
+    np.testing.assert_array_equal(store.sorted_ids(), [1, 2, 3, 4, 5, 6, 7])
+    np.testing.assert_allclose(store.reconstruct([5]), _vectors(0, 6)[5:6])
+
+
+def test_cosine_scores_of_l2_index_do_not_assume_unit_norm(tmp_path):
+    store = _store(tmp_path / "index.faiss", metric="l2")
+    # Unnormalized, like vectors written before embeddings were normalized
+    vectors = _vectors(0, 50) * np.random.default_rng(1).uniform(0.2, 5.0, (50, 1)).astype(np.float32)
+    store.add_embeddings(vectors)
+    query = _vectors(2, 1)[0]
+
+    found, scores = store.search(query, top_k=10, cosine=True)
+    expected = (vectors[found] @ query) / (np.linalg.norm(vectors[found], axis=1) * np.linalg.norm(query))
+    np.testing.assert_allclose(scores, expected, rtol=1e-5)
+    assert (np.diff(scores) <= 1e-6).all()
+
+    found, scores = store.search_id_ranges(query, 5, [(0, 25)], cosine=True)
+    assert (found < 25).all()
+    np.testing.assert_allclose(
+        scores, (vectors[found] @ query) / (np.linalg.norm(vectors[found], axis=1) * np.linalg.norm(query)), rtol=1e-5
+    )
@@ -0,0 +1,167 @@
+import datetime
+import uuid
+
+import numpy as np
+import pytest
+
+from backend.app.models.models import Document
+from backend.app.services import vector_store_sharded
+from backend.app.services.vector_store_faiss import FAISSVectorStore
+from backend.app.services.vector_store_sharded import (
+    CHUNK_BITS,
+    DocumentKeyCollisionError,
+    ShardedFAISSVectorStore,
+    document_id_range,
+    document_key,
+    migrate_legacy,
+)
+
+DIM = 8
+
+
+def _unit_vectors(seed: int, count: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def store(tmp_path):
+    FAISSVectorStore._loaded.clear()
+    yield ShardedFAISSVectorStore(base_path=str(tmp_path / "faiss_index"), embedding_dim=DIM)
+    FAISSVectorStore._loaded.clear()
+
+
+def test_document_ids_stay_in_their_range_and_shard(store):
+    document_id = str(uuid.uuid4())
+    ids = store.add_embeddings(_unit_vectors(0, 5), document_id, new_document=True)
+    start, end = document_id_range(document_id)
+    assert ids == list(range(start, start + 5))
+    assert end - start == 1 << CHUNK_BITS
+    assert start >> CHUNK_BITS == document_key(document_id)
+    shard = store.shards[document_key(document_id) % store.num_shards]
+    np.testing.assert_array_equal(shard.sorted_ids(), ids)
+
+    # Later additions continue after the document's last ordinal
+    assert store.add_embeddings(_unit_vectors(1, 2), document_id) == [start + 5, start + 6]
+
+
+def test_scoped_search_never_returns_other_documents(store):
+    documents = {str(uuid.uuid4()): _unit_vectors(seed, 6) for seed in range(8)}
+    for document_id, vectors in documents.items():
+        store.add_embeddings(vectors, document_id, new_document=True)
+
+    for document_id, vectors in documents.items():
+        start, end = document_id_range(document_id)
+        for other_vectors in documents.values():
+            indices, scores = store.search(other_vectors[0], top_k=10, document_id=document_id)
+            assert len(indices) == 6
+            assert ((indices >= start) & (indices < end)).all()
+            assert (np.diff(scores) <= 1e-6).all()
+
+    deleted = next(iter(documents))
+    assert store.delete_document(deleted) == 6
+    assert len(store.search(documents[deleted][0], top_k=10, document_id=deleted)[0]) == 0
+    for document_id in list(documents)[1:]:
+        assert len(store.search(documents[document_id][0], top_k=10, document_id=document_id)[0]) == 6
+
+
+def test_colliding_document_key_is_refused(store, monkeypatch):
+    monkeypatch.setattr(vector_store_sharded, "document_key", lambda document_id: 42)
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    ids = store.add_embeddings(_unit_vectors(0, 3), first, new_document=True)
+
+    with pytest.raises(DocumentKeyCollisionError):
+        store.add_embeddings(_unit_vectors(1, 3), second, new_document=True)
+
+    # The first document is untouched: same vectors, nothing from the refused one
+    indices, _ = store.search(_unit_vectors(1, 1)[0], top_k=10, document_id=first)
+    assert sorted(indices.tolist()) == ids
+    assert store.archive.live_rows().size == 3
+
+    # Once the range is free again (document deleted) it can be claimed
+    store.delete_document(first)
+    assert store.add_embeddings(_unit_vectors(1, 3), second, new_document=True) == ids
+
+
+def test_migrate_legacy_single_index(store, db_session, tmp_path):
+    import faiss
+
+    legacy_path = str(tmp_path / "faiss_index.index")
+    counts = [3, 1, 4]
+    vectors = np.random.default_rng(0).random((sum(counts), DIM)).astype(np.float32) * 3
+    legacy = faiss.IndexFlatL2(DIM)
+    legacy.add(vectors)
+    faiss.write_index(legacy, legacy_path)
+
+    uploaded = datetime.datetime(2024, 1, 1)
+    document_ids = [str(uuid.uuid4()) for _ in counts]
+    for i, (document_id, count) in enumerate(zip(document_ids, counts)):
+        db_session.add(Document(
+            id=document_id, filename=f"doc{i}.txt", chunk_count=count,
+            uploaded_at=uploaded + datetime.timedelta(minutes=i), faiss_index_path=legacy_path,
+        ))
+    db_session.commit()
+
+    result = migrate_legacy(db_session, legacy_path=legacy_path, base_path=store.base_path)
+    assert result == {"migrated": 3, "skipped": []}
+
+    offset = 0
+    for document_id, count in zip(document_ids, counts):
+        start, _ = document_id_range(document_id)
+        shard = store.shards[store.shard_for(document_id)]
+        ids = shard.ids_in_ranges([document_id_range(document_id)])
+        np.testing.assert_array_equal(ids, np.arange(start, start + count))
+        expected = vectors[offset:offset + count]
+        # Shards use inner product, so migrated vectors are normalized
+        np.testing.assert_allclose(
+            shard.reconstruct(ids), expected / np.linalg.norm(expected, axis=1, keepdims=True), rtol=1e-5
+        )
+        offset += count
+        assert db_session.get(Document, document_id).faiss_index_path == store.index_path
+
+    assert migrate_legacy(db_session, legacy_path=legacy_path, base_path=store.base_path)["migrated"] == 0
+
+
+def test_migrate_legacy_refuses_unattributable_vectors(store, db_session, tmp_path):
+    import faiss
+
+    legacy_path = str(tmp_path / "faiss_index.index")
+    legacy = faiss.IndexFlatL2(DIM)
+    # 5 vectors, but the only remaining document has 3 chunks (a deleted one left its vectors)
+    legacy.add(np.random.default_rng(0).random((5, DIM)).astype(np.float32))
+    faiss.write_index(legacy, legacy_path)
+    db_session.add(Document(id=str(uuid.uuid4()), filename="a.txt", chunk_count=3, faiss_index_path=legacy_path))
+    db_session.commit()
+
+    with pytest.raises(ValueError, match="cannot be attributed"):
+        migrate_legacy(db_session, legacy_path=legacy_path, base_path=store.base_path)
+
+
+def test_routed_search_finds_the_documents_nearest_to_the_query(app_config, tmp_path):
+    app_config["VECTOR_STORE"]["ROUTING"] = {"ENABLED": True, "REPRESENTATIVES": 2, "CANDIDATE_DOCUMENTS": 2}
+    store = ShardedFAISSVectorStore(base_path=str(tmp_path / "faiss_index"), embedding_dim=DIM)
+    rng = np.random.default_rng(0)
+    documents = {}
+    for _ in range(12):
+        # Each document's chunks cluster around its own topic direction
+        topic = _unit_vectors(int(rng.integers(1 << 30)), 1)
+        vectors = topic + 0.05 * rng.standard_normal((6, DIM)).astype(np.float32)
+        documents[str(uuid.uuid4())] = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    for document_id, vectors in documents.items():
+        store.add_embeddings(vectors, document_id, new_document=True)
+    assert store.routing.num_documents() == 12
+
+    for document_id, vectors in documents.items():
+        start, end = document_id_range(document_id)
+        routed, _ = store.search(vectors[0], top_k=3)
+        exhaustive, _ = store.search(vectors[0], top_k=3, exhaustive=True)
+        assert routed[0] == start and ((routed >= start) & (routed < end)).all()
+        np.testing.assert_array_equal(routed, exhaustive)
+
+    # Deleted documents drop out of the routing index and of routed results
+    deleted = next(iter(documents))
+    store.delete_document(deleted)
+    assert store.routing.num_documents() == 11
+    start, end = document_id_range(deleted)
+    routed, _ = store.search(documents[deleted][0], top_k=10)
+    assert not ((routed >= start) & (routed < end)).any()